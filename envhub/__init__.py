@@ -0,0 +1,20 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+_EXPORTS = {
+    "load": "envhub.lazy_env",
+    "LazyEnv": "envhub.lazy_env",
+    "AsyncEnvClient": "envhub.runtime",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    # Imported on first use, so the CLI does not load the crypto and network stacks at startup.
+    if name in _EXPORTS:
+        import importlib
+
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module 'envhub' has no attribute {name!r}")
@@ -4,33 +4,51 @@
 
 import typer
 
-from envhub.decrypt_prod_by_api_key import decrypt_prod_by_api_key
-
 app = typer.Typer(help="EnvHub CLI - Manage your environment variables securely.")
+agent_app = typer.Typer(help="Manage the background agent that keeps decrypted environments in memory.")
+app.add_typer(agent_app, name="agent")
+versions_app = typer.Typer(help="Manage the versions of the project's environment.")
+app.add_typer(versions_app, name="versions")
+
+# Commands that work without the network. They skip the update check, so running them never
+# loads an HTTP stack.
+OFFLINE_COMMANDS = {"logout", "whoami", "reset", "decrypt", "get", "list", "agent"}
 
 
 def check_for_updates_async():
-    """Check for updates in a non-blocking way."""
+    """
+    Check for updates in a non-blocking way.
 
-    def _check():
+    The result of the last check is cached in `~/.EnvHub` (see `envhub.utils.updateCheck`),
+    so PyPI is only asked once per TTL. The check is skipped when stdout is not a terminal
+    or `ENVHUB_NO_UPDATE_CHECK` is set.
+    """
+    from envhub.utils.updateCheck import update_check_enabled, read_cached_latest_version
+
+    if not update_check_enabled():
+        return
+
+    def _notify(latest_version):
         try:
-            import requests
-            from packaging import version
             import importlib.metadata
+            from envhub.utils.updateCheck import update_message
 
-            current_version = importlib.metadata.version("envhub-cli")
-            response = requests.get("https://pypi.org/pypi/envhub-cli/json", timeout=3)
-            latest_version = response.json()["info"]["version"]
-
-            if version.parse(latest_version) > version.parse(current_version):
-                typer.secho(
-                    f"\n⚠️  A new version of EnvHub is available: {current_version} → {latest_version}"
-                    f"\n   Upgrade with: pip install --upgrade envhub-cli\n   Or if using pipx: pipx upgrade envhub-cli\n\n",
-                    fg=typer.colors.YELLOW,
-                )
+            message = update_message(importlib.metadata.version("envhub-cli"), latest_version)
+            if message:
+                typer.secho(message, fg=typer.colors.YELLOW)
         except Exception:
             pass
 
+    fresh, latest_version = read_cached_latest_version()
+    if fresh:
+        _notify(latest_version)
+        return
+
+    def _check():
+        from envhub.utils.updateCheck import fetch_latest_version
+
+        _notify(fetch_latest_version())
+
     # This will run the function _check in a separate thread so that the main thread can continue and won't result
     # in a slow startup
     import threading
@@ -46,6 +64,9 @@ def version_callback(value: bool):
     handles specific exceptions or defaults to a generic message. Exits the
     process after displaying the version if appropriate.
 
+    The latest version is read from the same cache as the update check of the other
+    commands, and PyPI is only asked when the cache has expired.
+
     :param value: The boolean flag to trigger the version display logic. If True,
         the function attempts to retrieve and print the version of the EnvHub CLI.
     :return: The input value, maintaining the original state.
@@ -61,18 +82,12 @@ def version_callback(value: bool):
             typer.echo(f"EnvHub CLI v{__version__}")
 
             try:
-                import requests
-                from packaging import version
-                current_version = __version__
-                response = requests.get("https://pypi.org/pypi/envhub-cli/json", timeout=3)
-                latest_version = response.json()["info"]["version"]
-
-                if version.parse(latest_version) > version.parse(current_version):
-                    typer.secho(
-                        f"\n⚠️  A new version of EnvHub is available: {current_version} → {latest_version}"
-                        f"\n   Upgrade with: pip install --upgrade envhub-cli\n   Or if using pipx: pipx upgrade envhub-cli\n\n",
-                        fg=typer.colors.YELLOW,
-                    )
+                from envhub.utils.updateCheck import get_latest_version, update_check_enabled, update_message
+
+                if update_check_enabled():
+                    message = update_message(__version__, get_latest_version())
+                    if message:
+                        typer.secho(message, fg=typer.colors.YELLOW)
             except Exception:
                 pass
             raise typer.Exit()
@@ -84,6 +99,7 @@ def version_callback(value: bool):
 
 @app.callback()
 def main(
+        ctx: typer.Context,
         version: bool = typer.Option(
             None,
             "--version",
@@ -97,14 +113,16 @@ def main(
     The main function serves as the entry point for the CLI application. It determines if the
     version flag is provided by the user and displays the application version if requested.
     If the version flag is not provided, the function triggers an asynchronous check for updates,
-    ensuring that update checks only occur during active CLI commands.
+    ensuring that update checks only occur during active CLI commands that use the network.
 
+    :param ctx: The Typer context, used to find the command being run.
+    :type ctx: typer.Context
     :param version: A boolean flag that, when set, triggers the display of the application
         version and prevents further execution of the program logic.
     :callback version: Calls the `version_callback` function to handle the version flag.
     :return: None
     """
-    if not version:
+    if not version and ctx.invoked_subcommand not in OFFLINE_COMMANDS:
         check_for_updates_async()
 
 
@@ -180,7 +198,10 @@ def whoami():
 
 
 @app.command("clone")
-def clone_project(project_name: str):
+def clone_project(
+        project_name: str,
+        upgrade: bool = typer.Option(False, "--upgrade",
+                                     help="Re-encrypt the cloned values into the single-key v2 format")):
     """
     Clones the specified project using the given project name.
 
@@ -190,12 +211,14 @@ def clone_project(project_name: str):
 
     :param project_name: The name of the project to be cloned.
     :type project_name: str
+    :param upgrade: Re-encrypts the cloned values into the v2 envelope format.
+    :type upgrade: bool
     :return: None
     """
     import asyncio
     from envhub import clone
 
-    asyncio.run(clone.clone(project_name))
+    asyncio.run(clone.clone(project_name, upgrade=upgrade))
 
 
 @app.command("reset")
@@ -214,9 +237,26 @@ def reset_folder():
     reset.reset()
 
 
+def _parse_only(only: list) -> list:
+    """
+    Splits the values of `--only` options, which may hold comma-separated names and globs.
+
+    :param only: The values given to `--only`.
+    :type only: list
+    :return: The names and globs, or None when no filter was given.
+    :rtype: list
+    """
+    if not only:
+        return None
+    return [pattern.strip() for value in only for pattern in value.split(",") if pattern.strip()]
+
+
 @app.command("decrypt")
 def decrypt_command(
-        command: list[str] = typer.Argument(None, help="Optional command to run with decrypted environment")):
+        command: list[str] = typer.Argument(None, help="Optional command to run with decrypted environment"),
+        only: list[str] = typer.Option(None, "--only",
+                                       help="Only decrypt these variables (comma-separated names or globs "
+                                            "such as AWS_*)")):
     """
     Decrypts configurations and either executes a provided command within a decrypted environment
     or securely decrypts configurations without running additional commands.
@@ -224,29 +264,62 @@ def decrypt_command(
     :param command: A list of strings representing an optional command to execute within a decrypted
         runtime environment using the configurations. If no command is provided, only decryption
         and storage will be performed.
+    :param only: Names and globs of the variables to pass to the command; the other variables are
+        not decrypted. Only valid with a command, since `.env` is rewritten otherwise.
     """
     from envhub.decrypt import decrypt_runtime_and_run_command
     from envhub.decrypt_and_store import decrypt_and_store
 
     if command:
         command_str = " ".join(command)
-        decrypt_runtime_and_run_command(command_str)
+        decrypt_runtime_and_run_command(command_str, only=_parse_only(only))
+    elif only:
+        typer.secho("--only requires a command; use `envhub get` or `envhub list --only` to print values",
+                    fg=typer.colors.RED)
+        exit(1)
     else:
         decrypt_and_store()
 
 
+@app.command("get")
+def get_env_var(name: str = typer.Argument(..., help="Name of the variable to print")):
+    """
+    Prints the decrypted value of a single variable of the `.env` file, without decrypting
+    the other variables.
+
+    :param name: The name of the variable.
+    :type name: str
+    :return: None
+    """
+    from envhub.get import get_env_var
+
+    get_env_var(name)
+
+
 @app.command("add")
-def add_env_var():
+def add_env_var(
+        from_file: str = typer.Option(None, "--from-file",
+                                      help="Import every variable from a dotenv or JSON file"),
+        yes: bool = typer.Option(False, "--yes", "-y", help="Publish without asking for confirmation")):
     """
     Adds a new environment variable to the configuration file and sends it to the corresponding
     remote environment management system. Prompts the user for both the variable name and its value
     and securely handles hiding the input for sensitive information. Leverages functionalities to
     interact with the system's `.envhub` file and performs asynchronous operations for communication.
+
+    With `--from-file`, every variable of a dotenv or JSON file is imported instead, and all the
+    changes are published as a single new version.
     """
     import json
     import asyncio
     from envhub.add import add
 
+    if from_file:
+        from envhub.edit import add_from_file
+
+        add_from_file(from_file, assume_yes=yes)
+        return
+
     env_name = typer.prompt("Enter the variable name")
     env_value = typer.prompt("Enter the variable value", hide_input=True)
     with open(".envhub", "r") as f:
@@ -264,8 +337,26 @@ def add_env_var():
     typer.secho("Environment variable added successfully", fg=typer.colors.GREEN)
 
 
+@app.command("edit")
+def edit_env_vars(yes: bool = typer.Option(False, "--yes", "-y", help="Publish without asking for confirmation")):
+    """
+    Opens the decrypted environment variables of the project in your editor and publishes every
+    addition, update and removal as a single new version.
+
+    :param yes: Publishes the changes without asking for confirmation.
+    :type yes: bool
+    :return: None
+    """
+    from envhub.edit import edit
+
+    edit(assume_yes=yes)
+
+
 @app.command("pull")
-def pull_env_vars():
+def pull_env_vars(
+        upgrade: bool = typer.Option(False, "--upgrade",
+                                     help="Re-encrypt the pulled values into the single-key v2 format"),
+        force: bool = typer.Option(False, "--force", help="Download and rewrite .env even if nothing changed")):
     """
     Pulls environment variables from a predefined source.
 
@@ -273,25 +364,35 @@ def pull_env_vars():
     variables from the designated source or service. It is typically used to
     sync environment variables for the application configuration.
 
+    :param upgrade: Re-encrypts the pulled values into the v2 envelope format.
+    :type upgrade: bool
+    :param force: Downloads and rewrites `.env` even if the project did not change.
+    :type force: bool
     :return: None
     """
     from envhub.pull import pull
 
-    pull()
+    pull(upgrade=upgrade, force=force)
 
 
 @app.command("list")
-def list_env_vars():
+def list_env_vars(
+        only: list[str] = typer.Option(None, "--only",
+                                       help="Only list these variables (comma-separated names or globs "
+                                            "such as AWS_*)")):
     """
     Lists environment variables stored in the `.env` file after decrypting it using the
     `.envhub` configuration file. The decryption process depends on the `role` specified
     within the `.envhub` file, which determines how the decryption keys are handled.
 
+    With `--only`, the other variables are not decrypted.
+
     If the `.envhub` configuration file does not exist or is invalid, an appropriate
     error message will be displayed. The method exits with an error code in case of any
     failures.
 
-    :param: None
+    :param only: Names and globs of the variables to list.
+    :type only: list[str]
 
     :raises json.JSONDecodeError: If the `.envhub` configuration file contains invalid JSON data.
     :raises Exception: For any other errors encountered during the reading, decryption, or
@@ -302,6 +403,7 @@ def list_env_vars():
     import pathlib
     import json
     from envhub.utils.crypto import CryptoUtils
+    from envhub.utils.decryptionCache import load_cached_env
 
     env_file = pathlib.Path.cwd() / ".env"
     envhub_config_file = pathlib.Path.cwd() / ".envhub"
@@ -317,17 +419,24 @@ def list_env_vars():
             role = config_data.get("role")
             crypto_utils = CryptoUtils()
 
-            if role == "owner":
-                decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password)
-            elif role in ("user", "admin"):
-                decrypted_env = crypto_utils.decrypt_env_file(
-                    str(env_file),
-                    crypto_utils.decrypt(config_data.get("encrypted_data"), password)
-                )
-            else:
+            if role not in ("owner", "user", "admin"):
                 typer.secho(f"Unknown role: {role}", fg="red")
                 exit(1)
 
+            only = _parse_only(only)
+
+            def _decrypt_env_file() -> dict:
+                if role == "owner":
+                    return crypto_utils.decrypt_env_file(str(env_file), password, only=only)
+                return crypto_utils.decrypt_env_file(
+                    str(env_file),
+                    crypto_utils.decrypt(config_data.get("encrypted_data"), password),
+                    only=only
+                )
+
+            decrypted_env = load_cached_env(env_file, config_data.get("project_id"), password, _decrypt_env_file,
+                                            only=only)
+
             for key, value in decrypted_env.items():
                 typer.echo(f"{key}={value}")
 
@@ -340,7 +449,10 @@ def list_env_vars():
 
 
 @app.command("decrypt-prod")
-def decrypt_prod(command: list[str] = typer.Argument(None, help="Optional command to run with decrypted environment")):
+def decrypt_prod(
+        command: list[str] = typer.Argument(None, help="Optional command to run with decrypted environment"),
+        bundle: str = typer.Option(None, "--bundle", envvar="ENVHUB_BUNDLE",
+                                   help="Read the variables from a bundle created with `envhub bundle`")):
     """
     Decrypts the production environment by using the provided command or default behavior.
 
@@ -350,14 +462,144 @@ def decrypt_prod(command: list[str] = typer.Argument(None, help="Optional comman
 
     :param command: List of command arguments to execute after decrypting the environment.
     :type command: list[str]
+    :param bundle: Path of a bundle file to read the encrypted variables from instead of
+        fetching them with `ENVHUB_API_KEY`.
+    :type bundle: str
     :return: None
     """
+    from envhub.decrypt_prod_by_api_key import decrypt_prod_by_api_key
 
     if command:
         command_str = " ".join(command)
-        decrypt_prod_by_api_key(command=command_str)
+        decrypt_prod_by_api_key(command=command_str, bundle=bundle)
     else:
-        decrypt_prod_by_api_key()
+        decrypt_prod_by_api_key(bundle=bundle)
+
+
+@app.command("bundle")
+def bundle(output: str = typer.Option("envhub.bundle", "--output", "-o", help="Path of the bundle file")):
+    """
+    Writes the encrypted production environment of `ENVHUB_API_KEY` to a bundle file.
+
+    Run it while building an image, then start the application with
+    `envhub decrypt-prod --bundle <file>` or `ENVHUB_BUNDLE=<file> envhub-exec`. The build
+    only needs the API key; `ENVHUB_PASSWORD` is needed at runtime, and the server is not
+    contacted then. If the password is set during the build, the bundle is checked against it.
+
+    :param output: Path of the bundle file to write.
+    :type output: str
+    :return: None
+    """
+    from envhub.bundle import create_bundle
+
+    create_bundle(output)
+
+
+@agent_app.command("start")
+def agent_start(
+        ttl: int = typer.Option(3600, "--ttl", min=1, help="Seconds after which a snapshot is dropped"),
+        idle: int = typer.Option(900, "--idle", min=1, help="Seconds after which an unused snapshot is dropped"),
+        foreground: bool = typer.Option(False, "--foreground", help="Run the agent in the foreground")):
+    """
+    Starts the EnvHub agent.
+
+    The agent keeps decrypted environments in memory and serves them to `decrypt`, `list`
+    and `decrypt-prod` over a Unix socket that only the current user can access, so these
+    commands skip key derivation and network calls while a snapshot is fresh.
+
+    :param ttl: Seconds after which a snapshot is dropped, however often it is used.
+    :type ttl: int
+    :param idle: Seconds after which an unused snapshot is dropped.
+    :type idle: int
+    :param foreground: Runs the agent in the current process instead of in the background.
+    :type foreground: bool
+    :return: None
+    """
+    from envhub import agent
+
+    if agent.status():
+        typer.secho("EnvHub agent is already running", fg=typer.colors.YELLOW)
+        return
+
+    if foreground:
+        try:
+            agent.serve(ttl, idle)
+        except agent.AgentRunningError:
+            typer.secho("EnvHub agent is already running", fg=typer.colors.YELLOW)
+        return
+
+    pid = agent.start(ttl, idle)
+    if pid is None:
+        typer.secho("Failed to start the EnvHub agent", fg=typer.colors.RED)
+        exit(1)
+    typer.secho(f"EnvHub agent started (pid {pid})", fg=typer.colors.GREEN)
+
+
+@agent_app.command("stop")
+def agent_stop():
+    """
+    Stops the EnvHub agent and drops every snapshot it holds.
+
+    :return: None
+    """
+    from envhub import agent
+
+    if agent.stop():
+        typer.secho("EnvHub agent stopped", fg=typer.colors.GREEN)
+    else:
+        typer.secho("EnvHub agent is not running", fg=typer.colors.YELLOW)
+
+
+@agent_app.command("status")
+def agent_status():
+    """
+    Shows whether the EnvHub agent is running and how many snapshots it holds.
+
+    :return: None
+    """
+    from envhub import agent
+
+    info = agent.status()
+    if not info:
+        typer.secho("EnvHub agent is not running", fg=typer.colors.YELLOW)
+        return
+
+    typer.secho(
+        f"EnvHub agent running (pid {info['pid']}): {info['snapshots']} snapshot(s), "
+        f"ttl {info['ttl']}s, idle {info['idle']}s",
+        fg=typer.colors.CYAN
+    )
+
+
+@versions_app.command("prune")
+def versions_prune(
+        keep: int = typer.Option(None, "--keep", help="Number of most recent versions to keep"),
+        older_than: str = typer.Option(None, "--older-than",
+                                       help="Only prune versions older than this, such as 90d, 12h or 2w"),
+        dry_run: bool = typer.Option(False, "--dry-run", help="Only report what would be pruned"),
+        batch_size: int = typer.Option(100, "--batch-size", help="Versions deleted per request"),
+        yes: bool = typer.Option(False, "--yes", "-y", help="Prune without asking for confirmation")):
+    """
+    Deletes old versions of the project and their variables on the server, keeping the
+    latest version. With both `--keep` and `--older-than`, only versions matching both
+    conditions are pruned.
+
+    :param keep: The number of most recent versions to keep.
+    :type keep: int
+    :param older_than: Only prune versions older than this duration.
+    :type older_than: str
+    :param dry_run: Only reports the number of versions, variable rows and bytes that would
+        be reclaimed.
+    :type dry_run: bool
+    :param batch_size: The maximum number of versions deleted per request.
+    :type batch_size: int
+    :param yes: Prunes without asking for confirmation.
+    :type yes: bool
+    :return: None
+    """
+    from envhub.prune import prune_versions
+
+    prune_versions(keep=keep, older_than=older_than, dry_run=dry_run, batch_size=batch_size, assume_yes=yes)
 
 
 if __name__ == "__main__":
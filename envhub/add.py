@@ -5,11 +5,50 @@
 import typer
 
 from envhub import auth
-from envhub.services.createEnvVersion import create_env_version
+from envhub.services.createEnvVersion import create_env_version_from_changes
 from envhub.services.getEncryptedProjectPassword import get_encrypted_project_password
 from envhub.utils.crypto import CryptoUtils
 
 
+def get_project_password(client, password: str, current_user_role: str, project_id: str) -> str:
+    """
+    Resolves the password the project's environment variables are encrypted with. Owners
+    already hold it; for admins it is fetched from the project membership and decrypted
+    with their access password. Users are not allowed to modify environment variables.
+
+    :param client: The authenticated Supabase client.
+    :param password: The password from the `.envhub` file.
+    :type password: str
+    :param current_user_role: The role of the current user ('user', 'admin', or 'owner').
+    :type current_user_role: str
+    :param project_id: Unique identifier of the project.
+    :type project_id: str
+    :return: The project password.
+    :rtype: str
+    :raises SystemExit: If the user lacks permission or the password cannot be resolved.
+    """
+    if current_user_role == 'owner':
+        return password
+
+    if current_user_role != 'admin':
+        typer.secho("You don't have permission to add environment variables.", fg=typer.colors.RED)
+        exit(1)
+
+    encrypted_password = get_encrypted_project_password(client, project_id, auth.get_current_user_id())
+
+    if not encrypted_password:
+        typer.secho("Error: Project password not found.", fg=typer.colors.RED)
+        exit(1)
+
+    decrypted_password = CryptoUtils.decrypt(encrypted_password, password)
+
+    if not decrypted_password:
+        typer.secho("Error: Failed to decrypt project password.", fg=typer.colors.RED)
+        exit(1)
+
+    return decrypted_password
+
+
 async def add(entries: list, password: str, current_user_role: str, project_id: str):
     """
     Adds environment variables to a specified project. The function ensures that only users with proper
@@ -28,31 +67,35 @@ async def add(entries: list, password: str, current_user_role: str, project_id:
     :return: None
     :rtype: None
     """
+    await apply_changes({entries[0]: entries[1]}, [], password, current_user_role, project_id)
+
+
+async def apply_changes(changes: dict, removed: list, password: str, current_user_role: str, project_id: str):
+    """
+    Publishes a set of added, updated and removed environment variables as a single new version
+    of the project. Role checks and password handling are the same as for `add`.
+
+    :param changes: The variables to add or update, mapping each name to its new value.
+    :type changes: dict
+    :param removed: The names of the variables to remove.
+    :type removed: list
+    :param password: The password associated with the project, either in plain or encrypted form depending on the role.
+    :type password: str
+    :param current_user_role: The role of the current user performing the action ('user', 'admin', or 'owner').
+    :type current_user_role: str
+    :param project_id: Unique identifier of the project where environment variables will be changed.
+    :type project_id: str
+    :return: None
+    :rtype: None
+    """
     try:
         if current_user_role == 'user':
             typer.secho("You don't have permission to add environment variables.", fg=typer.colors.RED)
             exit(1)
 
-        if current_user_role == 'admin':
-            client = auth.get_authenticated_client()
-            encrypted_password = get_encrypted_project_password(client, project_id, client.auth.get_user().user.id)
-
-            if not encrypted_password:
-                typer.secho("Error: Project password not found.", fg=typer.colors.RED)
-                exit(1)
-
-            decrypted_password = CryptoUtils.decrypt(encrypted_password, password)
-
-            if not decrypted_password:
-                typer.secho("Error: Failed to decrypt project password.", fg=typer.colors.RED)
-                exit(1)
-
-            await create_env_version(project_id, entries, decrypted_password, client)
-
-            return
-
-        if current_user_role == 'owner':
-            await create_env_version(project_id, entries, password, auth.get_authenticated_client())
+        client = auth.get_authenticated_client()
+        project_password = get_project_password(client, password, current_user_role, project_id)
+        await create_env_version_from_changes(project_id, changes, removed, project_password, client)
 
     except Exception as e:
         typer.secho(f"Error adding environment variables: {str(e)}", fg=typer.colors.RED)
@@ -0,0 +1,310 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+import hmac
+import json
+import os
+import pathlib
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Optional
+
+from envhub.utils.fileLock import file_lock
+
+SOCKET_PATH = pathlib.Path(os.getenv("ENVHUB_AGENT_SOCK", str(pathlib.Path.home() / ".EnvHub" / "agent.sock")))
+DEFAULT_TTL = 3600
+DEFAULT_IDLE = 900
+_CLIENT_TIMEOUT = 0.5
+
+
+class AgentRunningError(RuntimeError):
+    """
+    Raised by `serve` when another agent already answers on `SOCKET_PATH`.
+    """
+
+
+def _request(message: dict) -> Optional[dict]:
+    """
+    Sends a single request to the agent and returns its reply.
+
+    :param message: The JSON-serializable request.
+    :type message: dict
+    :return: The decoded reply, or None if the agent is not running or did not answer.
+    :rtype: Optional[dict]
+    """
+    if not hasattr(socket, "AF_UNIX") or not SOCKET_PATH.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(_CLIENT_TIMEOUT)
+            sock.connect(str(SOCKET_PATH))
+            sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                reply = reader.readline()
+        return json.loads(reply) if reply else None
+    except (OSError, ValueError):
+        return None
+
+
+def available() -> bool:
+    """
+    Tells whether an agent may be running, without contacting it. Callers use it to skip
+    work that only pays off with an agent, such as asking the server for a version id.
+
+    :return: True if agent lookups are enabled and the socket exists.
+    :rtype: bool
+    """
+    return not os.getenv("ENVHUB_NO_AGENT") and hasattr(socket, "AF_UNIX") and SOCKET_PATH.exists()
+
+
+def rows_version(rows: list) -> str:
+    """
+    Returns a snapshot version derived from the content of encrypted rows, for sources whose
+    version id is not known. A snapshot stored under it is only served for the same rows.
+
+    :param rows: The encrypted rows.
+    :type rows: list
+    :return: The version of the rows.
+    :rtype: str
+    """
+    return "rows:" + hashlib.sha256(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def request_snapshot(kind: str, ident: str, version: str, password: str) -> Optional[dict]:
+    """
+    Asks the running agent for a decrypted snapshot.
+
+    Snapshots are indexed by the kind of source, its identifier, its version and the
+    password that unlocks it, so a caller only gets a snapshot back when it already
+    knows the password.
+
+    :param kind: The kind of source, `env` for a `.env` file or `api` for an API key.
+    :type kind: str
+    :param ident: Identifier of the source, such as the project id.
+    :type ident: str
+    :param version: Version of the source, such as the hash of the `.env` file.
+    :type version: str
+    :param password: The password that unlocks the source.
+    :type password: str
+    :return: The decrypted variables, or None if the agent is not running or holds no snapshot.
+    :rtype: Optional[dict]
+    """
+    if os.getenv("ENVHUB_NO_AGENT"):
+        return None
+
+    reply = _request({"op": "get", "kind": kind, "ident": ident, "version": version, "password": password})
+    if not reply or not reply.get("ok"):
+        return None
+    return reply.get("variables")
+
+
+def store_snapshot(kind: str, ident: str, version: str, password: str, variables: dict) -> None:
+    """
+    Hands a decrypted snapshot to the running agent, if any. See `request_snapshot`.
+
+    :param kind: The kind of source, `env` for a `.env` file or `api` for an API key.
+    :type kind: str
+    :param ident: Identifier of the source, such as the project id.
+    :type ident: str
+    :param version: Version of the source, such as the hash of the `.env` file.
+    :type version: str
+    :param password: The password that unlocks the source.
+    :type password: str
+    :param variables: The decrypted variables.
+    :type variables: dict
+    :return: None
+    """
+    if os.getenv("ENVHUB_NO_AGENT"):
+        return
+
+    _request({"op": "put", "kind": kind, "ident": ident, "version": version, "password": password,
+              "variables": variables})
+
+
+def status() -> Optional[dict]:
+    """
+    Returns the status of the running agent.
+
+    :return: A dictionary with the `pid`, `snapshots`, `ttl` and `idle` keys, or None if the
+        agent is not running.
+    :rtype: Optional[dict]
+    """
+    reply = _request({"op": "status"})
+    return reply if reply and reply.get("ok") else None
+
+
+def stop() -> bool:
+    """
+    Asks the running agent to drop its snapshots and exit.
+
+    :return: True if an agent was running, False otherwise.
+    :rtype: bool
+    """
+    return _request({"op": "stop"}) is not None
+
+
+class _SnapshotStore:
+    """
+    The in-memory snapshots held by the agent, with an absolute TTL and an idle expiry.
+    """
+
+    def __init__(self, ttl: int, idle: int):
+        self.ttl = ttl
+        self.idle = idle
+        self._secret = os.urandom(32)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _index(self, message: dict) -> str:
+        parts = [str(message.get(part) or "") for part in ("kind", "ident", "version", "password")]
+        return hmac.new(self._secret, "\0".join(parts).encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def sweep(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for index, entry in list(self._entries.items()):
+                if now - entry["created"] > self.ttl or now - entry["used"] > self.idle:
+                    del self._entries[index]
+
+    def get(self, message: dict) -> Optional[dict]:
+        self.sweep()
+        with self._lock:
+            entry = self._entries.get(self._index(message))
+            if entry is None:
+                return None
+            entry["used"] = time.monotonic()
+            return entry["variables"]
+
+    def put(self, message: dict) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[self._index(message)] = {
+                "variables": message.get("variables") or {},
+                "created": now,
+                "used": now
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def serve(ttl: int = DEFAULT_TTL, idle: int = DEFAULT_IDLE) -> None:
+    """
+    Runs the agent in the foreground until it is stopped.
+
+    The agent listens on `SOCKET_PATH`, which is only accessible to the current user, and
+    answers newline-delimited JSON requests from `request_snapshot`, `store_snapshot`,
+    `status` and `stop`.
+
+    :param ttl: Seconds after which a snapshot is dropped, however often it is used.
+    :type ttl: int
+    :param idle: Seconds after which an unused snapshot is dropped.
+    :type idle: int
+    :return: None
+    :raises AgentRunningError: If another agent answers on `SOCKET_PATH`.
+    """
+    store = _SnapshotStore(ttl, idle)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                message = json.loads(self.rfile.readline())
+            except ValueError:
+                return
+
+            op = message.get("op")
+            if op == "get":
+                variables = store.get(message)
+                reply = {"ok": variables is not None, "variables": variables}
+            elif op == "put":
+                store.put(message)
+                reply = {"ok": True}
+            elif op == "status":
+                store.sweep()
+                reply = {"ok": True, "pid": os.getpid(), "snapshots": len(store), "ttl": ttl, "idle": idle}
+            elif op == "stop":
+                store.clear()
+                reply = {"ok": True}
+            else:
+                reply = {"ok": False, "message": f"Unknown operation: {op}"}
+
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+            if op == "stop":
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+    SOCKET_PATH.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with file_lock(SOCKET_PATH.with_suffix(".lock")):
+        # A socket nothing answers on is left over by an agent that died; a live agent keeps
+        # its socket and its snapshots.
+        if SOCKET_PATH.exists():
+            if status() is not None:
+                raise AgentRunningError(f"An agent is already running on {SOCKET_PATH}")
+            SOCKET_PATH.unlink()
+
+        old_umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(str(SOCKET_PATH), Handler)
+        finally:
+            os.umask(old_umask)
+    server.daemon_threads = True
+
+    def _sweep_periodically():
+        while True:
+            # At least a second apart, so a zero or negative TTL cannot turn this into a busy loop.
+            time.sleep(max(1, min(ttl, idle, 60)))
+            store.sweep()
+
+    threading.Thread(target=_sweep_periodically, daemon=True).start()
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if SOCKET_PATH.exists():
+            SOCKET_PATH.unlink()
+
+
+def start(ttl: int = DEFAULT_TTL, idle: int = DEFAULT_IDLE) -> Optional[int]:
+    """
+    Starts the agent as a detached background process.
+
+    :param ttl: Seconds after which a snapshot is dropped, however often it is used.
+    :type ttl: int
+    :param idle: Seconds after which an unused snapshot is dropped.
+    :type idle: int
+    :return: The process id of the agent, which is the one already running if any, or None
+        if it did not come up.
+    :rtype: Optional[int]
+    """
+    info = status()
+    if info:
+        return info.get("pid")
+
+    process = subprocess.Popen(
+        [sys.executable, "-c", f"from envhub.agent import serve; serve({int(ttl)}, {int(idle)})"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+    for _ in range(50):
+        info = status()
+        if info:
+            return info.get("pid")
+        time.sleep(0.1)
+    return None
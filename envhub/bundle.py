@@ -0,0 +1,80 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+
+import typer
+
+_MAX_ATTEMPTS = 3
+
+
+def _fetch_consistent_rows(client, api_key: str) -> tuple:
+    """
+    Fetches the encrypted rows of an API key together with the id of the version they
+    belong to. The version is asked before and after the rows, and the rows are fetched
+    again when a version was published in between.
+
+    :param client: The Supabase client.
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: The version id, None when the server cannot tell it, and the rows.
+    :rtype: tuple
+    :raises RuntimeError: If the rows cannot be fetched, or if versions keep being published.
+    """
+    from envhub.services.get_env_vars_by_api_key_rpc import fetch_env_vars_by_api_key, fetch_env_version_by_api_key
+
+    version_id = fetch_env_version_by_api_key(client, api_key)
+    for _ in range(_MAX_ATTEMPTS):
+        rows = fetch_env_vars_by_api_key(client, api_key)
+        latest_version_id = fetch_env_version_by_api_key(client, api_key)
+        if latest_version_id == version_id:
+            return version_id, rows
+        version_id = latest_version_id
+
+    raise RuntimeError("the project was modified while it was being bundled, please retry")
+
+
+def create_bundle(output: str):
+    """
+    Fetches the encrypted production variables of `ENVHUB_API_KEY` and writes them to a
+    bundle file, meant to be created while building an image and opened at start-up with
+    `envhub decrypt-prod --bundle` or `envhub-exec`, which then need neither the API key
+    nor the network.
+
+    Only the API key is needed to build the bundle. When `ENVHUB_PASSWORD` is set as well,
+    the bundle is checked against it before it is written, so a wrong password fails the
+    build rather than the deployment.
+
+    :param output: Path of the bundle file to write.
+    :type output: str
+    :return: None
+    """
+    from envhub.auth import SUPABASE_KEY, SUPABASE_URL
+    from envhub.utils.crypto import CryptoUtils
+    from envhub.utils.envBundle import build_bundle, write_bundle
+    from envhub.utils.httpPool import create_pooled_client
+
+    envhub_api_key = os.getenv("ENVHUB_API_KEY")
+    if not envhub_api_key:
+        typer.secho("ENVHUB_API_KEY is not set", fg="red")
+        exit(1)
+
+    client = create_pooled_client(SUPABASE_URL, SUPABASE_KEY)
+    try:
+        version_id, rows = _fetch_consistent_rows(client, envhub_api_key)
+    except RuntimeError as e:
+        typer.secho(f"Error fetching environment: {str(e)}", fg="red")
+        exit(1)
+
+    envhub_password = os.getenv("ENVHUB_PASSWORD")
+    if envhub_password:
+        try:
+            CryptoUtils.decrypt_many([(row.get("env_name"), CryptoUtils.from_row(row)) for row in rows],
+                                     envhub_password)
+        except Exception as e:
+            typer.secho(f"Error decrypting environment: {str(e)}", fg="red")
+            exit(1)
+
+    write_bundle(output, build_bundle(rows, version_id))
+    typer.secho(f"Bundled {len(rows)} environment variable(s) into {output}", fg="green")
@@ -2,21 +2,26 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import asyncio
 import json
 import pathlib
 
 import typer
 from typer import style
 
-from envhub.auth import get_authenticated_client
-from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.auth import get_authenticated_async_client, get_current_user_id
+from envhub.pull import record_pulled_version, write_env_file_async
+from envhub.services.getClonePayloadRpc import get_clone_payload_rpc
+from envhub.services.getCurrentEnvVariables import _page_size, aiter_env_variable_pages, \
+    get_env_variable_page_async, get_latest_version_async
 from envhub.services.getCurrentUserRole import get_current_user_role
-from envhub.services.getEncryptedProjectPassword import get_encrypted_project_password
-from envhub.services.getProjectPassword import get_project_password
+from envhub.services.getEncryptedProjectPassword import _parse_encrypted_project_password, \
+    get_encrypted_project_password_async
+from envhub.services.getProjectPassword import get_project_password_async
 from envhub.utils.passwordUtils import PasswordUtils
 
 
-async def clone(project_name: str):
+async def clone(project_name: str, upgrade: bool = False):
     """
     Clones the specified project to the current directory, initializing the configuration
     and environment files required for the project. This function handles validation of the
@@ -24,8 +29,14 @@ async def clone(project_name: str):
     file management for the `.envhub` and `.env` files. It also ensures `.gitignore` is
     updated appropriately to prevent sensitive files from being committed to version control.
 
+    The project, role, password material and first page of variables are fetched in a
+    single round trip, see `_fetch_clone_data`.
+
     :param project_name: The name of the project to be cloned.
     :type project_name: str
+    :param upgrade: When set, the cloned values are re-encrypted locally into a single
+        v2 envelope, so later decryptions of the `.env` file cost one key derivation.
+    :type upgrade: bool
     :return: None if the project is successfully cloned; otherwise, displays an error message.
     :rtype: None
     :raises SystemExit: On encountering critical errors or invalid input requiring termination.
@@ -33,7 +44,7 @@ async def clone(project_name: str):
     if not project_name:
         return typer.secho("Project name is required", fg=typer.colors.RED)
 
-    client = get_authenticated_client()
+    client = await get_authenticated_async_client()
 
     envhub_config_file = pathlib.Path.cwd() / ".envhub"
     if envhub_config_file.exists():
@@ -49,27 +60,25 @@ async def clone(project_name: str):
 
     typer.secho(f"Cloning " + style(project_name, fg=typer.colors.BRIGHT_CYAN, bold=True) + f"...")
 
-    project_id = client.table("projects") \
-        .select("id, user_id") \
-        .eq("name", project_name) \
-        .execute()
-
-    if not project_id.data:
+    clone_data = await _fetch_clone_data(client, project_name)
+    if clone_data is None:
         return typer.secho(f"Project {project_name} not found", fg=typer.colors.RED)
 
-    envs = get_current_env_variables(client, project_id.data[0]["id"])
-
-    role = await get_current_user_role(client, project_id.data[0]["id"])
+    project = clone_data["project"]
+    role = clone_data["role"]
+    latest_version = clone_data["version"]
+    first_page = clone_data["first_page"]
 
     password_data = dict()
     password_utils = PasswordUtils()
     if role == "owner":
-        password_hash = get_project_password(client, project_id.data[0]["id"], project_id.data[0]["user_id"])
+        password_hash = clone_data["password_hash"]
         if not password_hash:
             typer.secho("Failed to fetch project password", fg=typer.colors.RED)
             exit(1)
 
-        password = typer.prompt(
+        password = await asyncio.to_thread(
+            typer.prompt,
             "Enter the project password.\nThis is the password that you set when creating the project.\n",
             hide_input=True)
         if not password:
@@ -86,14 +95,13 @@ async def clone(project_name: str):
         })
 
     elif role == "admin" or role == "user":
-        user = client.auth.get_user()
-        encrypted_password_data = get_encrypted_project_password(client, project_id.data[0]["id"],
-                                                                 user.user.id)
+        encrypted_password_data = clone_data["encrypted_password_data"]
         if not encrypted_password_data:
             typer.secho("Failed to fetch project password", fg=typer.colors.RED)
             exit(1)
 
-        password = typer.prompt(
+        password = await asyncio.to_thread(
+            typer.prompt,
             "Enter the password for this project.\nThis is the password that the owner of ths project set for you.\nIf you don't know the password, contact the owner",
             hide_input=True)
         if not password:
@@ -115,21 +123,29 @@ async def clone(project_name: str):
             "password": password
         })
 
+    config_data = {
+        "name": project_name,
+        "project_id": project["id"],
+        "role": role,
+        **password_data
+    }
+
     envhub_config_file.parent.mkdir(parents=True, exist_ok=True)
     # TODO: Encrypting the data of the .envhub file
     with open(envhub_config_file, "w") as f:
-        json.dump({
-            "name": project_name,
-            "project_id": project_id.data[0]["id"],
-            "role": role,
-            **password_data
-        }, f, indent=2)
-
-    dot_env_file = pathlib.Path.cwd() / ".env"
-    dot_env_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(dot_env_file, "w") as f:
-        for env in envs:
-            f.write(f"{env['env_name']}={env['env_value_encrypted']}:{env['salt']}:{env['nonce']}:{env['tag']}\n")
+        json.dump(config_data, f, indent=2)
+
+    written = 0
+    if latest_version:
+        pages = aiter_env_variable_pages(client, project["id"], latest_version["id"], first_page=first_page)
+        written = await write_env_file_async(pages, config_data, upgrade)
+    else:
+        typer.secho("No environment version found for the project.", fg=typer.colors.YELLOW)
+
+    if written:
+        record_pulled_version(envhub_config_file, config_data, latest_version, upgrade)
+    else:
+        (pathlib.Path.cwd() / ".env").touch()
 
     gitignore_file = pathlib.Path.cwd() / ".gitignore"
     gitignore_file.parent.mkdir(parents=True, exist_ok=True)
@@ -155,3 +171,84 @@ async def clone(project_name: str):
         f"successfully cloned " + style(project_name, fg=typer.colors.BRIGHT_CYAN, bold=True) + f" to .env")
 
     return None
+
+
+def _rpc_first_page(rows: list, page_size: int) -> tuple:
+    # Unlike table reads, the result of an RPC function is not limited by the max-rows setting
+    # of the server, so a page shorter than requested holds every variable of the version.
+    return rows, len(rows) if len(rows) < page_size else None
+
+
+async def _fetch_clone_data(client, project_name: str) -> dict | None:
+    """
+    Fetches everything needed to clone a project. The `get_clone_payload` RPC function
+    returns all of it in a single round trip; when it is not deployed, the separate queries
+    are made instead, running concurrently once the project id is known; the first page of
+    variables is then downloaded while the password is typed.
+
+    :param client: The authenticated asynchronous Supabase client.
+    :param project_name: The name of the project to clone.
+    :type project_name: str
+    :return: A dictionary with the `project`, `role`, `password_hash`, `encrypted_password_data`,
+        `version` and `first_page` keys, or None if the project was not found. `first_page` is
+        the first page of variables and the total number of variables when known, or an
+        awaitable of them, see `aiter_env_variable_pages`.
+    :rtype: dict | None
+    """
+    page_size = _page_size(None)
+    payload = await get_clone_payload_rpc(client, project_name, page_size)
+    if payload is not None:
+        if not payload.get("project"):
+            return None
+
+        try:
+            encrypted_password_data = _parse_encrypted_project_password([payload.get("member") or {}])
+        except ValueError as e:
+            typer.secho(f"Error fetching project password: {str(e)}", fg=typer.colors.RED)
+            exit(1)
+
+        return {
+            "project": payload["project"],
+            "role": payload.get("role"),
+            "password_hash": payload.get("password"),
+            "encrypted_password_data": encrypted_password_data,
+            "version": payload.get("version"),
+            "first_page": _rpc_first_page(payload.get("variables") or [], page_size)
+        }
+
+    project_id = await client.table("projects") \
+        .select("id, user_id") \
+        .eq("name", project_name) \
+        .execute()
+
+    if not project_id.data:
+        return None
+
+    project = project_id.data[0]
+    user_id = get_current_user_id()
+    is_owner = project["user_id"] == user_id
+
+    if is_owner:
+        password_query = get_project_password_async(client, project["id"], project["user_id"])
+    else:
+        password_query = get_encrypted_project_password_async(client, project["id"], user_id)
+
+    latest_version, role, password_row = await asyncio.gather(
+        get_latest_version_async(client, project["id"]),
+        get_current_user_role(client, project["id"], user_id),
+        password_query
+    )
+
+    first_page = None
+    if latest_version:
+        first_page = asyncio.create_task(
+            get_env_variable_page_async(client, project["id"], latest_version["id"], 0, page_size))
+
+    return {
+        "project": project,
+        "role": role,
+        "password_hash": password_row if is_owner else None,
+        "encrypted_password_data": None if is_owner else password_row,
+        "version": latest_version,
+        "first_page": first_page
+    }
@@ -7,9 +7,10 @@ import subprocess
 import typer
 
 from envhub.utils.crypto import CryptoUtils
+from envhub.utils.decryptionCache import load_cached_env
 
 
-def decrypt_runtime_and_run_command(command: str) -> None:
+def decrypt_runtime_and_run_command(command: str, only: list = None) -> None:
     """
     Decrypts runtime configurations and executes a specified shell command.
 
@@ -22,6 +23,9 @@ def decrypt_runtime_and_run_command(command: str) -> None:
 
     :param command: The shell command to execute after decrypting the environment.
     :type command: str
+    :param only: Names and globs of the variables to decrypt and pass to the command;
+        the other variables are not decrypted.
+    :type only: list
     :return: None
     """
     env_file = pathlib.Path.cwd() / ".env"
@@ -80,17 +84,22 @@ def decrypt_runtime_and_run_command(command: str) -> None:
             exit(1)
 
         try:
-            if role == "owner":
-                decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password)
-            elif role in ("user", "admin"):
-                decrypted_env = crypto_utils.decrypt_env_file(
-                    str(env_file),
-                    crypto_utils.decrypt(json_config.get("encrypted_data"), password)
-                )
-            else:
+            if role not in ("owner", "user", "admin"):
                 typer.secho(f"Unknown role: {role}", fg="red")
                 exit(1)
 
+            def _decrypt_env_file() -> dict:
+                if role == "owner":
+                    return crypto_utils.decrypt_env_file(str(env_file), password, only=only)
+                return crypto_utils.decrypt_env_file(
+                    str(env_file),
+                    crypto_utils.decrypt(json_config.get("encrypted_data"), password),
+                    only=only
+                )
+
+            decrypted_env = load_cached_env(env_file, json_config.get("project_id"), password, _decrypt_env_file,
+                                            only=only)
+
             os.environ.update(decrypted_env)
             execute_command()
 
@@ -102,7 +111,7 @@ def decrypt_runtime_and_run_command(command: str) -> None:
     elif password := os.getenv("ENVHUB_PASSWORD"):
         try:
             crypto_utils = CryptoUtils()
-            decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password)
+            decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password, only=only)
             os.environ.update(decrypted_env)
             execute_command()
         except Exception as e:
@@ -4,6 +4,7 @@ import pathlib
 import typer
 
 from envhub.utils.crypto import CryptoUtils
+from envhub.utils.decryptionCache import load_cached_env
 
 
 def decrypt_and_store():
@@ -38,16 +39,19 @@ def decrypt_and_store():
             exit(1)
 
         try:
-            if role == "owner":
-                decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password)
-            elif role in ("user", "admin"):
-                decrypted_env = crypto_utils.decrypt_env_file(
+            if role not in ("owner", "user", "admin"):
+                typer.secho(f"Unknown role: {role}", fg="red")
+                exit(1)
+
+            def _decrypt_env_file() -> dict:
+                if role == "owner":
+                    return crypto_utils.decrypt_env_file(str(env_file), password)
+                return crypto_utils.decrypt_env_file(
                     str(env_file),
                     crypto_utils.decrypt(json_config.get("encrypted_data"), password)
                 )
-            else:
-                typer.secho(f"Unknown role: {role}", fg="red")
-                exit(1)
+
+            decrypted_env = load_cached_env(env_file, json_config.get("project_id"), password, _decrypt_env_file)
 
             with open(".env", "w") as f:
                 for key, value in decrypted_env.items():
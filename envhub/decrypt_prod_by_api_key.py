@@ -1,36 +1,36 @@
 import typer
 
 
-def decrypt_prod_by_api_key(command: str = None):
+def decrypt_prod_by_api_key(command: str = None, bundle: str = None):
     """
     Decrypts environment variables from the EnvHub platform using the provided
     API key and saves them to a `.env` file or injects them into a subprocess
     executing a given command. This function ensures that sensitive environment
     variables are securely retrieved and decrypted before being used or
-    persisted.
+    persisted. When `envhub agent` is running and holds a snapshot of the
+    latest version for the API key, only the version is asked from the server
+    and no decryption takes place. With
+    `ENVHUB_SNAPSHOT_CACHE` or `ENVHUB_OFFLINE` set, the encrypted variables
+    are served from a local snapshot (see `load_api_rows`).
+
+    With a bundle written by `envhub bundle`, the variables are read from the
+    bundle instead: only `ENVHUB_PASSWORD` is needed and no network call is made.
 
     :param command: The command to be executed with the decrypted environment
         variables injected. If not provided, the variables are saved to a `.env` file.
+    :param bundle: Path of a bundle file to read the encrypted variables from.
 
     :return: None
     """
-    import supabase
+    import functools
     import os
     import shlex
     import subprocess
 
-    from envhub.services.get_env_vars_by_api_key_rpc import get_env_vars_by_api_key
-    from envhub.auth import SUPABASE_URL
-    from envhub.auth import SUPABASE_KEY
     from envhub.utils.crypto import CryptoUtils
 
-    client = supabase.create_client(
-        SUPABASE_URL,
-        SUPABASE_KEY,
-    )
-
     envhub_api_key = os.getenv("ENVHUB_API_KEY")
-    if not envhub_api_key:
+    if not envhub_api_key and not bundle:
         typer.secho("ENVHUB_API_KEY is not set", fg="red")
         exit(1)
 
@@ -38,20 +38,46 @@ def decrypt_prod_by_api_key(command: str = None):
     if not envhub_password:
         typer.secho("ENVHUB_PASSWORD is not set", fg="red")
         exit(1)
-    crypto_utils = CryptoUtils()
-    envs = get_env_vars_by_api_key(client=client, api_key=envhub_api_key)
-    decrypted_envs = {}
-
-    for env in envs:
-        encrypted_data = {
-            "ciphertext": env.get("env_value_encrypted"),
-            "nonce": env.get("nonce"),
-            "tag": env.get("tag"),
-            "salt": env.get("salt"),
-        }
-
-        decrypted_value = crypto_utils.decrypt(encrypted_data=encrypted_data, password=envhub_password)
-        decrypted_envs[env.get("env_name")] = decrypted_value
+
+    if bundle:
+        from envhub.utils.envBundle import read_bundle
+
+        try:
+            decrypted_envs = CryptoUtils.decrypt_many(read_bundle(bundle), envhub_password)
+        except Exception as e:
+            typer.secho(f"Error decrypting bundle: {str(e)}", fg="red")
+            exit(1)
+    else:
+        from envhub.utils.apiKeyEnv import load_env_by_api_key
+
+        @functools.lru_cache(maxsize=None)
+        def create_client():
+            from envhub.auth import SUPABASE_URL
+            from envhub.auth import SUPABASE_KEY
+            from envhub.utils.httpPool import create_pooled_client
+
+            return create_pooled_client(
+                SUPABASE_URL,
+                SUPABASE_KEY,
+            )
+
+        def fetch_rows():
+            from envhub.services.get_env_vars_by_api_key_rpc import fetch_env_vars_by_api_key
+            return fetch_env_vars_by_api_key(create_client(), envhub_api_key)
+
+        def fetch_version():
+            from envhub.services.get_env_vars_by_api_key_rpc import fetch_env_version_by_api_key
+            return fetch_env_version_by_api_key(create_client(), envhub_api_key)
+
+        try:
+            decrypted_envs = load_env_by_api_key(envhub_api_key, envhub_password, fetch_rows, fetch_version,
+                                                 warn=lambda message: typer.secho(message, fg="yellow", err=True))
+        except RuntimeError as e:
+            typer.secho(f"Error fetching environment: {str(e)}", fg="red")
+            exit(1)
+        except Exception as e:
+            typer.secho(f"Error decrypting environment: {str(e)}", fg="red")
+            exit(1)
 
     if command:
         try:
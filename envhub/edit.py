@@ -0,0 +1,169 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import json
+import os
+import pathlib
+import shlex
+import subprocess
+import tempfile
+
+import typer
+
+from envhub import auth
+from envhub.add import get_project_password
+from envhub.services.createEnvVersion import create_env_version_from_changes
+from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.utils.crypto import CryptoUtils
+
+
+def read_entries_from_file(path: str) -> dict:
+    """
+    Reads environment variables from a dotenv file, or from a JSON object when the file
+    name ends with `.json`.
+
+    :param path: Path of the file to read.
+    :type path: str
+    :return: A dictionary mapping each variable name to its value.
+    :rtype: dict
+    :raises ValueError: If the file content is not a flat set of variables.
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("The JSON file must contain an object of variable names and values")
+        for name, value in data.items():
+            if isinstance(value, (dict, list)):
+                raise ValueError(f"Value of '{name}' must be a string, number or boolean")
+        return {name: value if isinstance(value, str) else json.dumps(value) for name, value in data.items()}
+
+    from dotenv import dotenv_values
+
+    entries = dotenv_values(path, interpolate=False)
+    missing = [name for name, value in entries.items() if value is None]
+    if missing:
+        raise ValueError(f"Missing value for: {', '.join(missing)}")
+    return dict(entries)
+
+
+def _quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def _diff(current: dict, updated: dict, remove_missing: bool) -> tuple:
+    changes = {name: value for name, value in updated.items() if current.get(name) != value}
+    removed = [name for name in current if name not in updated] if remove_missing else []
+    return changes, removed
+
+
+def _load_project() -> tuple:
+    config_file = pathlib.Path.cwd() / ".envhub"
+    if not config_file.exists():
+        typer.secho("No config file found for this folder.", fg=typer.colors.RED)
+        exit(1)
+
+    with open(config_file, "r") as f:
+        config_data = json.load(f)
+
+    client = auth.get_authenticated_client()
+    project_password = get_project_password(client, config_data.get("password"), config_data.get("role"),
+                                            config_data.get("project_id"))
+
+    rows = get_current_env_variables(client, config_data["project_id"])
+    try:
+        current = CryptoUtils.decrypt_many(
+            [(row['env_name'], CryptoUtils.from_row(row)) for row in rows],
+            project_password
+        )
+    except Exception as e:
+        typer.secho(f"Error decrypting environment: {str(e)}", fg=typer.colors.RED)
+        exit(1)
+
+    return config_data, client, project_password, current
+
+
+def _publish(config_data: dict, client, project_password: str, current: dict, changes: dict, removed: list,
+             assume_yes: bool) -> None:
+    if not changes and not removed:
+        typer.secho("No changes to publish.", fg=typer.colors.YELLOW)
+        return
+
+    for name in changes:
+        typer.secho(f"{'~' if name in current else '+'} {name}",
+                    fg=typer.colors.YELLOW if name in current else typer.colors.GREEN)
+    for name in removed:
+        typer.secho(f"- {name}", fg=typer.colors.RED)
+
+    if not assume_yes and not typer.confirm("Publish these changes as a new version?"):
+        typer.secho("Aborted.", fg=typer.colors.YELLOW)
+        return
+
+    asyncio.run(create_env_version_from_changes(config_data["project_id"], changes, removed, project_password,
+                                                client))
+    typer.secho(f"Published {len(changes)} change(s) and {len(removed)} removal(s) in a new version",
+                fg=typer.colors.GREEN)
+
+
+def add_from_file(path: str, assume_yes: bool = False) -> None:
+    """
+    Adds or updates every environment variable found in a dotenv or JSON file, publishing
+    all of them as a single new version. Variables whose value is unchanged are skipped and
+    variables that are not in the file are kept.
+
+    :param path: Path of the dotenv or JSON file to import.
+    :type path: str
+    :param assume_yes: Publishes without asking for confirmation.
+    :type assume_yes: bool
+    :return: None
+    """
+    try:
+        entries = read_entries_from_file(path)
+    except (OSError, ValueError) as e:
+        typer.secho(f"Error reading {path}: {str(e)}", fg=typer.colors.RED)
+        exit(1)
+
+    config_data, client, project_password, current = _load_project()
+    changes, removed = _diff(current, entries, remove_missing=False)
+    _publish(config_data, client, project_password, current, changes, removed, assume_yes)
+
+
+def edit(assume_yes: bool = False) -> None:
+    """
+    Opens the decrypted environment variables of the project in `$VISUAL` or `$EDITOR` as a
+    dotenv file, then publishes every addition, update and removal as a single new version.
+
+    The decrypted file is created with owner-only permissions and removed as soon as the
+    editor exits.
+
+    :param assume_yes: Publishes without asking for confirmation.
+    :type assume_yes: bool
+    :return: None
+    """
+    config_data, client, project_password, current = _load_project()
+
+    editor = os.getenv("VISUAL") or os.getenv("EDITOR") or ("notepad" if os.name == "nt" else "vi")
+    fd, path = tempfile.mkstemp(prefix="envhub-", suffix=".env")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(f"# Editing {config_data.get('name', 'project')}. Save and close the editor to continue.\n")
+            for name, value in current.items():
+                f.write(f"{name}={_quote(value)}\n")
+
+        if subprocess.call(shlex.split(editor) + [path]) != 0:
+            typer.secho("Editor exited with an error, nothing was published.", fg=typer.colors.RED)
+            exit(1)
+
+        try:
+            entries = read_entries_from_file(path)
+        except ValueError as e:
+            typer.secho(f"Error reading the edited file: {str(e)}", fg=typer.colors.RED)
+            exit(1)
+    finally:
+        os.unlink(path)
+
+    changes, removed = _diff(current, entries, remove_missing=True)
+    _publish(config_data, client, project_password, current, changes, removed, assume_yes)
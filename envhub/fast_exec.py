@@ -0,0 +1,155 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from typing import Optional
+
+from envhub.constants import SUPABASE_KEY, SUPABASE_URL
+from envhub.utils.apiKeyEnv import load_env_by_api_key
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.envBundle import read_bundle
+from envhub.utils.rpcErrors import FUNCTION_NOT_FOUND
+from envhub.utils.snapshotCache import ApiKeyRejectedError
+
+_RPC_TIMEOUT = 30
+
+
+def _fail(message: str, code: int = 1):
+    sys.stderr.write(f"envhub-exec: {message}\n")
+    sys.exit(code)
+
+
+def _call_rpc(function: str, api_key: str):
+    request = urllib.request.Request(
+        f"{SUPABASE_URL}/rest/v1/rpc/{function}",
+        data=json.dumps({"api_key_param": api_key}).encode("utf-8"),
+        headers={
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        },
+        method="POST"
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=_RPC_TIMEOUT) as response:
+            payload = json.load(response)
+    except urllib.error.HTTPError as e:
+        body = e.read().decode("utf-8", "replace")
+        if FUNCTION_NOT_FOUND in body:
+            return None
+        raise RuntimeError(f"RPC call failed with HTTP {e.code}: {body}") from e
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise RuntimeError(f"RPC call failed: {e}") from e
+
+    return payload
+
+
+def fetch_env_vars_by_api_key(api_key: str) -> list:
+    """
+    Calls the `get_environment_variables_by_api_key` RPC function with the standard library
+    HTTP client, the same function `envhub decrypt-prod` calls through the Supabase client.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: The encrypted variables, each with the `env_name`, `env_value_encrypted`,
+        `salt`, `nonce` and `tag` keys.
+    :rtype: list
+    :raises ApiKeyRejectedError: If the API key is rejected.
+    :raises RuntimeError: If the request fails.
+    """
+    payload = _call_rpc("get_environment_variables_by_api_key", api_key)
+    if payload is None:
+        raise RuntimeError("get_environment_variables_by_api_key is not deployed on the server")
+
+    result = payload[0] if isinstance(payload, list) and payload else payload
+    if not isinstance(result, dict):
+        raise RuntimeError("Unexpected response")
+    if not result.get("success"):
+        raise ApiKeyRejectedError(result.get("message", "Unknown error"))
+    return result.get("data") or []
+
+
+def fetch_env_version_by_api_key(api_key: str) -> Optional[str]:
+    """
+    Calls the `get_environment_version_by_api_key` RPC function, which tells the latest
+    version of the project without sending its variables.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: The id of the latest version, or None if the API key is not valid, the project
+        has no version or the function is not deployed.
+    :rtype: Optional[str]
+    :raises RuntimeError: If the request fails.
+    """
+    # No row is returned for a key get_environment_variables_by_api_key would reject: the rows
+    # are then fetched as on a cache miss, and that call tells why the key was rejected.
+    payload = _call_rpc("get_environment_version_by_api_key", api_key)
+    result = payload[0] if isinstance(payload, list) and payload else None
+    return result.get("version_id") if isinstance(result, dict) else None
+
+
+def main(argv: list = None) -> None:
+    """
+    Entry point of the `envhub-exec` console script, which decrypts the production
+    environment of `ENVHUB_API_KEY` and replaces itself with the given command:
+
+        envhub-exec [--] <command> [args...]
+
+    It is meant to be the entry point of containers. Unlike `envhub decrypt-prod -- <command>`,
+    it does not load typer or the Supabase client, and no wrapper process stays resident: the
+    command takes over the process, so it receives signals directly and its exit status is the
+    exit status of the container.
+
+    When `ENVHUB_BUNDLE` points to a bundle written by `envhub bundle`, the variables are
+    read from it: `ENVHUB_API_KEY` is not needed and the server is not contacted.
+
+    :param argv: The command to run, defaults to the arguments of the process.
+    :type argv: list
+    :return: Does not return; the process is replaced by the command.
+    """
+    command = list(sys.argv[1:] if argv is None else argv)
+    if command and command[0] == "--":
+        command = command[1:]
+    if not command:
+        _fail("usage: envhub-exec [--] <command> [args...]", 2)
+
+    bundle = os.getenv("ENVHUB_BUNDLE")
+    api_key = os.getenv("ENVHUB_API_KEY")
+    if not api_key and not bundle:
+        _fail("ENVHUB_API_KEY is not set")
+
+    password = os.getenv("ENVHUB_PASSWORD")
+    if not password:
+        _fail("ENVHUB_PASSWORD is not set")
+
+    try:
+        if bundle:
+            decrypted_envs = CryptoUtils.decrypt_many(read_bundle(bundle), password)
+        else:
+            decrypted_envs = load_env_by_api_key(api_key, password, lambda: fetch_env_vars_by_api_key(api_key),
+                                                 lambda: fetch_env_version_by_api_key(api_key))
+    except RuntimeError as e:
+        _fail(f"Error fetching environment: {str(e)}")
+    except Exception as e:
+        _fail(f"Error decrypting environment: {str(e)}")
+
+    env = dict(os.environ)
+    env.update(decrypted_envs)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvpe(command[0], command, env)
+    except OSError as e:
+        _fail(f"Error executing command: {str(e)}", 127)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import pathlib
+
+import typer
+
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.decryptionCache import load_cached_env
+from envhub.utils.getDecryptionPassword import get_decryption_password
+
+
+def get_env_var(name: str) -> None:
+    """
+    Prints the decrypted value of a single variable of the `.env` file, so scripts can read
+    it with `$(envhub get NAME)`. Only that value is decrypted, whatever the size of the file.
+
+    The password is read from the `.envhub` configuration file, or from the `ENVHUB_PASSWORD`
+    environment variable when there is none, as with `envhub decrypt`.
+
+    :param name: The name of the variable.
+    :type name: str
+    :return: None
+    """
+    if any(c in name for c in "*?["):
+        typer.secho("envhub get takes a variable name; use `envhub list --only` to select variables by glob",
+                    fg="red")
+        exit(1)
+
+    env_file = pathlib.Path.cwd() / ".env"
+    envhub_config_file = pathlib.Path.cwd() / ".envhub"
+    crypto_utils = CryptoUtils()
+
+    if envhub_config_file.exists():
+        try:
+            with open(envhub_config_file, "r") as f:
+                json_config = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            typer.secho(f"Error reading .envhub config file: {str(e)}", fg="red")
+            exit(1)
+
+        def _decrypt_env_file() -> dict:
+            return crypto_utils.decrypt_env_file(str(env_file), get_decryption_password(json_config), only=[name])
+
+        try:
+            decrypted_env = load_cached_env(env_file, json_config.get("project_id"), json_config.get("password"),
+                                            _decrypt_env_file, only=[name])
+        except Exception as e:
+            typer.secho(f"Error decrypting environment: {str(e)}", fg="red")
+            exit(1)
+
+    elif password := os.getenv("ENVHUB_PASSWORD"):
+        try:
+            decrypted_env = crypto_utils.decrypt_env_file(str(env_file), password, only=[name])
+        except Exception as e:
+            typer.secho(f"Error decrypting with ENVHUB_PASSWORD: {str(e)}", fg="red")
+            exit(1)
+
+    else:
+        typer.secho(
+            "No valid configuration found. Either create a .envhub config file by running 'envhub clone <project_name>' or set ENVHUB_PASSWORD environment variable.",
+            fg="red"
+        )
+        exit(1)
+
+    typer.echo(decrypted_env[name])
@@ -0,0 +1,170 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import pathlib
+import threading
+from collections.abc import Mapping
+
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.getDecryptionPassword import get_decryption_password
+
+
+class LazyEnv(Mapping):
+    """
+    A read-only mapping of the variables of an encrypted `.env` file, which decrypts each
+    value the first time it is read and keeps it for later reads.
+
+    Keys derived for a value are shared with the other values of the same salt, so reading
+    every value of a v2 file costs a single key derivation either way. The mapping can be
+    used from several threads.
+    """
+
+    def __init__(self, raw_envs: dict, password: str):
+        """
+        :param raw_envs: The raw values of the file, as returned by `CryptoUtils.read_env_file`.
+        :type raw_envs: dict
+        :param password: The project password the values are encrypted with.
+        :type password: str
+        """
+        self._raw_envs = raw_envs
+        self._password = password
+        self._values = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> str:
+        if name in self._values:
+            return self._values[name]
+
+        value = self._raw_envs[name]
+        with self._lock:
+            if name not in self._values:
+                try:
+                    encrypted_data = CryptoUtils.parse_raw_env_value(name, value)
+                    self._values[name] = CryptoUtils.decrypt(encrypted_data, self._password, self._keys)
+                except Exception as e:
+                    raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+            return self._values[name]
+
+    def __iter__(self):
+        return iter(self._raw_envs)
+
+    def __len__(self) -> int:
+        return len(self._raw_envs)
+
+    def __contains__(self, name) -> bool:
+        return name in self._raw_envs
+
+    def __repr__(self) -> str:
+        return f"LazyEnv({list(self._raw_envs)!r})"
+
+    def is_decrypted(self, name: str) -> bool:
+        """
+        Tells whether the value of a variable was already decrypted.
+
+        :param name: The name of the variable.
+        :type name: str
+        :return: True if the value is memoized.
+        :rtype: bool
+        """
+        return name in self._values
+
+    def prefetch(self, only: list = None, workers: int = None) -> None:
+        """
+        Decrypts the values that were not read yet in one batch, deriving the keys they need
+        in parallel on a thread pool (see `CryptoUtils.decrypt_many`).
+
+        :param only: Names and globs of the variables to decrypt, see
+            `CryptoUtils.select_env_names`. Defaults to every variable.
+        :type only: list
+        :param workers: The maximum number of threads deriving keys.
+        :type workers: int
+        :return: None
+        :raises ValueError: If a value cannot be decrypted or a name in `only` is missing.
+        """
+        names = list(self._raw_envs) if only is None else CryptoUtils.select_env_names(list(self._raw_envs), only)
+
+        with self._lock:
+            pending = []
+            for name in names:
+                if name not in self._values:
+                    try:
+                        pending.append((name, CryptoUtils.parse_raw_env_value(name, self._raw_envs[name])))
+                    except ValueError as e:
+                        raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+            if pending:
+                self._values.update(CryptoUtils.decrypt_many(pending, self._password, workers))
+
+    def inject_into_environ(self, only: list = None, override: bool = False) -> list:
+        """
+        Decrypts the variables and sets them in `os.environ`.
+
+        :param only: Names and globs of the variables to set. Defaults to every variable.
+        :type only: list
+        :param override: Replaces the variables already set in the environment, which are
+            kept by default.
+        :type override: bool
+        :return: The names of the variables that were set.
+        :rtype: list
+        """
+        self.prefetch(only)
+
+        names = list(self._raw_envs) if only is None else CryptoUtils.select_env_names(list(self._raw_envs), only)
+        injected = []
+        for name in names:
+            if override or name not in os.environ:
+                os.environ[name] = self._values[name]
+                injected.append(name)
+        return injected
+
+
+def load(env_file: str = ".env", password: str = None, config_file: str = ".envhub",
+         prefetch: bool = False, inject: bool = False) -> LazyEnv:
+    """
+    Loads an encrypted `.env` file in the current process, as an alternative to running
+    `envhub decrypt -- <command>`. The file is read once; values are decrypted on access.
+
+    The password is resolved like `envhub decrypt` does: from the `.envhub` configuration
+    file, following the role stored there, or from `ENVHUB_PASSWORD` when there is none.
+
+        import envhub
+
+        env = envhub.load()
+        database_url = env["DATABASE_URL"]
+
+    :param env_file: Path of the encrypted `.env` file.
+    :type env_file: str
+    :param password: The project password, which skips the `.envhub` lookup.
+    :type password: str
+    :param config_file: Path of the `.envhub` configuration file.
+    :type config_file: str
+    :param prefetch: Decrypts every value right away, deriving the keys in parallel.
+    :type prefetch: bool
+    :param inject: Sets every variable in `os.environ`, keeping the ones already set.
+    :type inject: bool
+    :return: The mapping of the variables.
+    :rtype: LazyEnv
+    :raises ValueError: If no password can be found or the configuration is invalid.
+    :raises FileNotFoundError: If the `.env` file does not exist.
+    """
+    if password is None:
+        config_path = pathlib.Path(config_file)
+        if config_path.exists():
+            with open(config_path, "r") as f:
+                password = get_decryption_password(json.load(f))
+        else:
+            password = os.getenv("ENVHUB_PASSWORD")
+
+    if not password:
+        raise ValueError("No valid configuration found. Either create a .envhub config file by running "
+                         "'envhub clone <project_name>' or set ENVHUB_PASSWORD environment variable.")
+
+    env = LazyEnv(CryptoUtils.read_env_file(str(env_file)), password)
+    if inject:
+        env.inject_into_environ()
+    elif prefetch:
+        env.prefetch()
+    return env
@@ -0,0 +1,136 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import pathlib
+import re
+
+import typer
+from postgrest.exceptions import APIError
+
+from envhub import auth
+from envhub.services.pruneEnvVersionsRpc import DEFAULT_BATCH_SIZE, prune_env_versions_rpc
+from envhub.utils.rpcErrors import FUNCTION_NOT_FOUND
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(value: str) -> int:
+    """
+    Parses a duration such as `90d`, `12h`, `30m`, `2w` or a number of seconds.
+
+    :param value: The duration.
+    :type value: str
+    :return: The duration in seconds.
+    :rtype: int
+    :raises ValueError: If the duration is not understood.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw]?)\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}'; use a number followed by s, m, h, d or w, such as 90d")
+    return int(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def prune_versions(keep: int = None, older_than: str = None, dry_run: bool = False,
+                   batch_size: int = DEFAULT_BATCH_SIZE, assume_yes: bool = False) -> None:
+    """
+    Deletes old versions of the project and their variables on the server, including the
+    stored values no remaining version references; the latest version is always kept.
+
+    The versions that would be pruned are counted first. Unless `dry_run` is set, they are
+    then deleted in batches of `batch_size` versions, one transaction per batch.
+
+    :param keep: The number of most recent versions to keep.
+    :type keep: int
+    :param older_than: Only prune versions older than this duration, such as `90d`.
+    :type older_than: str
+    :param dry_run: Only reports the number of versions, variable rows and bytes that would
+        be reclaimed.
+    :type dry_run: bool
+    :param batch_size: The maximum number of versions deleted per request.
+    :type batch_size: int
+    :param assume_yes: Prunes without asking for confirmation.
+    :type assume_yes: bool
+    :return: None
+    """
+    if keep is None and older_than is None:
+        typer.secho("Specify --keep, --older-than or both.", fg=typer.colors.RED)
+        exit(1)
+    if keep is not None and keep < 1:
+        typer.secho("--keep must be at least 1.", fg=typer.colors.RED)
+        exit(1)
+
+    try:
+        older_than_seconds = parse_duration(older_than) if older_than is not None else None
+    except ValueError as e:
+        typer.secho(str(e), fg=typer.colors.RED)
+        exit(1)
+
+    config_file = pathlib.Path.cwd() / ".envhub"
+    if not config_file.exists():
+        typer.secho("No config file found for this folder.", fg=typer.colors.RED)
+        exit(1)
+
+    with open(config_file, "r") as f:
+        config_data = json.load(f)
+
+    if config_data.get("role") not in ("owner", "admin"):
+        typer.secho("You don't have permission to prune versions.", fg=typer.colors.RED)
+        exit(1)
+
+    client = auth.get_authenticated_client()
+    project_id = config_data.get("project_id")
+
+    try:
+        report = prune_env_versions_rpc(client, project_id, keep, older_than_seconds, True)
+    except APIError as e:
+        if e.code == FUNCTION_NOT_FOUND:
+            typer.secho("The prune_env_versions function is not deployed; apply supabase/migrations first.",
+                        fg=typer.colors.RED)
+        else:
+            typer.secho(f"Error pruning versions: {e.message}", fg=typer.colors.RED)
+        exit(1)
+
+    if not report["versions"]:
+        typer.secho("No versions to prune.", fg=typer.colors.YELLOW)
+        return
+
+    typer.secho(
+        f"{'Would prune' if dry_run else 'Pruning'} {report['versions']} version(s) holding "
+        f"{report['variables']} variable row(s), about {_format_bytes(report['bytes'])}",
+        fg=typer.colors.CYAN
+    )
+    if dry_run:
+        return
+
+    if not assume_yes and not typer.confirm("Delete these versions permanently?"):
+        typer.secho("Aborted.", fg=typer.colors.YELLOW)
+        return
+
+    totals = {"versions": 0, "variables": 0, "bytes": 0}
+    while True:
+        try:
+            result = prune_env_versions_rpc(client, project_id, keep, older_than_seconds, False, batch_size)
+        except APIError as e:
+            typer.secho(f"Error pruning versions after {totals['versions']} version(s): {e.message}",
+                        fg=typer.colors.RED)
+            exit(1)
+
+        for name in totals:
+            totals[name] += result[name]
+        if not result["versions"] or not result["remaining"]:
+            break
+
+    typer.secho(
+        f"Pruned {totals['versions']} version(s) and {totals['variables']} variable row(s), "
+        f"about {_format_bytes(totals['bytes'])}",
+        fg=typer.colors.GREEN
+    )
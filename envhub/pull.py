@@ -2,22 +2,38 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import hashlib
 import json
+import os
 import pathlib
+from typing import AsyncIterator
 
 import typer
 
 from envhub import auth
-from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.services.getCurrentEnvVariables import _get_cached_latest_version, iter_env_variable_pages
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.getDecryptionPassword import get_decryption_password
 
 
-def pull():
+def pull(upgrade: bool = False, force: bool = False):
     """
     Pulls environment variable changes from the remote repository for the specific
     project and updates the local `.env` file accordingly. The function retrieves
     the configuration file to determine the project ID, fetches the current
     environment variables from the server, and writes them to a local `.env` file.
 
+    The version that was pulled is recorded in `.envhub`. Unless `force` is set, the
+    latest version is checked first and nothing is downloaded or rewritten when it is
+    the recorded one and `.env` was not modified since.
+
+    :param upgrade: When set, the pulled values are re-encrypted locally into a single
+        v2 envelope, so later decryptions of the `.env` file cost one key derivation.
+    :type upgrade: bool
+    :param force: When set, the variables are downloaded and `.env` is rewritten even if
+        the project did not change.
+    :type force: bool
+
     :raises SystemExit: If no config file is found in the current working directory or
         if other critical operations fail.
     :raises FileNotFoundError: If the `.env` file cannot be created or written to.
@@ -35,16 +51,171 @@ def pull():
         config_data = json.load(f)
 
     client = auth.get_authenticated_client()
-    current_env_vars = get_current_env_variables(client, config_data["project_id"])
+    latest_version = _get_cached_latest_version(client, config_data["project_id"])
+
+    if not force and latest_version and is_up_to_date(config_data, latest_version, upgrade):
+        typer.secho(f"Already up to date (version {latest_version['version_number']}).", fg=typer.colors.GREEN)
+        return
+
+    written = write_env_file(client, config_data, upgrade)
 
-    if not current_env_vars:
+    if not written:
         typer.secho("No environment variables found for this project.", fg=typer.colors.RED)
         return
 
+    record_pulled_version(config_file, config_data, latest_version, upgrade)
+    typer.secho("Changes pulled successfully.", fg=typer.colors.GREEN)
+
+
+def _env_file_hash() -> str | None:
     dot_env_file = pathlib.Path.cwd() / ".env"
-    dot_env_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(dot_env_file, "w") as f:
-        for env in current_env_vars:
-            f.write(f"{env['env_name']}={env['env_value_encrypted']}:{env['salt']}:{env['nonce']}:{env['tag']}\n")
+    if not dot_env_file.exists():
+        return None
+    with open(dot_env_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-    typer.secho("Changes pulled successfully.", fg=typer.colors.GREEN)
+
+def is_up_to_date(config_data: dict, latest_version: dict, upgrade: bool = False) -> bool:
+    """
+    Checks whether the local `.env` file already holds the given version of the project.
+
+    :param config_data: The content of the `.envhub` configuration file.
+    :type config_data: dict
+    :param latest_version: The latest version, with the `id` and `version_number` keys.
+    :type latest_version: dict
+    :param upgrade: When set, the local file must also have been upgraded to the v2 format.
+    :type upgrade: bool
+    :return: True if the recorded version is the latest one and `.env` is unchanged.
+    :rtype: bool
+    """
+    pulled = config_data.get("pulled_version") or {}
+    return (pulled.get("id") == latest_version.get("id")
+            and pulled.get("env_hash") is not None
+            and pulled.get("env_hash") == _env_file_hash()
+            and (pulled.get("upgraded", False) or not upgrade))
+
+
+def record_pulled_version(config_file: pathlib.Path, config_data: dict, version: dict | None,
+                          upgrade: bool = False) -> None:
+    """
+    Records the version written to `.env` in the `.envhub` configuration file, together
+    with a hash of `.env`, so the next `pull` can skip the download when nothing changed.
+
+    :param config_file: Path of the `.envhub` configuration file.
+    :type config_file: pathlib.Path
+    :param config_data: The content of the `.envhub` configuration file, updated in place.
+    :type config_data: dict
+    :param version: The version that was written, with the `id` and `version_number` keys.
+    :type version: dict | None
+    :param upgrade: Whether the values were upgraded to the v2 format.
+    :type upgrade: bool
+    :return: None
+    """
+    if not version:
+        return
+
+    config_data["pulled_version"] = {
+        "id": version["id"],
+        "version_number": version["version_number"],
+        "env_hash": _env_file_hash(),
+        "upgraded": upgrade
+    }
+    with open(config_file, "w") as f:
+        json.dump(config_data, f, indent=2)
+
+
+class _EnvFileWriter:
+    """
+    Writes pages of environment variables to a temporary file that replaces `.env` when
+    the writer is closed without error and at least one variable was written.
+    """
+
+    def __init__(self, config_data: dict, upgrade: bool = False):
+        self.upgrade = upgrade
+        self.written = 0
+        self.dot_env_file = pathlib.Path.cwd() / ".env"
+        self.tmp_file = self.dot_env_file.with_name(f".env.{os.getpid()}.tmp")
+        if upgrade:
+            self.password = get_decryption_password(config_data)
+            self.salt = os.urandom(16)
+
+    def __enter__(self):
+        self.dot_env_file.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_file, "w")
+        return self
+
+    def write_page(self, page: list) -> None:
+        encrypted_values = [CryptoUtils.from_row(env) for env in page]
+        if self.upgrade:
+            encrypted_values = CryptoUtils.upgrade(
+                [(env['env_name'], encrypted) for env, encrypted in zip(page, encrypted_values)],
+                self.password,
+                self.salt
+            )
+
+        for env, encrypted in zip(page, encrypted_values):
+            self._file.write(f"{env['env_name']}={CryptoUtils.format_env_value(encrypted)}\n")
+        self.written += len(page)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        try:
+            if exc_type is None and self.written:
+                os.replace(self.tmp_file, self.dot_env_file)
+        finally:
+            if self.tmp_file.exists():
+                self.tmp_file.unlink()
+        return False
+
+
+def write_env_file(client, config_data: dict, upgrade: bool = False) -> int:
+    """
+    Streams the current environment variables of the project into the local `.env` file,
+    page by page, so memory use stays bounded however many variables the project holds.
+    The rows are written to a temporary file that replaces `.env` only once every page was
+    received, and `.env` is left untouched when the project has no variables.
+
+    :param client: The authenticated Supabase client.
+    :param config_data: The content of the `.envhub` configuration file.
+    :type config_data: dict
+    :param upgrade: When set, every value is re-encrypted into a single v2 envelope.
+    :type upgrade: bool
+    :return: The number of variables written.
+    :rtype: int
+    :raises SystemExit: If fetching or upgrading the variables fails.
+    """
+    try:
+        with _EnvFileWriter(config_data, upgrade) as writer:
+            for page in iter_env_variable_pages(client, config_data["project_id"]):
+                writer.write_page(page)
+    except Exception as e:
+        typer.secho(f"Error fetching environment variables: {str(e)}", fg=typer.colors.RED)
+        exit(1)
+
+    return writer.written
+
+
+async def write_env_file_async(pages: AsyncIterator[list], config_data: dict, upgrade: bool = False) -> int:
+    """
+    Asynchronous version of `write_env_file`, writing pages as they arrive from an
+    asynchronous iterator such as `aiter_env_variable_pages`.
+
+    :param pages: The pages of environment variables to write.
+    :type pages: AsyncIterator[list]
+    :param config_data: The content of the `.envhub` configuration file.
+    :type config_data: dict
+    :param upgrade: When set, every value is re-encrypted into a single v2 envelope.
+    :type upgrade: bool
+    :return: The number of variables written.
+    :rtype: int
+    :raises SystemExit: If fetching or upgrading the variables fails.
+    """
+    try:
+        with _EnvFileWriter(config_data, upgrade) as writer:
+            async for page in pages:
+                writer.write_page(page)
+    except Exception as e:
+        typer.secho(f"Error fetching environment variables: {str(e)}", fg=typer.colors.RED)
+        exit(1)
+
+    return writer.written
@@ -2,16 +2,19 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+import json
 import pathlib
 
 import typer
 
+from envhub.utils.decryptionCache import clear_cached_env
+
 
 def reset():
     """
     Resets the current folder by removing the ".envhub" configuration file if it exists.
-    If the file is removed, it prints a confirmation message to indicate the success
-    of the operation.
+    Local decryption cache entries of the project are removed as well. If the file is
+    removed, it prints a confirmation message to indicate the success of the operation.
 
     :raises FileNotFoundError: Raised implicitly if the file cannot be accessed during
         the unlinking process.
@@ -20,5 +23,10 @@ def reset():
     """
     envhub_config_file = pathlib.Path.cwd() / ".envhub"
     if envhub_config_file.exists():
+        try:
+            with open(envhub_config_file, "r") as f:
+                clear_cached_env(json.load(f).get("project_id"))
+        except (json.JSONDecodeError, IOError):
+            pass
         envhub_config_file.unlink()
     typer.secho("Folder reset successfully.")
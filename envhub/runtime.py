@@ -0,0 +1,222 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+from envhub.constants import SUPABASE_KEY, SUPABASE_URL
+from envhub.services.get_env_vars_by_api_key_rpc import (fetch_env_vars_by_api_key_async,
+                                                          fetch_env_version_by_api_key_async)
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.httpPool import close_pooled_async_client, create_pooled_async_client
+
+DEFAULT_REFRESH_INTERVAL = 60.0
+
+
+class AsyncEnvClient:
+    """
+    Fetches the production environment of an API key in-process, with the same RPC function
+    as `envhub decrypt-prod`, and keeps the decrypted values in memory.
+
+    The environment is refreshed in the background: the version of the project is checked
+    every `refresh_interval` seconds, and the variables are only downloaded and decrypted
+    again when it changed. Concurrent refreshes share a single fetch and decryption.
+
+        async with AsyncEnvClient() as env:
+            database_url = env.get("DATABASE_URL")
+
+    Reads never wait on the network once the environment is loaded. A refresh that fails
+    leaves the last values in place; the error is kept in `last_error`.
+    """
+
+    def __init__(self, api_key: str = None, password: str = None, refresh_interval: float = None):
+        """
+        :param api_key: The API key of the project, defaults to `ENVHUB_API_KEY`.
+        :type api_key: str
+        :param password: The password the variables are encrypted with, defaults to
+            `ENVHUB_PASSWORD`.
+        :type password: str
+        :param refresh_interval: Seconds between two background version checks, defaults to
+            `ENVHUB_REFRESH_INTERVAL` or 60. Zero disables the background refresh.
+        :type refresh_interval: float
+        :raises ValueError: If the API key or the password is missing.
+        """
+        self._api_key = api_key or os.getenv("ENVHUB_API_KEY")
+        if not self._api_key:
+            raise ValueError("ENVHUB_API_KEY is not set")
+
+        self._password = password or os.getenv("ENVHUB_PASSWORD")
+        if not self._password:
+            raise ValueError("ENVHUB_PASSWORD is not set")
+
+        if refresh_interval is None:
+            refresh_interval = float(os.getenv("ENVHUB_REFRESH_INTERVAL", str(DEFAULT_REFRESH_INTERVAL)))
+        self.refresh_interval = refresh_interval
+
+        self._client = None
+        self._values: Optional[dict] = None
+        self._version_id: Optional[str] = None
+        self._rows_hash: Optional[str] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._background: Optional[asyncio.Task] = None
+        self.refreshed_at: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+
+    async def __aenter__(self) -> "AsyncEnvClient":
+        try:
+            await self.start()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @property
+    def loaded(self) -> bool:
+        """True once the environment was fetched and decrypted."""
+        return self._values is not None
+
+    @property
+    def version_id(self) -> Optional[str]:
+        """The id of the version the values belong to, if the server tells it."""
+        return self._version_id
+
+    async def start(self) -> None:
+        """
+        Loads the environment and starts the background refresh.
+
+        :return: None
+        :raises ApiKeyRejectedError: If the API key is rejected.
+        :raises RuntimeError: If the environment cannot be fetched.
+        :raises ValueError: If a variable cannot be decrypted.
+        """
+        await self.refresh()
+        if self.refresh_interval > 0 and self._background is None:
+            self._background = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """
+        Stops the background refresh and any refresh in progress, then releases the Supabase
+        client, closing its connections once no other client of the event loop shares them
+        (see `close_pooled_async_client`). The values stay readable, and a later `refresh` or
+        `start` opens a new client.
+
+        :return: None
+        """
+        for task in (self._background, self._inflight):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._background = None
+        self._inflight = None
+
+        if self._client is not None:
+            client, self._client = self._client, None
+            await close_pooled_async_client(client)
+
+    async def refresh(self) -> bool:
+        """
+        Brings the values up to date with the server. Callers arriving while a refresh is
+        running wait for that refresh instead of starting another one.
+
+        :return: True if the values changed.
+        :rtype: bool
+        :raises ApiKeyRejectedError: If the API key is rejected.
+        :raises RuntimeError: If the environment cannot be fetched.
+        :raises ValueError: If a variable cannot be decrypted.
+        """
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> bool:
+        if self._client is None:
+            self._client = await create_pooled_async_client(SUPABASE_URL, SUPABASE_KEY)
+
+        version_id = await fetch_env_version_by_api_key_async(self._client, self._api_key)
+        if self._values is not None and version_id is not None and version_id == self._version_id:
+            self.refreshed_at = time.time()
+            return False
+
+        rows = await fetch_env_vars_by_api_key_async(self._client, self._api_key)
+        rows_hash = hashlib.sha256(json.dumps(rows, sort_keys=True).encode("utf-8")).hexdigest()
+        if self._values is not None and rows_hash == self._rows_hash:
+            self._version_id = version_id
+            self.refreshed_at = time.time()
+            return False
+
+        values = await asyncio.to_thread(
+            CryptoUtils.decrypt_many,
+            [(row.get("env_name"), CryptoUtils.from_row(row)) for row in rows],
+            self._password
+        )
+
+        self._values = values
+        self._version_id = version_id
+        self._rows_hash = rows_hash
+        self.refreshed_at = time.time()
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+                self.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = e
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Returns the value of a variable from memory, without waiting on the network.
+
+        :param name: The name of the variable.
+        :type name: str
+        :param default: The value returned when the variable does not exist.
+        :type default: Optional[str]
+        :return: The decrypted value, or `default`.
+        :rtype: Optional[str]
+        :raises RuntimeError: If the environment was not loaded yet; await `start` first.
+        """
+        if self._values is None:
+            raise RuntimeError("The environment is not loaded yet; await start() first")
+        return self._values.get(name, default)
+
+    async def aget(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Same as `get`, except that the environment is loaded first if needed.
+
+        :param name: The name of the variable.
+        :type name: str
+        :param default: The value returned when the variable does not exist.
+        :type default: Optional[str]
+        :return: The decrypted value, or `default`.
+        :rtype: Optional[str]
+        """
+        if self._values is None:
+            await self.refresh()
+        return self.get(name, default)
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of every decrypted variable.
+
+        :return: The decrypted variables.
+        :rtype: dict
+        :raises RuntimeError: If the environment was not loaded yet.
+        """
+        if self._values is None:
+            raise RuntimeError("The environment is not loaded yet; await start() first")
+        return dict(self._values)
@@ -4,15 +4,19 @@
 
 import typer
 
-from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.services.createEnvVersionRpc import VersionConflictError, content_hash, create_env_version_rpc
+from envhub.services.getCurrentEnvVariables import _get_cached_latest_version, _get_cached_latest_version_id, \
+    iter_current_env_variables
+from envhub.services.getProjectEnvelopeFormat import ENVELOPE_FORMAT_V2, get_project_envelope_format
 from envhub.utils.crypto import CryptoUtils
 
+_MAX_ATTEMPTS = 3
+
 
 async def create_env_version(project_id: str, env_entries: list, password: str, supabase) -> dict:
     """
-    Creates a new environment version for the given project. This involves fetching existing
-    environment variables, determining the next version number, encrypting metadata and
-    variables, and inserting them into the appropriate database tables.
+    Creates a new environment version for the given project that adds or updates a single
+    environment variable. See `create_env_version_from_changes` for the details.
 
     :param project_id: The unique identifier of the project for which the environment version
         is being created.
@@ -28,75 +32,167 @@ async def create_env_version(project_id: str, env_entries: list, password: str,
     :raises SystemExit: If an error occurs during decryption or any other process, the
         application exits with an error message.
     """
-    try:
-        existing_variables = get_current_env_variables(supabase, project_id)
-
-        version_resp = supabase \
-            .table('env_versions') \
-            .select('version_number') \
-            .filter('project_id', 'eq', project_id) \
-            .order('version_number', desc=True) \
-            .limit(1) \
-            .execute()
-
-        existing_versions = version_resp.data or []
-        next_version_number = (existing_versions[0]['version_number'] + 1) if existing_versions else 1
-
-        dummy_encryption = CryptoUtils.encrypt('version_metadata', password)
-
-        version_insert_resp = supabase \
-            .table('env_versions') \
-            .insert({
-            'project_id': project_id,
-            'version_number': next_version_number,
-            'variable_count': len(existing_variables) + 1,
-            'salt': dummy_encryption['salt'],
-            'nonce': dummy_encryption['nonce'],
-            'tag': dummy_encryption['tag']
-        }) \
-            .execute()
-
-        version = version_insert_resp.data[0]
-
-        all_entries = []
-
-        for existing_var in existing_variables:
-            try:
-                decrypted_value = CryptoUtils.decrypt(
-                    {
-                        "ciphertext": existing_var['env_value_encrypted'],
-                        "salt": existing_var['salt'],
-                        "nonce": existing_var['nonce'],
-                        "tag": existing_var['tag']
-                    },
-                    password)
-                all_entries.append({
-                    'name': existing_var['env_name'],
-                    'value': decrypted_value
-                })
-            except Exception as e:
-                typer.secho(f"Error decrypting environment variable: {e}", fg=typer.colors.RED)
-                exit(1)
+    return await create_env_version_from_changes(project_id, {env_entries[0]: env_entries[1]}, [], password,
+                                                 supabase)
 
-        all_entries.append({"name": env_entries[0], "value": env_entries[1]})
-        env_variables = []
 
-        for entry in all_entries:
-            encrypted = CryptoUtils.encrypt(entry['value'], password)
-            env_variables.append({
-                'project_id': project_id,
-                'version_id': version['id'],
-                'env_name': entry['name'],
-                'env_value_encrypted': encrypted['ciphertext'],
-                'salt': encrypted['salt'],
-                'nonce': encrypted['nonce'],
-                'tag': encrypted['tag']
-            })
+async def create_env_version_from_changes(project_id: str, changes: dict, removed: list, password: str,
+                                          supabase) -> dict:
+    """
+    Creates a new environment version for the given project. This involves fetching existing
+    environment variables, determining the next version number, encrypting metadata and
+    changed variables, and inserting them into the appropriate database tables.
 
-        supabase.table('env_variables').insert(env_variables).execute()
+    Variables that are not changed keep their existing ciphertext and are copied into the new
+    version as they are, so the encryption work depends on the number of changed variables
+    rather than on the size of the project. Only one existing variable is decrypted, to make
+    sure the password matches the one the project is encrypted with. All the changes are
+    published as one version with a single batched insert.
 
-        return version
+    Changed values are written in the v1 format, which every release of the CLI can read,
+    unless the project opted in to the v2 envelope format (see `get_project_envelope_format`).
+
+    The version is created by the `create_env_version` RPC function, which allocates the version
+    number and inserts every row in one transaction. Only the changed variables are sent, with
+    the content hashes of every variable; the server resolves the unchanged ones by hash. If
+    another version was created in the meantime, the changes are rebuilt on top of it and
+    published again. Servers without content-addressed storage are sent every variable, and
+    servers without the function fall back to separate requests.
+
+    :param project_id: The unique identifier of the project for which the environment version
+        is being created.
+    :type project_id: str
+    :param changes: The variables to add or update, mapping each name to its new value.
+    :type changes: dict
+    :param removed: The names of the variables to leave out of the new version.
+    :type removed: list
+    :param password: The encryption password used to encrypt and decrypt environment variables.
+    :type password: str
+    :param supabase: The Supabase client instance used for database operations.
+    :return: A dictionary representing the newly created version's metadata.
+    :rtype: dict
+    :raises SystemExit: If an error occurs during decryption or any other process, the
+        application exits with an error message.
+    """
+    try:
+        v2 = get_project_envelope_format(supabase, project_id) == ENVELOPE_FORMAT_V2
+
+        for _ in range(_MAX_ATTEMPTS):
+            base_version_id = _get_cached_latest_version_id(supabase, project_id)
+
+            # Changed values share one salt and therefore one key derivation. The first element
+            # seals the version metadata stored on the `env_versions` row.
+            encrypted_entries = CryptoUtils.encrypt_many(['version_metadata'] + list(changes.values()), password,
+                                                         v2=v2)
+            version_encryption = encrypted_entries[0]
+            encrypted_changes = dict(zip(changes, encrypted_entries[1:]))
+
+            removed_names = set(removed or [])
+            unchanged_variables = []
+            for index, existing_var in enumerate(iter_current_env_variables(supabase, project_id)):
+                if index == 0 and not _password_matches(existing_var, password):
+                    exit(1)
+                if existing_var['env_name'] in changes or existing_var['env_name'] in removed_names:
+                    continue
+                unchanged_variables.append({
+                    'env_name': existing_var['env_name'],
+                    'env_value_encrypted': existing_var['env_value_encrypted'],
+                    'salt': existing_var['salt'],
+                    'nonce': existing_var['nonce'],
+                    'tag': existing_var['tag']
+                })
+
+            changed_variables = [
+                {
+                    'env_name': name,
+                    'env_value_encrypted': encrypted['ciphertext'],
+                    'salt': encrypted['salt'],
+                    'nonce': encrypted['nonce'],
+                    'tag': encrypted['tag']
+                }
+                for name, encrypted in encrypted_changes.items()
+            ]
+            env_variables = unchanged_variables + changed_variables
+            manifest = [content_hash(env_variable) for env_variable in env_variables]
+
+            try:
+                version = create_env_version_rpc(supabase, project_id, base_version_id, version_encryption,
+                                                 changed_variables, manifest)
+                if version is None:
+                    version = create_env_version_rpc(supabase, project_id, base_version_id, version_encryption,
+                                                     env_variables)
+            except VersionConflictError:
+                _get_cached_latest_version.cache_clear()
+                continue
+
+            if version is None:
+                version = _insert_env_version(supabase, project_id, version_encryption, env_variables)
+
+            _get_cached_latest_version.cache_clear()
+            return version
+
+        typer.secho("Error creating environment version: the project was modified concurrently, please retry.",
+                    fg=typer.colors.RED)
+        exit(1)
 
     except Exception as e:
         typer.secho(f"Error creating environment version: {str(e)}", fg=typer.colors.RED)
         exit(1)
+
+
+def _password_matches(env_variable: dict, password: str) -> bool:
+    try:
+        CryptoUtils.decrypt(CryptoUtils.from_row(env_variable), password)
+        return True
+    except Exception as e:
+        typer.secho(f"Error decrypting environment variable: {e}", fg=typer.colors.RED)
+        return False
+
+
+def _insert_env_version(supabase, project_id: str, version_encryption: dict, env_variables: list) -> dict:
+    """
+    Creates a new environment version with separate requests, for servers where the
+    `create_env_version` RPC function is not deployed. Unlike the RPC function, this is not
+    atomic and concurrent callers may race on the version number.
+
+    :param supabase: The Supabase client instance used for database operations.
+    :param project_id: The unique identifier of the project.
+    :type project_id: str
+    :param version_encryption: The encrypted version metadata, providing `salt`, `nonce` and `tag`.
+    :type version_encryption: dict
+    :param env_variables: The variables of the new version, without `project_id` and `version_id`.
+    :type env_variables: list
+    :return: A dictionary representing the newly created version's metadata.
+    :rtype: dict
+    """
+    version_resp = supabase \
+        .table('env_versions') \
+        .select('version_number') \
+        .filter('project_id', 'eq', project_id) \
+        .order('version_number', desc=True) \
+        .limit(1) \
+        .execute()
+
+    existing_versions = version_resp.data or []
+    next_version_number = (existing_versions[0]['version_number'] + 1) if existing_versions else 1
+
+    version_insert_resp = supabase \
+        .table('env_versions') \
+        .insert({
+        'project_id': project_id,
+        'version_number': next_version_number,
+        'variable_count': len(env_variables),
+        'salt': version_encryption['salt'],
+        'nonce': version_encryption['nonce'],
+        'tag': version_encryption['tag']
+    }) \
+        .execute()
+
+    version = version_insert_resp.data[0]
+
+    supabase.table('env_variables').insert([
+        {'project_id': project_id, 'version_id': version['id'], **env_variable}
+        for env_variable in env_variables
+    ]).execute()
+
+    return version
@@ -0,0 +1,88 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+from typing import List, Optional
+
+from postgrest.exceptions import APIError
+from supabase import Client
+
+from envhub.utils.rpcErrors import FUNCTION_NOT_FOUND
+
+# SQLSTATE raised by the function when the base version is no longer the latest one.
+VERSION_CONFLICT = "40001"
+
+
+class VersionConflictError(Exception):
+    """Raised when another version was created since the changes were computed."""
+
+
+def content_hash(env_variable: dict) -> str:
+    """
+    Computes the content hash of an encrypted variable, as the `env_blob_hash` SQL function
+    does, which identifies the variable in the manifest of a version.
+
+    :param env_variable: The variable, with the `env_name`, `env_value_encrypted`, `salt`,
+        `nonce` and `tag` keys.
+    :type env_variable: dict
+    :return: The hexadecimal SHA-256 of the name and the encrypted value.
+    :rtype: str
+    """
+    content = (f"{env_variable['env_name']}\n{env_variable['env_value_encrypted']}:{env_variable['salt']}:"
+               f"{env_variable['nonce']}:{env_variable['tag']}")
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def create_env_version_rpc(client: Client, project_id: str, base_version_id: Optional[str], version_encryption: dict,
+                           env_variables: List[dict], manifest: Optional[List[str]] = None) -> Optional[dict]:
+    """
+    Creates a new environment version and its variables in a single round trip by calling the
+    `create_env_version` RPC function (see `supabase/migrations`). The function allocates the
+    version number and inserts every row in one transaction.
+
+    With a manifest, only the new or changed variables are sent; the server resolves the
+    other entries of the manifest by their content hash.
+
+    :param client: The client instance used to make the RPC call.
+    :type client: Client
+    :param project_id: The unique identifier of the project.
+    :type project_id: str
+    :param base_version_id: The id of the latest version the changes were computed from, or
+        None if the project has no version yet.
+    :type base_version_id: Optional[str]
+    :param version_encryption: The encrypted version metadata, providing `salt`, `nonce` and `tag`.
+    :type version_encryption: dict
+    :param env_variables: The variables of the new version, each with the `env_name`,
+        `env_value_encrypted`, `salt`, `nonce` and `tag` keys, or only the new and changed
+        ones when `manifest` is given.
+    :type env_variables: List[dict]
+    :param manifest: The content hashes of every variable of the new version, see
+        `content_hash`.
+    :type manifest: Optional[List[str]]
+    :return: The newly created `env_versions` row, or None if the RPC function, or its
+        variant taking a manifest, is not deployed on the server.
+    :rtype: Optional[dict]
+    :raises VersionConflictError: If `base_version_id` is no longer the latest version.
+    """
+    params = {
+        'p_project_id': project_id,
+        'p_base_version_id': base_version_id,
+        'p_salt': version_encryption['salt'],
+        'p_nonce': version_encryption['nonce'],
+        'p_tag': version_encryption['tag'],
+        'p_variables': env_variables
+    }
+    if manifest is not None:
+        params['p_manifest'] = manifest
+
+    try:
+        response = client.rpc('create_env_version', params).execute()
+    except APIError as e:
+        if e.code == FUNCTION_NOT_FOUND:
+            return None
+        if e.code == VERSION_CONFLICT:
+            raise VersionConflictError(e.message) from e
+        raise
+
+    return response.data
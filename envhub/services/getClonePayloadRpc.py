@@ -0,0 +1,39 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from typing import Optional
+
+from postgrest.exceptions import APIError
+from supabase import AsyncClient
+
+from envhub.utils.rpcErrors import FUNCTION_NOT_FOUND
+
+
+async def get_clone_payload_rpc(client: AsyncClient, project_name: str, page_size: int) -> Optional[dict]:
+    """
+    Fetches everything needed to clone a project in a single round trip by calling the
+    `get_clone_payload` RPC function (see `supabase/migrations`).
+
+    :param client: The asynchronous client instance used to make the RPC call.
+    :type client: AsyncClient
+    :param project_name: The name of the project to clone.
+    :type project_name: str
+    :param page_size: The number of variables to include in the payload. Projects with more
+        variables are read page by page from this offset on.
+    :type page_size: int
+    :return: A dictionary with the `project`, `role`, `password`, `member`, `version` and
+        `variables` keys, or None if the RPC function is not deployed on the server.
+    :rtype: Optional[dict]
+    """
+    try:
+        response = await client.rpc('get_clone_payload', {
+            'p_project_name': project_name,
+            'p_page_size': page_size
+        }).execute()
+    except APIError as e:
+        if e.code == FUNCTION_NOT_FOUND:
+            return None
+        raise
+
+    return response.data
@@ -3,75 +3,247 @@
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import functools
-from typing import List, Optional
+import inspect
+import os
+from typing import AsyncIterator, Awaitable, Iterator, List, Optional, Tuple, Union
 
 import typer
-from supabase import Client
+from supabase import AsyncClient, Client
+
+DEFAULT_PAGE_SIZE = 1000
+
+
+def _latest_version_query(client, project_id: str):
+    return (client.table("env_versions")
+            .select("id, version_number")
+            .eq("project_id", project_id)
+            .order("version_number", desc=True)
+            .limit(1))
+
+
+def _env_variables_page_query(client, project_id: str, version_id: str, start: int, page_size: int):
+    # The total is only counted with the first page; it tells when the version was read completely.
+    return (client.table("env_variables")
+            .select(
+        "id, env_name, env_value_encrypted, "
+        "salt, nonce, tag",
+        count="exact" if start == 0 else None
+    )
+            .eq("project_id", project_id)
+            .eq("version_id", version_id)
+            .order("env_name")
+            .order("id")
+            .range(start, start + page_size - 1))
+
+
+def _page_size(page_size: Optional[int]) -> int:
+    return max(1, page_size or int(os.getenv("ENVHUB_PAGE_SIZE", str(DEFAULT_PAGE_SIZE))))
+
+
+def _next_start(start: int, rows: List[dict], total: Optional[int]) -> Optional[int]:
+    """
+    Returns the offset of the page following the given one, or None when every row was read.
+
+    The server returns at most its max-rows setting per request (1000 on Supabase), which may
+    be fewer rows than requested, so a short page does not mean that it is the last one: the
+    rows are read until the total is reached, or until an empty page when it is unknown.
+
+    :param start: Offset of the page that was read.
+    :type start: int
+    :param rows: Rows of the page that was read.
+    :type rows: List[dict]
+    :param total: Total number of rows, or None if the server did not count them.
+    :type total: Optional[int]
+    :return: The offset of the next page, or None.
+    :rtype: Optional[int]
+    """
+    start += len(rows)
+    if not rows or (total is not None and start >= total):
+        return None
+    return start
 
 
 @functools.lru_cache(maxsize=32)
-def _get_cached_latest_version_id(client: Client, project_id: str) -> Optional[str]:
+def _get_cached_latest_version(client: Client, project_id: str) -> Optional[dict]:
     """
-    Fetches the latest version ID for a given project from the "env_versions" table,
+    Fetches the latest version for a given project from the "env_versions" table,
     using an LRU cache to store results for up to 32 distinct project queries. Returns
-    the ID of the latest version if available, or None if no data is found or an error
-    occurs during the query.
+    the id and number of the latest version if available, or None if no data is found
+    or an error occurs during the query.
 
     :param client: The client instance used to interact with the database.
     :type client: Client
     :param project_id: The unique identifier of the project for which the latest
-        version ID is being fetched.
+        version is being fetched.
     :type project_id: str
-    :return: The latest version ID if available, otherwise None.
-    :rtype: Optional[str]
+    :return: A dictionary with the `id` and `version_number` keys, otherwise None.
+    :rtype: Optional[dict]
     """
     try:
-        version_resp = (client.table("env_versions")
-                        .select("id", count="exact")
-                        .eq("project_id", project_id)
-                        .order("version_number", desc=True)
-                        .limit(1)
-                        .execute())
+        version_resp = _latest_version_query(client, project_id).execute()
 
         if not version_resp.data:
             return None
 
-        return version_resp.data[0]["id"]
+        return version_resp.data[0]
     except Exception as e:
         typer.secho(f"Error fetching latest version: {str(e)}", fg=typer.colors.RED)
         return None
 
 
+def _get_cached_latest_version_id(client: Client, project_id: str) -> Optional[str]:
+    """
+    Returns the id of the latest version of the given project, see `_get_cached_latest_version`.
+
+    :param client: The client instance used to interact with the database.
+    :type client: Client
+    :param project_id: The unique identifier of the project.
+    :type project_id: str
+    :return: The latest version ID if available, otherwise None.
+    :rtype: Optional[str]
+    """
+    latest_version = _get_cached_latest_version(client, project_id)
+    return latest_version["id"] if latest_version else None
+
+
+def iter_env_variable_pages(client: Client, project_id: str, page_size: Optional[int] = None) -> Iterator[List[dict]]:
+    """
+    Stream the current environment variables of a project page by page, so projects with
+    thousands of variables are neither truncated by the server's row limit nor held in memory
+    at once. Every page is read from the same version, resolved once up front.
+
+    :param client: Instance of the Client used to manage database queries and operations.
+    :param project_id: Identifier of the project whose environment variables are being retrieved.
+    :param page_size: Number of rows requested per page. Defaults to the `ENVHUB_PAGE_SIZE`
+        environment variable, or 1000.
+    :return: An iterator over non-empty pages of environment variable dictionaries, ordered by name.
+    :raises Exception: If fetching a page fails, so a partial result is never mistaken for a
+        complete one.
+    """
+    page_size = _page_size(page_size)
+    latest_version_id = _get_cached_latest_version_id(client, project_id)
+
+    if not latest_version_id:
+        typer.secho("No environment version found for the project.", fg=typer.colors.YELLOW)
+        return
+
+    start, total = 0, None
+    while start is not None:
+        response = _env_variables_page_query(client, project_id, latest_version_id, start, page_size).execute()
+
+        rows = response.data or []
+        if rows:
+            yield rows
+
+        total = response.count if response.count is not None else total
+        start = _next_start(start, rows, total)
+
+
+async def get_latest_version_async(client: AsyncClient, project_id: str) -> Optional[dict]:
+    """
+    Asynchronous version of `_get_cached_latest_version`, without the cache.
+
+    :param client: The asynchronous client instance used to interact with the database.
+    :type client: AsyncClient
+    :param project_id: The unique identifier of the project.
+    :type project_id: str
+    :return: A dictionary with the `id` and `version_number` keys, otherwise None.
+    :rtype: Optional[dict]
+    """
+    try:
+        version_resp = await _latest_version_query(client, project_id).execute()
+        return version_resp.data[0] if version_resp.data else None
+    except Exception as e:
+        typer.secho(f"Error fetching latest version: {str(e)}", fg=typer.colors.RED)
+        return None
+
+
+async def get_env_variable_page_async(client: AsyncClient, project_id: str, version_id: str, start: int = 0,
+                                      page_size: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+    """
+    Fetches a single page of the environment variables of a version, so the first page can
+    be requested concurrently with other queries.
+
+    :param client: The asynchronous client instance used to interact with the database.
+    :param project_id: Identifier of the project whose environment variables are being retrieved.
+    :param version_id: Identifier of the version to read.
+    :param start: Offset of the first row of the page.
+    :param page_size: Number of rows requested. Defaults to the `ENVHUB_PAGE_SIZE`
+        environment variable, or 1000.
+    :return: The rows of the page, ordered by name, and the total number of rows of the version
+        when `start` is 0 and the server counted them, otherwise None. The server may return fewer
+        rows than requested, see `_next_start`.
+    :raises Exception: If fetching the page fails.
+    """
+    response = await _env_variables_page_query(client, project_id, version_id, start, _page_size(page_size)).execute()
+    return response.data or [], response.count
+
+
+async def aiter_env_variable_pages(client: AsyncClient, project_id: str, version_id: str,
+                                   page_size: Optional[int] = None,
+                                   first_page: Union[Tuple[List[dict], Optional[int]],
+                                                     Awaitable[Tuple[List[dict], Optional[int]]], None] = None
+                                   ) -> AsyncIterator[List[dict]]:
+    """
+    Asynchronous version of `iter_env_variable_pages` for a known version.
+
+    :param client: The asynchronous client instance used to interact with the database.
+    :param project_id: Identifier of the project whose environment variables are being retrieved.
+    :param version_id: Identifier of the version to read.
+    :param page_size: Number of rows requested per page.
+    :param first_page: The rows of the first page and the total number of rows, as returned by
+        `get_env_variable_page_async`, when they were already fetched, or an awaitable of them
+        such as a task running `get_env_variable_page_async`.
+    :return: An asynchronous iterator over non-empty pages of environment variables, ordered by name.
+    :raises Exception: If fetching a page fails.
+    """
+    page_size = _page_size(page_size)
+
+    start, total = 0, None
+    while start is not None:
+        if first_page is not None and start == 0:
+            rows, count = await first_page if inspect.isawaitable(first_page) else first_page
+        else:
+            rows, count = await get_env_variable_page_async(client, project_id, version_id, start, page_size)
+
+        if rows:
+            yield rows
+
+        total = count if count is not None else total
+        start = _next_start(start, rows, total)
+
+
+def iter_current_env_variables(client: Client, project_id: str, page_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Stream the current environment variables of a project one row at a time. See
+    `iter_env_variable_pages` for the paging behaviour.
+
+    :param client: Instance of the Client used to manage database queries and operations.
+    :param project_id: Identifier of the project whose environment variables are being retrieved.
+    :param page_size: Number of rows requested per page.
+    :return: An iterator over dictionaries representing environment variables, ordered by name.
+    """
+    for page in iter_env_variable_pages(client, project_id, page_size):
+        yield from page
+
+
 def get_current_env_variables(client: Client, project_id: str) -> List[dict]:
     """
     Retrieve the current environment variables for a specific project, using the latest
     cached version id. If no version id is cached or an error occurs while fetching,
     appropriate feedback will be provided, or an empty list will be returned.
 
+    All pages of `iter_current_env_variables` are collected into a list; prefer the iterator
+    when the rows can be processed as they arrive.
+
     :param client: Instance of the Client used to manage database queries and operations.
     :param project_id: Identifier of the project whose environment variables are being retrieved.
     :return: A list of dictionaries representing environment variables, including information
              like name and encrypted value. Returns an empty list if no variables exist
              or an error occurs during retrieval.
     """
-    latest_version_id = _get_cached_latest_version_id(client, project_id)
-
-    if not latest_version_id:
-        typer.secho("No environment version found for the project.", fg=typer.colors.YELLOW)
-        return []
-
     try:
-        response = (client.table("env_variables")
-                    .select(
-            "id, env_name, env_value_encrypted, "
-            "salt, nonce, tag"
-        )
-                    .eq("project_id", project_id)
-                    .eq("version_id", latest_version_id)
-                    .order("env_name")
-                    .execute())
-
-        return response.data or []
+        return list(iter_current_env_variables(client, project_id))
     except Exception as e:
         typer.secho(f"Error fetching environment variables: {str(e)}", fg=typer.colors.RED)
         return []
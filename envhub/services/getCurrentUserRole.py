@@ -7,8 +7,11 @@ from typing import Optional
 import supabase
 import typer
 
+from envhub.auth import get_current_user_id
 
-async def get_current_user_role(client: supabase.Client, project_id: str) -> Optional[str]:
+
+async def get_current_user_role(client: supabase.AsyncClient, project_id: str,
+                                user_id: Optional[str] = None) -> Optional[str]:
     """
     Fetches the current user's role for a specific project.
 
@@ -18,20 +21,22 @@ async def get_current_user_role(client: supabase.Client, project_id: str) -> Opt
     the function returns None. In case of an error during the process, the function
     displays an error message and terminates the program.
 
-    :param client: Supabase client instance used to query the database.
-    :type client: supabase.Client
+    :param client: Asynchronous Supabase client instance used to query the database.
+    :type client: supabase.AsyncClient
     :param project_id: ID of the project for which the user's role is being fetched.
     :type project_id: str
+    :param user_id: ID of the current user, when already known, to save a request.
+    :type user_id: Optional[str]
     :return: The role of the current user in the specified project, or None if the user
              does not have a role in the project.
     :rtype: Optional[str]
     """
     try:
-        user_id = client.auth.get_user().user.id
+        user_id = user_id or get_current_user_id()
         if not user_id:
             return None
 
-        response = client \
+        response = await client \
             .table('project_members') \
             .select('role') \
             .eq('project_id', project_id) \
@@ -6,6 +6,33 @@ import supabase
 import typer
 
 
+def _encrypted_project_password_query(client, project_id: str, user_id: str):
+    return client.table("project_members") \
+        .select("encrypted_project_password", "access_password_hash") \
+        .eq("project_id", project_id) \
+        .eq("user_id", user_id)
+
+
+def _parse_encrypted_project_password(data: list):
+    if not data:
+        return None
+
+    if not data[0].get("encrypted_project_password") or not data[0].get("access_password_hash"):
+        return None
+
+    parts = data[0]["encrypted_project_password"].split(":")
+    if len(parts) != 4:
+        raise ValueError("Invalid encrypted project password format")
+
+    return {
+        "ciphertext": parts[0],
+        "salt": parts[1],
+        "nonce": parts[2],
+        "tag": parts[3],
+        "access_password_hash": data[0]["access_password_hash"]
+    }
+
+
 def get_encrypted_project_password(client: supabase.Client, project_id: str, user_id: str):
     """
     Fetches the encrypted project password and associated access password hash for a specific
@@ -28,29 +55,31 @@ def get_encrypted_project_password(client: supabase.Client, project_id: str, use
     :rtype: dict | None
     """
     try:
-        response = client.table("project_members") \
-            .select("encrypted_project_password", "access_password_hash") \
-            .eq("project_id", project_id) \
-            .eq("user_id", user_id) \
-            .execute()
-
-        if not response.data:
-            return None
-
-        if not response.data[0].get("encrypted_project_password") or not response.data[0].get("access_password_hash"):
-            return None
-
-        parts = response.data[0]["encrypted_project_password"].split(":")
-        if len(parts) != 4:
-            raise ValueError("Invalid encrypted project password format")
-
-        return {
-            "ciphertext": parts[0],
-            "salt": parts[1],
-            "nonce": parts[2],
-            "tag": parts[3],
-            "access_password_hash": response.data[0]["access_password_hash"]
-        }
+        response = _encrypted_project_password_query(client, project_id, user_id).execute()
+        return _parse_encrypted_project_password(response.data)
+
+    except Exception as e:
+        typer.secho(f"Error fetching project password: {str(e)}", fg=typer.colors.RED)
+        exit(1)
+
+
+async def get_encrypted_project_password_async(client: supabase.AsyncClient, project_id: str, user_id: str):
+    """
+    Asynchronous version of `get_encrypted_project_password`, for use with `asyncio.gather`.
+
+    :param client: An instance of supabase.AsyncClient used to interact with the database.
+    :type client: supabase.AsyncClient
+    :param project_id: Unique identifier of the project for which the password is fetched.
+    :type project_id: str
+    :param user_id: Unique identifier of the user whose access and project-related
+        passwords are retrieved.
+    :type user_id: str
+    :return: The same dictionary as `get_encrypted_project_password`, or `None`.
+    :rtype: dict | None
+    """
+    try:
+        response = await _encrypted_project_password_query(client, project_id, user_id).execute()
+        return _parse_encrypted_project_password(response.data)
 
     except Exception as e:
         typer.secho(f"Error fetching project password: {str(e)}", fg=typer.colors.RED)
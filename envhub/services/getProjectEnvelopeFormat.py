@@ -0,0 +1,41 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from postgrest.exceptions import APIError
+from supabase import Client
+
+ENVELOPE_FORMAT_V1 = 1
+ENVELOPE_FORMAT_V2 = 2
+# SQLSTATE returned when the column does not exist, on servers without the migration.
+UNDEFINED_COLUMN = "42703"
+
+
+def get_project_envelope_format(client: Client, project_id: str) -> int:
+    """
+    Fetches the envelope format new values of the project are written in, recorded in the
+    `envelope_format` column of `projects` (see `supabase/migrations`). Projects stay on
+    the v1 format, which every release of the CLI can read, until an owner opts in to v2.
+
+    :param client: The client instance used to query the "projects" table.
+    :type client: Client
+    :param project_id: The unique identifier of the project.
+    :type project_id: str
+    :return: `ENVELOPE_FORMAT_V2` if the project opted in to the v2 format, or
+        `ENVELOPE_FORMAT_V1` otherwise, including on servers without the column.
+    :rtype: int
+    """
+    try:
+        response = client.table("projects") \
+            .select("envelope_format") \
+            .eq("id", project_id) \
+            .limit(1) \
+            .execute()
+    except APIError as e:
+        if e.code == UNDEFINED_COLUMN:
+            return ENVELOPE_FORMAT_V1
+        raise
+
+    if not response.data:
+        return ENVELOPE_FORMAT_V1
+    return response.data[0].get("envelope_format") or ENVELOPE_FORMAT_V1
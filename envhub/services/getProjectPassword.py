@@ -2,10 +2,19 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
+from typing import Optional
+
 import supabase
 import typer
 
 
+def _project_password_query(client, project_id: str, user_id: str):
+    return client.table("projects") \
+        .select("password_hash") \
+        .eq("id", project_id) \
+        .eq("user_id", user_id)
+
+
 def get_project_password(client: supabase.Client, project_id: str, user_id: str) -> str:
     """
     fetches the password hash for a specific project associated with a specific user
@@ -23,12 +32,29 @@ def get_project_password(client: supabase.Client, project_id: str, user_id: str)
     :rtype: str
     """
     try:
-        response = client.table("projects") \
-            .select("password_hash") \
-            .eq("id", project_id) \
-            .eq("user_id", user_id) \
-            .execute()
+        response = _project_password_query(client, project_id, user_id).execute()
         return response.data[0]["password_hash"]
     except Exception as e:
         typer.secho(f"Error fetching project password: {str(e)}", fg=typer.colors.RED)
         exit(1)
+
+
+async def get_project_password_async(client: supabase.AsyncClient, project_id: str, user_id: str) -> Optional[str]:
+    """
+    Asynchronous version of `get_project_password`, for use with `asyncio.gather`.
+
+    :param client: Asynchronous supabase client used to interact with the "projects" table.
+    :type client: supabase.AsyncClient
+    :param project_id: Unique identifier of the project for which the password hash is fetched.
+    :type project_id: str
+    :param user_id: Unique identifier of the user associated with the project.
+    :type user_id: str
+    :return: The password hash string of the specified project, or None if it was not found.
+    :rtype: Optional[str]
+    """
+    try:
+        response = await _project_password_query(client, project_id, user_id).execute()
+        return response.data[0]["password_hash"] if response.data else None
+    except Exception as e:
+        typer.secho(f"Error fetching project password: {str(e)}", fg=typer.colors.RED)
+        exit(1)
@@ -2,10 +2,14 @@
 # This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import typer
-from supabase import Client
+from postgrest.exceptions import APIError
+from supabase import AsyncClient, Client
+
+from envhub.utils.rpcErrors import FUNCTION_NOT_FOUND
+from envhub.utils.snapshotCache import ApiKeyRejectedError
 
 
 def get_env_vars_by_api_key(client: Client, api_key: str) -> List[Dict[str, Any]]:
@@ -49,3 +53,117 @@ def get_env_vars_by_api_key(client: Client, api_key: str) -> List[Dict[str, Any]
             fg=typer.colors.RED
         )
         return []
+
+
+def _parse_env_vars_result(data) -> List[Dict[str, Any]]:
+    result = data[0]
+    if not result.get('success'):
+        raise ApiKeyRejectedError(result.get('message', 'Unknown error'))
+
+    return result.get('data', [])
+
+
+def _parse_env_version_result(data) -> Optional[str]:
+    # No row is returned for a key get_environment_variables_by_api_key would reject: the rows
+    # are then fetched as on a cache miss, and that call tells why the key was rejected.
+    return data[0].get('version_id') if data else None
+
+
+def fetch_env_vars_by_api_key(client: Client, api_key: str) -> List[Dict[str, Any]]:
+    """
+    Same as `get_env_vars_by_api_key`, except that errors are raised instead of being
+    printed, so the snapshot cache can tell a rejected API key from an unreachable server.
+
+    :param client: The client instance used to make the RPC call.
+    :type client: Client
+    :param api_key: The API key for which to fetch the environment variables.
+    :type api_key: str
+    :return: A list of dictionaries representing the fetched environment variables.
+    :rtype: List[Dict[str, Any]]
+    :raises ApiKeyRejectedError: If the API key is rejected.
+    :raises RuntimeError: If the RPC call fails.
+    """
+    try:
+        response = (client.rpc('get_environment_variables_by_api_key',
+                               {'api_key_param': api_key})
+                    .execute())
+    except Exception as e:
+        raise RuntimeError(f"Error calling RPC function: {str(e)}") from e
+
+    return _parse_env_vars_result(response.data)
+
+
+async def fetch_env_vars_by_api_key_async(client: AsyncClient, api_key: str) -> List[Dict[str, Any]]:
+    """
+    Asynchronous version of `fetch_env_vars_by_api_key`.
+
+    :param client: The asynchronous client instance used to make the RPC call.
+    :type client: AsyncClient
+    :param api_key: The API key for which to fetch the environment variables.
+    :type api_key: str
+    :return: A list of dictionaries representing the fetched environment variables.
+    :rtype: List[Dict[str, Any]]
+    :raises ApiKeyRejectedError: If the API key is rejected.
+    :raises RuntimeError: If the RPC call fails.
+    """
+    try:
+        response = await client.rpc('get_environment_variables_by_api_key',
+                                    {'api_key_param': api_key}).execute()
+    except Exception as e:
+        raise RuntimeError(f"Error calling RPC function: {str(e)}") from e
+
+    return _parse_env_vars_result(response.data)
+
+
+def fetch_env_version_by_api_key(client: Client, api_key: str) -> Optional[str]:
+    """
+    Fetches the id of the latest version of the project an API key belongs to by calling
+    the `get_environment_version_by_api_key` RPC function (see `supabase/migrations`).
+
+    :param client: The client instance used to make the RPC call.
+    :type client: Client
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: The id of the latest version, or None if the API key is not valid, the project
+        has no version or the RPC function is not deployed.
+    :rtype: Optional[str]
+    :raises RuntimeError: If the RPC call fails.
+    """
+    try:
+        response = (client.rpc('get_environment_version_by_api_key',
+                               {'api_key_param': api_key})
+                    .execute())
+    except APIError as e:
+        if e.code == FUNCTION_NOT_FOUND:
+            return None
+        raise RuntimeError(f"Error calling RPC function: {e.message}") from e
+    except Exception as e:
+        raise RuntimeError(f"Error calling RPC function: {str(e)}") from e
+
+    return _parse_env_version_result(response.data)
+
+
+async def fetch_env_version_by_api_key_async(client: AsyncClient, api_key: str) -> Optional[str]:
+    """
+    Asynchronous version of `fetch_env_version_by_api_key`.
+
+    :param client: The asynchronous client instance used to make the RPC call.
+    :type client: AsyncClient
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: The id of the latest version, or None if the API key is not valid, the project
+        has no version or the RPC function is not deployed.
+    :rtype: Optional[str]
+    :raises RuntimeError: If the RPC call fails.
+    """
+    try:
+        response = await client.rpc('get_environment_version_by_api_key',
+                                    {'api_key_param': api_key}).execute()
+    except APIError as e:
+        if e.code == FUNCTION_NOT_FOUND:
+            return None
+        raise RuntimeError(f"Error calling RPC function: {e.message}") from e
+    except Exception as e:
+        raise RuntimeError(f"Error calling RPC function: {str(e)}") from e
+
+    return _parse_env_version_result(response.data)
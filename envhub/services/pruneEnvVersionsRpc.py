@@ -0,0 +1,43 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from typing import Optional
+
+from supabase import Client
+
+DEFAULT_BATCH_SIZE = 100
+
+
+def prune_env_versions_rpc(client: Client, project_id: str, keep: Optional[int], older_than_seconds: Optional[int],
+                           dry_run: bool, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """
+    Calls the `prune_env_versions` RPC function (see `supabase/migrations`), which deletes
+    old versions of a project and their variables. A call deletes at most `batch_size`
+    versions; call it again while `remaining` is not 0.
+
+    :param client: The client instance used to make the RPC call.
+    :type client: Client
+    :param project_id: The id of the project.
+    :type project_id: str
+    :param keep: The number of most recent versions to keep.
+    :type keep: Optional[int]
+    :param older_than_seconds: Only prune versions created more than this many seconds ago.
+    :type older_than_seconds: Optional[int]
+    :param dry_run: Only counts what would be pruned.
+    :type dry_run: bool
+    :param batch_size: The maximum number of versions deleted by the call.
+    :type batch_size: int
+    :return: A dictionary with the `versions`, `variables` and `bytes` deleted (or that would
+        be deleted with `dry_run`) and the number of versions `remaining` to prune.
+    :rtype: dict
+    """
+    response = client.rpc('prune_env_versions', {
+        'p_project_id': project_id,
+        'p_keep': keep,
+        'p_older_than_seconds': older_than_seconds,
+        'p_dry_run': dry_run,
+        'p_batch_size': batch_size
+    }).execute()
+
+    return response.data
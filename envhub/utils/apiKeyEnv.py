@@ -0,0 +1,74 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+from typing import Callable, Optional
+
+from envhub import agent
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.snapshotCache import load_api_rows, snapshot_cache_enabled
+
+
+def load_env_by_api_key(api_key: str, password: str, fetch_rows: Callable[[], list],
+                        fetch_version: Callable[[], Optional[str]], warn: Callable[[str], None] = None) -> dict:
+    """
+    Returns the decrypted production environment of an API key, from the running
+    `envhub agent` when it holds a snapshot of the latest version, or from the server
+    otherwise. The encrypted variables go through the snapshot cache when it is enabled
+    (see `load_api_rows`), in which case the agent snapshot follows the cached rows.
+
+    The server is only reached through the given fetchers, so `envhub-exec` can call it with
+    the standard library HTTP client and `envhub decrypt-prod` with the Supabase client.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :param password: The password the variables are encrypted with.
+    :type password: str
+    :param fetch_rows: Returns the encrypted rows of the API key from the server.
+    :type fetch_rows: Callable[[], list]
+    :param fetch_version: Returns the id of the latest version from the server, or None if
+        the server cannot tell it.
+    :type fetch_version: Callable[[], Optional[str]]
+    :param warn: Called with a message when a stale snapshot is used, see `load_api_rows`.
+    :type warn: Callable[[str], None]
+    :return: The decrypted variables.
+    :rtype: dict
+    :raises ApiKeyRejectedError: If the API key is rejected.
+    :raises RuntimeError: If the variables cannot be fetched.
+    :raises Exception: If a variable cannot be decrypted.
+    """
+    # Agent snapshots are keyed on the latest version id, so a newly published version is
+    # never served from memory. When the id is unknown, they are keyed on the rows.
+    api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    snapshot_version = None
+    if agent.available() and not snapshot_cache_enabled():
+        try:
+            version_id = fetch_version()
+        except RuntimeError:
+            version_id = None
+        if version_id is not None:
+            snapshot_version = f"version:{version_id}"
+            decrypted_envs = agent.request_snapshot("api", api_key_hash, snapshot_version, password)
+            if decrypted_envs is not None:
+                return decrypted_envs
+
+    if snapshot_cache_enabled():
+        envs = load_api_rows(api_key, fetch_rows, fetch_version, warn)
+    else:
+        envs = fetch_rows()
+
+    if snapshot_version is None and envs and agent.available():
+        snapshot_version = agent.rows_version(envs)
+        decrypted_envs = agent.request_snapshot("api", api_key_hash, snapshot_version, password)
+        if decrypted_envs is not None:
+            return decrypted_envs
+
+    decrypted_envs = CryptoUtils.decrypt_many(
+        [(env.get("env_name"), CryptoUtils.from_row(env)) for env in envs],
+        password
+    )
+
+    if envs and snapshot_version is not None:
+        agent.store_snapshot("api", api_key_hash, snapshot_version, password, decrypted_envs)
+    return decrypted_envs
@@ -3,13 +3,24 @@
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import base64
+import fnmatch
 import os
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from envhub.utils.keyCache import key_cache
+
+# Prefix carried by the ciphertext of v2 envelopes. Base64 never contains ':', so
+# a v2 value reads `v2:ciphertext:salt:nonce:tag` and a v1 value keeps the
+# original four-part `ciphertext:salt:nonce:tag` layout.
+ENVELOPE_V2 = "v2"
+_ENVELOPE_V2_INFO = b"envhub-envelope-v2"
+
 
 class CryptoUtils:
     @staticmethod
@@ -33,6 +44,9 @@ class CryptoUtils:
         """
         Derive a key from the given password and salt using PBKDF2 with HMAC-SHA256.
 
+        Derived keys are kept in the process-wide `key_cache`, so deriving the same key
+        twice in one process only runs PBKDF2 once.
+
         Args:
             password: The password to use for key derivation.
             salt: The salt to use for key derivation.
@@ -40,14 +54,110 @@ class CryptoUtils:
         Returns:
             A 32 byte key derived from the given password and salt.
         """
-        kdf = PBKDF2HMAC(
+        password_bytes = CryptoUtils._to_bytes(password)
+
+        def _derive() -> bytes:
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,  # AES-256
+                salt=salt,
+                iterations=100000,
+                backend=default_backend()
+            )
+            return kdf.derive(password_bytes)
+
+        return key_cache.get_or_derive(password_bytes, salt, _derive)
+
+    @staticmethod
+    def key_cache_stats() -> dict:
+        """
+        Return the hit and miss counters of the derived-key cache.
+
+        Returns:
+            A dictionary with the `hits`, `misses`, `evictions`, `size` and `maxsize` keys.
+        """
+        return key_cache.stats()
+
+    @staticmethod
+    def derive_envelope_key(password: str, salt: bytes) -> bytes:
+        """
+        Derive the key used by v2 envelopes from the given password and salt.
+
+        The PBKDF2 output is passed through HKDF-SHA256 so a v2 key never equals the
+        v1 key derived from the same password and salt.
+
+        Args:
+            password: The password to use for key derivation.
+            salt: The per-version salt shared by every value of a v2 envelope.
+
+        Returns:
+            A 32 byte key derived from the given password and salt.
+        """
+        hkdf = HKDF(
             algorithm=hashes.SHA256(),
-            length=32,  # AES-256
-            salt=salt,
-            iterations=100000,
+            length=32,
+            salt=None,
+            info=_ENVELOPE_V2_INFO,
             backend=default_backend()
         )
-        return kdf.derive(CryptoUtils._to_bytes(password))
+        return hkdf.derive(CryptoUtils.derive_key(password, salt))
+
+    @staticmethod
+    def is_v2(encrypted_data: dict) -> bool:
+        """
+        Check whether the given encrypted data uses the v2 envelope format.
+
+        Args:
+            encrypted_data: The encrypted data, as returned by `encrypt` or `encrypt_many`.
+
+        Returns:
+            True if the ciphertext carries the v2 prefix, False otherwise.
+        """
+        return encrypted_data["ciphertext"].startswith(ENVELOPE_V2 + ":")
+
+    @staticmethod
+    def _seal(key: bytes, salt: bytes, content: str, prefix: str = "") -> dict:
+        nonce = os.urandom(12)  # GCM nonce size
+        encrypted = AESGCM(key).encrypt(nonce, CryptoUtils._to_bytes(content), None)
+
+        return {
+            "ciphertext": prefix + CryptoUtils._b64encode(encrypted[:-16]),
+            "tag": CryptoUtils._b64encode(encrypted[-16:]),
+            "salt": CryptoUtils._b64encode(salt),
+            "nonce": CryptoUtils._b64encode(nonce)
+        }
+
+    @staticmethod
+    def _open(key: bytes, encrypted_data: dict) -> str:
+        ciphertext = encrypted_data["ciphertext"]
+        if CryptoUtils.is_v2(encrypted_data):
+            ciphertext = ciphertext[len(ENVELOPE_V2) + 1:]
+
+        nonce = CryptoUtils._b64decode(encrypted_data["nonce"])
+        encrypted = CryptoUtils._b64decode(ciphertext) + CryptoUtils._b64decode(encrypted_data["tag"])
+        decrypted = AESGCM(key).decrypt(nonce, encrypted, None)
+
+        return CryptoUtils._to_str(decrypted)
+
+    @staticmethod
+    def _key_id(encrypted_data: dict) -> tuple:
+        return CryptoUtils.is_v2(encrypted_data), encrypted_data["salt"]
+
+    @staticmethod
+    def _key_for(encrypted_data: dict, password: str, keys: dict = None) -> bytes:
+        cache_key = CryptoUtils._key_id(encrypted_data)
+        if keys is not None and cache_key in keys:
+            return keys[cache_key]
+
+        salt = CryptoUtils._b64decode(encrypted_data["salt"])
+        if CryptoUtils.is_v2(encrypted_data):
+            key = CryptoUtils.derive_envelope_key(password, salt)
+        else:
+            key = CryptoUtils.derive_key(password, salt)
+
+        if keys is not None:
+            keys[cache_key] = key
+        return key
 
     @staticmethod
     def encrypt(content: str, password: str) -> dict:
@@ -71,27 +181,50 @@ class CryptoUtils:
             A dictionary containing the encrypted content, authentication tag, salt, and nonce.
         """
         salt = os.urandom(16)
-        nonce = os.urandom(12)  # GCM nonce size
         key = CryptoUtils.derive_key(password, salt)
-        aesgcm = AESGCM(key)
+        return CryptoUtils._seal(key, salt, content)
+
+    @staticmethod
+    def encrypt_many(contents: list, password: str, salt: bytes = None, v2: bool = False) -> list:
+        """
+        Encrypt several values with a single key derivation.
 
-        content_bytes = CryptoUtils._to_bytes(content)
-        encrypted = aesgcm.encrypt(nonce, content_bytes, None)
+        One random salt is generated for the whole batch and a single key is derived from
+        it. Every value is then encrypted with AES-GCM under its own random nonce. The
+        returned dictionaries have the same keys as the ones returned by `encrypt`.
 
-        return {
-            "ciphertext": CryptoUtils._b64encode(encrypted[:-16]),
-            "tag": CryptoUtils._b64encode(encrypted[-16:]),
-            "salt": CryptoUtils._b64encode(salt),
-            "nonce": CryptoUtils._b64encode(nonce)
-        }
+        By default the values use the four-part v1 format that every release can read;
+        readers that deduplicate keys by salt still derive the key once. With `v2`, they
+        use the v2 envelope format instead, with the ciphertext prefixed by `v2:`, which
+        releases older than the format cannot parse.
+
+        Args:
+            contents: The values to encrypt.
+            password: The password to use for key derivation.
+            salt: The salt to derive the key from. Passing the same salt to several calls
+                places their values in the same envelope, which lets large sets be
+                encrypted in chunks. Defaults to a new random salt.
+            v2: Whether to use the v2 envelope format.
+
+        Returns:
+            A list of encrypted dictionaries, in the same order as `contents`.
+        """
+        salt = salt or os.urandom(16)
+        if v2:
+            key = CryptoUtils.derive_envelope_key(password, salt)
+            return [CryptoUtils._seal(key, salt, content, ENVELOPE_V2 + ":") for content in contents]
+
+        key = CryptoUtils.derive_key(password, salt)
+        return [CryptoUtils._seal(key, salt, content) for content in contents]
 
     @staticmethod
-    def decrypt(encrypted_data: dict, password: str) -> str:
+    def decrypt(encrypted_data: dict, password: str, keys: dict = None) -> str:
         """
         Decrypt the given encrypted data using the given password.
 
         The password is used to derive a key using PBKDF2 with HMAC-SHA256.
         The derived key is then used to decrypt the content using AES-GCM with the given nonce.
+        Both v1 envelopes and v2 envelopes (see `encrypt_many`) are accepted.
 
         Args:
             encrypted_data: The encrypted data to decrypt, containing the following keys:
@@ -100,41 +233,210 @@ class CryptoUtils:
                 - `salt`: The salt used for key derivation (base64 encoded).
                 - `nonce`: The nonce used for encryption (base64 encoded).
             password: The password to use for key derivation.
+            keys: Optional dictionary used to share derived keys between calls, so values
+                that have the same salt only pay for one key derivation.
 
         Returns:
             The decrypted content as a string.
         """
-        salt = CryptoUtils._b64decode(encrypted_data["salt"])
-        nonce = CryptoUtils._b64decode(encrypted_data["nonce"])
-        ciphertext = CryptoUtils._b64decode(encrypted_data["ciphertext"])
-        tag = CryptoUtils._b64decode(encrypted_data["tag"])
+        key = CryptoUtils._key_for(encrypted_data, password, keys)
+        return CryptoUtils._open(key, encrypted_data)
 
-        encrypted = ciphertext + tag
-        key = CryptoUtils.derive_key(password, salt)
-        aesgcm = AESGCM(key)
-        decrypted = aesgcm.decrypt(nonce, encrypted, None)
+    @staticmethod
+    def decrypt_many(items: list, password: str, workers: int = None) -> dict:
+        """
+        Decrypt several named values, deriving the keys they need in parallel.
 
-        return CryptoUtils._to_str(decrypted)
+        Each distinct key (one per v1 value, one per v2 version) is derived exactly once on
+        a thread pool; PBKDF2 runs inside OpenSSL, so the derivations use all available
+        cores. The AES-GCM decryptions themselves are cheap and run afterwards in input
+        order. The first failure cancels the remaining work.
+
+        Args:
+            items: A list of `(name, encrypted_data)` pairs.
+            password: The password to use for key derivation.
+            workers: The maximum number of threads deriving keys. Defaults to the
+                `ENVHUB_DECRYPT_WORKERS` environment variable, or the number of CPUs.
+
+        Returns:
+            A dictionary mapping each name to its decrypted value, in input order.
+
+        Raises:
+            ValueError: If any value fails to decrypt, naming the offending variable.
+        """
+        items = list(items)
+        if workers is None:
+            workers = int(os.getenv("ENVHUB_DECRYPT_WORKERS", "0") or 0) or os.cpu_count() or 1
+
+        owners = {}
+        for name, encrypted_data in items:
+            try:
+                owners.setdefault(CryptoUtils._key_id(encrypted_data), (name, encrypted_data))
+            except Exception as e:
+                raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+
+        keys = {}
+        if workers <= 1 or len(owners) <= 1:
+            for key_id, (name, encrypted_data) in owners.items():
+                try:
+                    CryptoUtils._key_for(encrypted_data, password, keys)
+                except Exception as e:
+                    raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+        else:
+            executor = ThreadPoolExecutor(max_workers=min(workers, len(owners)))
+            futures = {}
+            try:
+                for key_id, (name, encrypted_data) in owners.items():
+                    futures[executor.submit(CryptoUtils._key_for, encrypted_data, password)] = (key_id, name)
+                done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    key_id, name = futures[future]
+                    if future.exception() is not None:
+                        e = future.exception()
+                        raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+                    keys[key_id] = future.result()
+            finally:
+                # `cancel_futures` needs Python 3.9; the pending derivations are cancelled by hand.
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+
+        decrypted = {}
+        for name, encrypted_data in items:
+            try:
+                decrypted[name] = CryptoUtils._open(keys[CryptoUtils._key_id(encrypted_data)], encrypted_data)
+            except Exception as e:
+                raise ValueError(f"Failed to decrypt environment variable '{name}': {str(e)}") from e
+
+        return decrypted
 
     @staticmethod
-    def decrypt_env_file(env_file_path: str, password: str) -> dict:
+    def upgrade(items: list, password: str, salt: bytes = None) -> list:
         """
-        Decrypts a given .env file and returns decrypted environment variables.
-        Fails immediately if any decryption fails.
+        Re-encrypt the given values into a single v2 envelope.
 
-        :param env_file_path: Path to the .env file to be processed
-        :param password: Password used for decryption
-        :return: Dictionary of decrypted environment variables
-        :raises: ValueError if decryption fails for any variable
+        This is the migration path from v1 values, which need one key derivation each,
+        to v2 values, which share one key derivation for the whole set.
+
+        Args:
+            items: A list of `(name, encrypted_data)` pairs to migrate, in either format.
+            password: The password used to decrypt and re-encrypt the values.
+            salt: The salt of the target envelope, see `encrypt_many`.
+
+        Returns:
+            A list of v2 encrypted dictionaries, in the same order as `items`.
+        """
+        decrypted = CryptoUtils.decrypt_many(items, password)
+        return CryptoUtils.encrypt_many([decrypted[name] for name, _ in items], password, salt, v2=True)
+
+    @staticmethod
+    def from_row(row: dict) -> dict:
+        """
+        Build the encrypted data of an `env_variables` row.
+
+        Args:
+            row: A row with the `env_value_encrypted`, `salt`, `nonce` and `tag` columns.
+
+        Returns:
+            A dictionary with the `ciphertext`, `salt`, `nonce` and `tag` keys.
+        """
+        return {
+            "ciphertext": row.get("env_value_encrypted"),
+            "salt": row.get("salt"),
+            "nonce": row.get("nonce"),
+            "tag": row.get("tag")
+        }
+
+    @staticmethod
+    def parse_env_value(key: str, value: str) -> dict:
+        """
+        Split an encrypted `.env` value into its components.
+
+        Args:
+            key: The name of the variable, used in error messages.
+            value: Either `ciphertext:salt:nonce:tag` or `v2:ciphertext:salt:nonce:tag`.
+
+        Returns:
+            A dictionary with the `ciphertext`, `salt`, `nonce` and `tag` keys.
+
+        Raises:
+            ValueError: If the value does not match either format.
+        """
+        parts = value.split(':')
+        if len(parts) == 5 and parts[0] == ENVELOPE_V2:
+            parts = [f"{ENVELOPE_V2}:{parts[1]}"] + parts[2:]
+
+        # A four-part value starting with the v2 prefix is a truncated v2 value.
+        if len(parts) != 4 or parts[0] == ENVELOPE_V2:
+            raise ValueError(
+                f"Invalid encrypted value format for {key}. "
+            )
+
+        return {
+            "ciphertext": parts[0],
+            "salt": parts[1],
+            "nonce": parts[2],
+            "tag": parts[3]
+        }
+
+    @staticmethod
+    def format_env_value(encrypted_data: dict) -> str:
+        """
+        Join encrypted data into the value stored in a `.env` file.
+
+        This is the inverse of `parse_env_value`.
+
+        Args:
+            encrypted_data: A dictionary with the `ciphertext`, `salt`, `nonce` and `tag` keys.
+
+        Returns:
+            The value as `ciphertext:salt:nonce:tag`, where a v2 ciphertext keeps its prefix.
+        """
+        return (f"{encrypted_data['ciphertext']}:{encrypted_data['salt']}:"
+                f"{encrypted_data['nonce']}:{encrypted_data['tag']}")
+
+    @staticmethod
+    def select_env_names(names: list, patterns: list) -> list:
+        """
+        Select the variable names matching any of the given patterns.
+
+        A pattern is either an exact name or a shell-style glob such as `AWS_*`, which is
+        how a prefix is selected. Matching is case-sensitive.
+
+        Args:
+            names: The available variable names.
+            patterns: The names and globs to select.
+
+        Returns:
+            The matching names, in the order of `names`.
+
+        Raises:
+            ValueError: If an exact name is not among `names`.
+        """
+        exact = {pattern for pattern in patterns if not any(c in pattern for c in "*?[")}
+        globs = [pattern for pattern in patterns if pattern not in exact]
+
+        missing = [pattern for pattern in patterns if pattern in exact and pattern not in names]
+        if missing:
+            raise ValueError(f"Environment variable(s) not found: {', '.join(missing)}")
+
+        return [name for name in names
+                if name in exact or any(fnmatch.fnmatchcase(name, pattern) for pattern in globs)]
+
+    @staticmethod
+    def read_env_file(env_file_path: str) -> dict:
+        """
+        Read the raw values of an encrypted .env file, without parsing or decrypting them.
+
+        :param env_file_path: Path to the .env file to be read
+        :return: Dictionary mapping each variable name to its encrypted value, in file order
+        :raises: ValueError if a line is malformed
         :raises: IOError if file cannot be read
         """
         if not os.path.exists(env_file_path):
             raise FileNotFoundError(f"Environment file not found: {env_file_path}")
 
-        if not password:
-            raise ValueError("No password provided for decryption")
-
-        decrypted_envs = {}
+        raw_envs = {}
 
         try:
             with open(env_file_path, 'r') as f:
@@ -153,31 +455,63 @@ class CryptoUtils:
                     if not key:
                         raise ValueError(f"Empty key in line {line_num}")
 
-                    if ':' in value:
-                        parts = value.split(':')
-                        if len(parts) != 4:
-                            raise ValueError(
-                                f"Invalid encrypted value format for {key}. "
-                            )
-
-                        try:
-                            encrypted_data = {
-                                "ciphertext": parts[0],
-                                "salt": parts[1],
-                                "nonce": parts[2],
-                                "tag": parts[3]
-                            }
-                            decrypted_envs[key] = CryptoUtils.decrypt(encrypted_data, password)
-                        except Exception as e:
-                            raise ValueError(
-                                f"Failed to decrypt environment variable '{key}': {str(e)}"
-                            ) from e
-                    else:
-                        raise ValueError(
-                            f"Invalid encrypted value format for {key}. "
-                        )
+                    raw_envs[key] = value
 
         except IOError as e:
             raise IOError(f"Failed to read environment file '{env_file_path}': {str(e)}") from e
 
+        return raw_envs
+
+    @staticmethod
+    def parse_raw_env_value(key: str, value: str) -> dict:
+        """
+        Parse a raw value returned by `read_env_file`.
+
+        Args:
+            key: The name of the variable, used in error messages.
+            value: The raw value.
+
+        Returns:
+            A dictionary with the `ciphertext`, `salt`, `nonce` and `tag` keys.
+
+        Raises:
+            ValueError: If the value is not encrypted.
+        """
+        if ':' not in value:
+            raise ValueError(
+                f"Invalid encrypted value format for {key}. "
+            )
+        return CryptoUtils.parse_env_value(key, value)
+
+    @staticmethod
+    def decrypt_env_file(env_file_path: str, password: str, workers: int = None, only: list = None) -> dict:
+        """
+        Decrypts a given .env file and returns decrypted environment variables.
+        Fails immediately if any decryption fails.
+
+        The whole file is parsed first and then handed to `decrypt_many`, so values sharing
+        a salt reuse the same derived key and distinct keys are derived in parallel.
+
+        With `only`, the values of the other variables are neither parsed nor decrypted.
+
+        :param env_file_path: Path to the .env file to be processed
+        :param password: Password used for decryption
+        :param workers: Maximum number of threads deriving keys, see `decrypt_many`
+        :param only: Names and globs of the variables to decrypt, see `select_env_names`
+        :return: Dictionary of decrypted environment variables
+        :raises: ValueError if decryption fails for any variable, or if a name in `only` is missing
+        :raises: IOError if file cannot be read
+        """
+        if not os.path.exists(env_file_path):
+            raise FileNotFoundError(f"Environment file not found: {env_file_path}")
+
+        if not password:
+            raise ValueError("No password provided for decryption")
+
+        raw_envs = CryptoUtils.read_env_file(env_file_path)
+        names = list(raw_envs) if only is None else CryptoUtils.select_env_names(list(raw_envs), only)
+
+        encrypted_envs = [(key, CryptoUtils.parse_raw_env_value(key, raw_envs[key])) for key in names]
+        decrypted_envs = CryptoUtils.decrypt_many(encrypted_envs, password, workers)
+
         return decrypted_envs
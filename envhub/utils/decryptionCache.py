@@ -0,0 +1,123 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+import json
+import os
+import pathlib
+from typing import Callable, Optional
+
+from envhub import agent
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.fileLock import file_lock, write_private_file
+
+CACHE_DIR = pathlib.Path.home() / ".EnvHub" / "cache"
+
+
+def _project_prefix(project_id: str) -> str:
+    return hashlib.sha256(str(project_id).encode("utf-8")).hexdigest()[:16]
+
+
+def _read_entry(cache_file: pathlib.Path, env_hash: str, password: str) -> Optional[dict]:
+    try:
+        with open(cache_file, "r") as f:
+            payload = json.loads(CryptoUtils.decrypt(json.load(f), password))
+    except Exception:
+        return None
+
+    if payload.get("env_hash") != env_hash:
+        return None
+    return payload.get("variables")
+
+
+def _write_entry(cache_file: pathlib.Path, prefix: str, env_hash: str, password: str, variables: dict) -> None:
+    encrypted = CryptoUtils.encrypt(json.dumps({"env_hash": env_hash, "variables": variables}), password)
+    write_private_file(cache_file, json.dumps(encrypted))
+
+    for stale_file in CACHE_DIR.glob(f"{prefix}-*.json"):
+        if stale_file != cache_file:
+            stale_file.unlink(missing_ok=True)
+
+
+def load_cached_env(env_file: pathlib.Path, project_id: str, password: str,
+                    decrypt: Callable[[], dict], only: list = None) -> dict:
+    """
+    Return the decrypted variables of the given `.env` file, using the local decryption cache.
+
+    Cache entries live under `~/.EnvHub/cache`, are keyed by the project id and a hash of the
+    `.env` content, and are encrypted with a single key derived from `password`. A cache hit
+    therefore costs one key derivation however many variables the file holds.
+
+    On a miss the entry is rebuilt under an inter-process file lock, and the cache is checked
+    again once the lock is held, so concurrent invocations decrypt the file only once. Older
+    entries of the same project are removed when a new one is written.
+
+    When `envhub agent` is running it is asked first, which skips key derivation entirely,
+    and it is handed the variables whenever they had to be read from disk.
+
+    Setting the `ENVHUB_NO_CACHE` environment variable bypasses the cache and the agent.
+
+    With `only`, a snapshot of the agent is filtered, but the disk cache is skipped: opening
+    an entry costs as much as decrypting a few values, and `decrypt` is expected to decrypt
+    just the selected variables, which are not worth caching on their own.
+
+    :param env_file: Path of the encrypted `.env` file.
+    :type env_file: pathlib.Path
+    :param project_id: Identifier of the project, as stored in `.envhub`.
+    :type project_id: str
+    :param password: The password from `.envhub`, used to encrypt the cache entry.
+    :type password: str
+    :param decrypt: Called without arguments to decrypt the `.env` file on a cache miss.
+    :type decrypt: Callable[[], dict]
+    :param only: Names and globs of the variables to return, see `CryptoUtils.select_env_names`.
+    :type only: list
+    :return: The decrypted environment variables.
+    :rtype: dict
+    """
+    if os.getenv("ENVHUB_NO_CACHE") or not project_id or not env_file.exists():
+        return decrypt()
+
+    with open(env_file, "rb") as f:
+        env_hash = hashlib.sha256(f.read()).hexdigest()
+
+    variables = agent.request_snapshot("env", project_id, env_hash, password)
+    if variables is not None:
+        if only is not None:
+            return {name: variables[name] for name in CryptoUtils.select_env_names(list(variables), only)}
+        return variables
+    if only is not None:
+        return decrypt()
+
+    prefix = _project_prefix(project_id)
+    cache_file = CACHE_DIR / f"{prefix}-{env_hash}.json"
+
+    variables = _read_entry(cache_file, env_hash, password)
+    if variables is not None:
+        agent.store_snapshot("env", project_id, env_hash, password, variables)
+        return variables
+
+    CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with file_lock(CACHE_DIR / f"{prefix}.lock"):
+        variables = _read_entry(cache_file, env_hash, password)
+        if variables is None:
+            variables = decrypt()
+            _write_entry(cache_file, prefix, env_hash, password, variables)
+
+    agent.store_snapshot("env", project_id, env_hash, password, variables)
+    return variables
+
+
+def clear_cached_env(project_id: str) -> None:
+    """
+    Remove every cache entry of the given project.
+
+    :param project_id: Identifier of the project whose entries are removed.
+    :type project_id: str
+    :return: None
+    """
+    if not project_id or not CACHE_DIR.exists():
+        return
+
+    for cache_file in CACHE_DIR.glob(f"{_project_prefix(project_id)}-*.json"):
+        cache_file.unlink(missing_ok=True)
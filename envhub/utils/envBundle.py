@@ -0,0 +1,103 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import datetime
+import hashlib
+import hmac
+import json
+import os
+from typing import Optional
+
+from envhub.utils.crypto import CryptoUtils
+
+BUNDLE_FORMAT = "envhub-bundle"
+BUNDLE_VERSION = 2
+
+
+def _canonical(bundle: dict) -> bytes:
+    content = {name: value for name, value in bundle.items() if name != "digest"}
+    return json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(bundle: dict) -> str:
+    return hashlib.sha256(_canonical(bundle)).hexdigest()
+
+
+def build_bundle(rows: list, version_id: Optional[str] = None) -> dict:
+    """
+    Builds a bundle from the encrypted rows returned for an API key. The values stay
+    encrypted and the password is not needed: the bundle only adds a SHA-256 digest of its
+    whole content, so a truncated or corrupted file is detected before anything is
+    decrypted. Each value is still authenticated by its own AES-GCM tag at decryption.
+
+    :param rows: The encrypted rows, each with the `env_name`, `env_value_encrypted`,
+        `salt`, `nonce` and `tag` keys.
+    :type rows: list
+    :param version_id: The id of the version the rows belong to, if known.
+    :type version_id: Optional[str]
+    :return: The bundle, ready to be written with `write_bundle`.
+    :rtype: dict
+    """
+    variables = [[row.get("env_name"), CryptoUtils.format_env_value(CryptoUtils.from_row(row))] for row in rows]
+
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "env_version_id": version_id,
+        "variables": variables
+    }
+    bundle["digest"] = _digest(bundle)
+    return bundle
+
+
+def write_bundle(path: str, bundle: dict) -> None:
+    """
+    Writes a bundle to a file as a single line of JSON.
+
+    :param path: Path of the bundle file.
+    :type path: str
+    :param bundle: The bundle returned by `build_bundle`.
+    :type bundle: dict
+    :return: None
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps(bundle, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_bundle(path: str) -> list:
+    """
+    Reads a bundle file and checks its digest.
+
+    :param path: Path of the bundle file.
+    :type path: str
+    :return: A list of `(name, encrypted_data)` pairs, ready for `CryptoUtils.decrypt_many`.
+    :rtype: list
+    :raises ValueError: If the file is not a bundle, or if its digest does not match, which
+        means that it was truncated or modified.
+    """
+    try:
+        with open(path, "r") as f:
+            bundle = json.load(f)
+    except OSError as e:
+        raise ValueError(f"Cannot read bundle {path}: {e.strerror}") from e
+    except ValueError as e:
+        raise ValueError(f"{path} is not an EnvHub bundle") from e
+
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not an EnvHub bundle")
+    if bundle.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {bundle.get('version')}; rebuild it with this envhub-cli")
+
+    try:
+        intact = hmac.compare_digest(_digest(bundle), bundle.get("digest") or "")
+        items = [(name, CryptoUtils.parse_env_value(name, value)) for name, value in bundle["variables"]]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{path} is not a valid EnvHub bundle") from e
+
+    if not intact:
+        raise ValueError(f"The digest of {path} does not match: the bundle was truncated or modified")
+    return items
@@ -0,0 +1,65 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import contextlib
+import os
+import pathlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextlib.contextmanager
+def file_lock(lock_path: pathlib.Path):
+    """
+    Hold an exclusive, inter-process lock on the given file for the duration of the block.
+
+    The lock file is created if needed and is left in place afterwards. Other processes
+    entering the block with the same path wait until the lock is released.
+
+    :param lock_path: Path of the lock file.
+    :type lock_path: pathlib.Path
+    :return: A context manager holding the lock.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    finally:
+        os.close(fd)
+
+
+def write_private_file(path: pathlib.Path, content: str) -> None:
+    """
+    Atomically replace the given file with the given content, readable only by the owner.
+
+    The content is written to a temporary file next to the target and moved into place,
+    so concurrent readers see either the old or the new content, never a partial write.
+
+    :param path: Path of the file to write.
+    :type path: pathlib.Path
+    :param content: The text to write.
+    :type content: str
+    :return: None
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,33 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from envhub.utils.crypto import CryptoUtils
+
+
+def get_decryption_password(config_data: dict) -> str:
+    """
+    Resolve the project password used to decrypt the `.env` file from the `.envhub` config.
+
+    Owners store the project password directly. Admins and users store their own access
+    password together with the project password encrypted under it, so the project
+    password is decrypted first.
+
+    :param config_data: The parsed content of the `.envhub` configuration file.
+    :type config_data: dict
+    :return: The project password.
+    :rtype: str
+    :raises ValueError: If the config has no password or an unknown role.
+    """
+    role = config_data.get("role")
+    password = config_data.get("password")
+
+    if not password:
+        raise ValueError("No password found in .envhub config")
+
+    if role == "owner":
+        return password
+    if role in ("user", "admin"):
+        return CryptoUtils.decrypt(config_data.get("encrypted_data"), password)
+
+    raise ValueError(f"Unknown role: {role}")
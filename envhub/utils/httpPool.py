@@ -0,0 +1,261 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import atexit
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+import typer
+from gotrue.http_clients import AsyncClient as AuthAsyncHttpClient, SyncClient as AuthSyncHttpClient
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+from supabase import AsyncClient, Client, ClientOptions
+from supabase._async.auth_client import AsyncSupabaseAuthClient
+from supabase._sync.auth_client import SyncSupabaseAuthClient
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_KEEPALIVE = 30.0
+
+
+class _ConnectionStats:
+    """
+    Counts the requests sent through the shared transports and the connections they opened,
+    so connection reuse can be checked with `ENVHUB_DEBUG_HTTP`.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self._streams = weakref.WeakSet()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def record(self, response) -> None:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is not None and stream not in self._streams:
+                self._streams.add(stream)
+                self._opened += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self._opened,
+                "connections_reused": max(0, self.requests - self._opened)
+            }
+
+
+_stats = _ConnectionStats()
+_transport: Optional[httpx.HTTPTransport] = None
+_async_transports = weakref.WeakKeyDictionary()
+# Number of open clients created by `create_pooled_async_client` on each event loop.
+_async_clients = weakref.WeakKeyDictionary()
+_transport_lock = threading.Lock()
+
+
+class _CountingTransport(httpx.HTTPTransport):
+    def handle_request(self, request):
+        response = super().handle_request(request)
+        _stats.record(response)
+        return response
+
+
+class _AsyncCountingTransport(httpx.AsyncHTTPTransport):
+    async def handle_async_request(self, request):
+        response = await super().handle_async_request(request)
+        _stats.record(response)
+        return response
+
+
+def _transport_options() -> dict:
+    pool_size = int(os.getenv("ENVHUB_HTTP_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+    return {
+        "http2": os.getenv("ENVHUB_HTTP2", "1") != "0",
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=float(os.getenv("ENVHUB_HTTP_KEEPALIVE", str(DEFAULT_KEEPALIVE)))
+        ),
+        "retries": 1
+    }
+
+
+def _timeout(default):
+    timeout = os.getenv("ENVHUB_HTTP_TIMEOUT")
+    return float(timeout) if timeout else default
+
+
+def get_transport() -> httpx.HTTPTransport:
+    """
+    Returns the transport shared by every synchronous HTTP client of the process, so the
+    auth and database requests reuse the same keep-alive connections.
+
+    The pool is configured with the `ENVHUB_HTTP_POOL_SIZE`, `ENVHUB_HTTP_KEEPALIVE` and
+    `ENVHUB_HTTP2` environment variables.
+
+    :return: The shared transport.
+    :rtype: httpx.HTTPTransport
+    """
+    global _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _transport = _CountingTransport(**_transport_options())
+        return _transport
+
+
+def get_async_transport() -> httpx.AsyncHTTPTransport:
+    """
+    Returns the transport shared by every asynchronous HTTP client running on the current
+    event loop. See `get_transport`.
+
+    :return: The shared transport of the running event loop.
+    :rtype: httpx.AsyncHTTPTransport
+    """
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        if loop not in _async_transports:
+            _async_transports[loop] = _AsyncCountingTransport(**_transport_options())
+        return _async_transports[loop]
+
+
+def connection_stats() -> dict:
+    """
+    Returns the number of requests sent through the shared transports, and how many of
+    them opened a new connection or reused one.
+
+    :return: A dictionary with the `requests`, `connections_opened` and `connections_reused` keys.
+    :rtype: dict
+    """
+    return _stats.snapshot()
+
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.Client(base_url=base_url, headers=headers, timeout=_timeout(timeout),
+                            follow_redirects=True, transport=get_transport())
+
+
+class _AsyncPooledPostgrestClient(AsyncPostgrestClient):
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return httpx.AsyncClient(base_url=base_url, headers=headers, timeout=_timeout(timeout),
+                                 follow_redirects=True, transport=get_async_transport())
+
+
+class _PooledClient(Client):
+    @staticmethod
+    def _init_supabase_auth_client(auth_url, client_options, verify=True, proxy=None):
+        return SyncSupabaseAuthClient(
+            url=auth_url,
+            auto_refresh_token=client_options.auto_refresh_token,
+            persist_session=client_options.persist_session,
+            storage=client_options.storage,
+            headers=client_options.headers,
+            flow_type=client_options.flow_type,
+            http_client=AuthSyncHttpClient(timeout=_timeout(10), follow_redirects=True, transport=get_transport())
+        )
+
+    @staticmethod
+    def _init_postgrest_client(rest_url, headers, schema, timeout=120, verify=True, proxy=None):
+        return _PooledPostgrestClient(rest_url, headers=headers, schema=schema, timeout=timeout)
+
+
+class _AsyncPooledClient(AsyncClient):
+    @staticmethod
+    def _init_supabase_auth_client(auth_url, client_options, verify=True, proxy=None):
+        return AsyncSupabaseAuthClient(
+            url=auth_url,
+            auto_refresh_token=client_options.auto_refresh_token,
+            persist_session=client_options.persist_session,
+            storage=client_options.storage,
+            headers=client_options.headers,
+            flow_type=client_options.flow_type,
+            http_client=AuthAsyncHttpClient(timeout=_timeout(10), follow_redirects=True,
+                                            transport=get_async_transport())
+        )
+
+    @staticmethod
+    def _init_postgrest_client(rest_url, headers, schema, timeout=120, verify=True, proxy=None):
+        return _AsyncPooledPostgrestClient(rest_url, headers=headers, schema=schema, timeout=timeout)
+
+
+def create_pooled_client(supabase_url: str, supabase_key: str, options: Optional[ClientOptions] = None) -> Client:
+    """
+    Same as `supabase.create_client`, except that the auth and database requests of the
+    client go through the shared transport returned by `get_transport`.
+
+    :param supabase_url: The URL of the Supabase instance.
+    :type supabase_url: str
+    :param supabase_key: The API key of the Supabase instance.
+    :type supabase_key: str
+    :param options: The options of the client.
+    :type options: Optional[ClientOptions]
+    :return: The Supabase client.
+    :rtype: Client
+    """
+    return _PooledClient.create(supabase_url, supabase_key, options)
+
+
+async def create_pooled_async_client(supabase_url: str, supabase_key: str, options=None) -> AsyncClient:
+    """
+    Same as `supabase.create_async_client`, except that the auth and database requests of
+    the client go through the shared transport returned by `get_async_transport`.
+
+    :param supabase_url: The URL of the Supabase instance.
+    :type supabase_url: str
+    :param supabase_key: The API key of the Supabase instance.
+    :type supabase_key: str
+    :param options: The options of the client.
+    :type options: Optional[AsyncClientOptions]
+    The client should be released with `close_pooled_async_client` once it is no longer used.
+
+    :return: The asynchronous Supabase client.
+    :rtype: AsyncClient
+    """
+    client = await _AsyncPooledClient.create(supabase_url, supabase_key, options)
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        _async_clients[loop] = _async_clients.get(loop, 0) + 1
+    return client
+
+
+async def close_pooled_async_client(client: AsyncClient) -> None:
+    """
+    Releases an asynchronous client created by `create_pooled_async_client` on the running
+    event loop. The client must not be used afterwards.
+
+    The sessions of the client are not closed one by one, since closing an httpx client
+    closes its transport, which every client of the loop shares: the transport, and the
+    keep-alive connections it holds, are closed with the last client of the loop instead.
+
+    :param client: The client to release.
+    :type client: AsyncClient
+    :return: None
+    """
+    loop = asyncio.get_running_loop()
+    with _transport_lock:
+        remaining = _async_clients.get(loop, 0) - 1
+        if remaining > 0:
+            _async_clients[loop] = remaining
+            return
+        _async_clients.pop(loop, None)
+        transport = _async_transports.pop(loop, None)
+
+    if transport is not None:
+        await transport.aclose()
+
+
+def _report_stats() -> None:
+    stats = connection_stats()
+    if stats["requests"]:
+        typer.secho(f"http: {stats['requests']} request(s), {stats['connections_opened']} connection(s) opened, "
+                    f"{stats['connections_reused']} reused", fg=typer.colors.BRIGHT_BLACK, err=True)
+
+
+if os.getenv("ENVHUB_DEBUG_HTTP"):
+    atexit.register(_report_stats)
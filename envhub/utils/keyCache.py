@@ -0,0 +1,104 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+class KeyCache:
+    """
+    A bounded, memory-only LRU cache of derived keys.
+
+    Entries are indexed by an HMAC of the password and salt under a random per-process
+    key, so the cache never holds the passwords themselves. Cached keys are kept in
+    mutable buffers and overwritten with zeros when they are evicted or cleared.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._index_key = os.urandom(32)
+
+    def _index(self, password: bytes, salt: bytes) -> bytes:
+        return hmac.new(self._index_key, len(salt).to_bytes(4, "big") + salt + password, hashlib.sha256).digest()
+
+    @staticmethod
+    def _zeroize(buffer: bytearray) -> None:
+        for i in range(len(buffer)):
+            buffer[i] = 0
+
+    def get_or_derive(self, password: bytes, salt: bytes, derive: Callable[[], bytes]) -> bytes:
+        """
+        Return the cached key for the given password and salt, deriving it on a miss.
+
+        :param password: The password the key is derived from.
+        :type password: bytes
+        :param salt: The salt the key is derived from.
+        :type salt: bytes
+        :param derive: Called without arguments to derive the key on a cache miss.
+        :type derive: Callable[[], bytes]
+        :return: The derived key.
+        :rtype: bytes
+        """
+        if self.maxsize <= 0:
+            return derive()
+
+        index = self._index(password, salt)
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is not None:
+                self._entries.move_to_end(index)
+                self.hits += 1
+                return bytes(entry)
+            self.misses += 1
+
+        key = derive()
+
+        with self._lock:
+            if index not in self._entries:
+                self._entries[index] = bytearray(key)
+            while len(self._entries) > self.maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._zeroize(evicted)
+                self.evictions += 1
+
+        return key
+
+    def clear(self) -> None:
+        """
+        Remove every cached key, overwriting each one with zeros.
+
+        :return: None
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                self._zeroize(entry)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the counters of the cache.
+
+        :return: A dictionary with the `hits`, `misses`, `evictions`, `size` and `maxsize` keys.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+key_cache = KeyCache(maxsize=int(os.getenv("ENVHUB_KEY_CACHE_SIZE", "128")))
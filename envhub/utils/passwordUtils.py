@@ -3,11 +3,14 @@
 # If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
 
 import base64
+import hmac
 import os
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from envhub.utils.crypto import CryptoUtils
+
 
 class PasswordUtils:
     @staticmethod
@@ -48,7 +51,8 @@ class PasswordUtils:
         This method decodes the stored hash, extracts the salt and the original hash
         bytes, and derives a new hash from the provided password using the extracted
         salt. It then compares the new hash with the stored one to determine if they
-        match.
+        match. The derivation goes through `CryptoUtils.derive_key`, which uses the same
+        PBKDF2 parameters, so repeated verifications share its derived-key cache.
 
         :param password: The password input that needs to be verified.
         :type password: str
@@ -63,15 +67,9 @@ class PasswordUtils:
             salt = combined[:16]
             stored_hash_bytes = combined[16:]
 
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt,
-                iterations=100000,
-            )
-            derived_hash = kdf.derive(password.encode('utf-8'))
+            derived_hash = CryptoUtils.derive_key(password, salt)
 
-            result = bytes(stored_hash_bytes) == bytes(derived_hash)
+            result = hmac.compare_digest(bytes(stored_hash_bytes), bytes(derived_hash))
 
             return result
         except Exception as e:
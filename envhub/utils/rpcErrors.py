@@ -0,0 +1,8 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+# Kept free of imports, so `envhub-exec` can share it without loading the Supabase client.
+
+# PostgREST error code returned when the called function does not exist on the server.
+FUNCTION_NOT_FOUND = "PGRST202"
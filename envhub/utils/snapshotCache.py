@@ -0,0 +1,264 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from typing import Callable, Optional
+
+from envhub.utils.fileLock import file_lock, write_private_file
+
+SNAPSHOT_DIR = pathlib.Path.home() / ".EnvHub" / "snapshots"
+DEFAULT_TTL = 300
+DEFAULT_MAX_STALE = 24 * 3600
+
+
+class ApiKeyRejectedError(RuntimeError):
+    """
+    Raised by the fetchers when the server rejects the API key. The snapshot of the key is
+    dropped instead of being served stale.
+    """
+
+
+def snapshot_cache_enabled() -> bool:
+    """
+    Tells whether `envhub decrypt-prod` and `envhub-exec` should go through the snapshot
+    cache, which is the case when `ENVHUB_SNAPSHOT_CACHE` or `ENVHUB_OFFLINE` is set.
+
+    :return: True if the snapshot cache is enabled.
+    :rtype: bool
+    """
+    return bool(os.getenv("ENVHUB_SNAPSHOT_CACHE") or offline_mode())
+
+
+def offline_mode() -> bool:
+    """
+    Tells whether the server must not be contacted at all (`ENVHUB_OFFLINE`), in which case
+    the snapshot is used whatever its age.
+
+    :return: True in hard-offline mode.
+    :rtype: bool
+    """
+    return os.getenv("ENVHUB_OFFLINE", "") not in ("", "0")
+
+
+def _snapshot_dir() -> pathlib.Path:
+    return pathlib.Path(os.getenv("ENVHUB_SNAPSHOT_DIR") or SNAPSHOT_DIR)
+
+
+def _snapshot_path(api_key: str) -> pathlib.Path:
+    return _snapshot_dir() / f"{hashlib.sha256(api_key.encode('utf-8')).hexdigest()}.json"
+
+
+def _ttl() -> float:
+    return float(os.getenv("ENVHUB_SNAPSHOT_TTL", str(DEFAULT_TTL)))
+
+
+def _max_stale() -> float:
+    return float(os.getenv("ENVHUB_SNAPSHOT_MAX_STALE", str(DEFAULT_MAX_STALE)))
+
+
+def read_snapshot(api_key: str) -> Optional[dict]:
+    """
+    Reads the snapshot of an API key.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: A dictionary with the `checked_at`, `version_id` and `rows` keys, or None if
+        there is no readable snapshot.
+    :rtype: Optional[dict]
+    """
+    try:
+        with open(_snapshot_path(api_key), "r") as f:
+            snapshot = json.load(f)
+        float(snapshot["checked_at"])
+        if not isinstance(snapshot["rows"], list):
+            return None
+        return snapshot
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_snapshot(api_key: str, version_id: Optional[str], rows: list) -> None:
+    """
+    Stores the rows returned for an API key, still encrypted, together with the version
+    they belong to. The file is only readable by the owner.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :param version_id: The id of the version the rows belong to, if known.
+    :type version_id: Optional[str]
+    :param rows: The encrypted rows.
+    :type rows: list
+    :return: None
+    """
+    write_private_file(_snapshot_path(api_key), json.dumps({
+        "checked_at": time.time(),
+        "version_id": version_id,
+        "rows": rows
+    }))
+
+
+def remove_snapshot(api_key: str) -> None:
+    """
+    Removes the snapshot of an API key, if any.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :return: None
+    """
+    try:
+        _snapshot_path(api_key).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def revalidate(api_key: str, fetch_rows: Callable[[], list],
+               fetch_version: Callable[[], Optional[str]]) -> list:
+    """
+    Brings the snapshot of an API key up to date. The version of the project is asked first,
+    and the rows are only downloaded again when it differs from the version of the snapshot,
+    or when the server cannot tell the version, as for an API key that is no longer valid:
+    the server then rejects the key when the rows are asked.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :param fetch_rows: Returns the encrypted rows of the API key from the server.
+    :type fetch_rows: Callable[[], list]
+    :param fetch_version: Returns the id of the latest version from the server, or None if
+        the server cannot tell it.
+    :type fetch_version: Callable[[], Optional[str]]
+    :return: The up to date rows.
+    :rtype: list
+    :raises ApiKeyRejectedError: If the server rejects the API key; the snapshot is removed.
+    :raises RuntimeError: If the server cannot be reached.
+    """
+    snapshot = read_snapshot(api_key)
+    try:
+        version_id = fetch_version()
+        if snapshot is not None and version_id is not None and snapshot.get("version_id") == version_id:
+            rows = snapshot["rows"]
+        else:
+            rows = fetch_rows()
+    except ApiKeyRejectedError:
+        remove_snapshot(api_key)
+        raise
+
+    try:
+        write_snapshot(api_key, version_id, rows)
+    except OSError:
+        pass
+    return rows
+
+
+def _revalidate_in_background() -> None:
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "envhub.utils.snapshotCache"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+    except OSError:
+        pass
+
+
+def load_api_rows(api_key: str, fetch_rows: Callable[[], list], fetch_version: Callable[[], Optional[str]],
+                  warn: Callable[[str], None] = None) -> list:
+    """
+    Returns the encrypted rows of an API key through the snapshot cache:
+
+    - a snapshot younger than `ENVHUB_SNAPSHOT_TTL` seconds (300 by default) is used as is;
+    - an older snapshot, up to `ENVHUB_SNAPSHOT_MAX_STALE` seconds (one day by default), is
+      used as is while a detached process revalidates it for the next run;
+    - otherwise the snapshot is revalidated before returning, and if the server cannot be
+      reached the stale snapshot is used anyway, with a warning;
+    - in hard-offline mode (`ENVHUB_OFFLINE`), the snapshot is used whatever its age and the
+      server is never contacted.
+
+    Concurrent revalidations of the same API key wait on a file lock, so only one of them
+    contacts the server.
+
+    :param api_key: The API key of the project.
+    :type api_key: str
+    :param fetch_rows: Returns the encrypted rows of the API key from the server.
+    :type fetch_rows: Callable[[], list]
+    :param fetch_version: Returns the id of the latest version from the server, or None if
+        the server cannot tell it.
+    :type fetch_version: Callable[[], Optional[str]]
+    :param warn: Called with a message when a stale snapshot is used because the server could
+        not be reached, defaults to writing it to stderr.
+    :type warn: Callable[[str], None]
+    :return: The encrypted rows.
+    :rtype: list
+    :raises ApiKeyRejectedError: If the server rejects the API key.
+    :raises RuntimeError: If there is no usable snapshot and the server cannot be reached.
+    """
+    snapshot = read_snapshot(api_key)
+    if offline_mode():
+        if snapshot is None:
+            raise RuntimeError("ENVHUB_OFFLINE is set but no snapshot is cached for this API key; "
+                               "run once online with ENVHUB_SNAPSHOT_CACHE=1")
+        return snapshot["rows"]
+
+    if snapshot is not None:
+        age = time.time() - float(snapshot["checked_at"])
+        if age < _ttl():
+            return snapshot["rows"]
+        if age < _max_stale():
+            _revalidate_in_background()
+            return snapshot["rows"]
+
+    path = _snapshot_path(api_key)
+    with file_lock(path.with_suffix(".lock")):
+        current = read_snapshot(api_key)
+        if current is not None and time.time() - float(current["checked_at"]) < _ttl():
+            return current["rows"]
+
+        try:
+            return revalidate(api_key, fetch_rows, fetch_version)
+        except ApiKeyRejectedError:
+            raise
+        except RuntimeError as e:
+            if current is None:
+                raise
+            (warn or (lambda message: sys.stderr.write(message + "\n")))(
+                f"Warning: using a cached snapshot from {time.ctime(float(current['checked_at']))}: {str(e)}"
+            )
+            return current["rows"]
+
+
+def main() -> None:
+    """
+    Revalidates the snapshot of `ENVHUB_API_KEY` when it is no longer fresh. Started in the
+    background by `load_api_rows` when it serves a stale snapshot.
+
+    :return: None
+    """
+    from envhub.fast_exec import fetch_env_vars_by_api_key, fetch_env_version_by_api_key
+
+    api_key = os.getenv("ENVHUB_API_KEY")
+    if not api_key:
+        sys.exit(1)
+
+    path = _snapshot_path(api_key)
+    with file_lock(path.with_suffix(".lock")):
+        snapshot = read_snapshot(api_key)
+        if snapshot is not None and time.time() - float(snapshot["checked_at"]) < _ttl():
+            return
+        try:
+            revalidate(api_key, lambda: fetch_env_vars_by_api_key(api_key),
+                       lambda: fetch_env_version_by_api_key(api_key))
+        except RuntimeError:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
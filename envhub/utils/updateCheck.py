@@ -0,0 +1,121 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+import os
+import pathlib
+import sys
+import time
+import urllib.request
+from typing import Optional
+
+from envhub.utils.fileLock import write_private_file
+
+UPDATE_CACHE_PATH = pathlib.Path.home() / ".EnvHub" / "update_check.json"
+PYPI_URL = "https://pypi.org/pypi/envhub-cli/json"
+DEFAULT_TTL = 24 * 3600
+_TIMEOUT = 3
+
+
+def update_check_enabled() -> bool:
+    """
+    Tells whether the update check should run: it is skipped when `ENVHUB_NO_UPDATE_CHECK`
+    is set or when stdout is not a terminal, such as in scripts and CI.
+
+    :return: True if the update check should run.
+    :rtype: bool
+    """
+    if os.getenv("ENVHUB_NO_UPDATE_CHECK"):
+        return False
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _ttl() -> int:
+    return int(os.getenv("ENVHUB_UPDATE_CHECK_TTL", str(DEFAULT_TTL)))
+
+
+def read_cached_latest_version() -> tuple:
+    """
+    Reads the result of the last update check from `UPDATE_CACHE_PATH`.
+
+    :return: A tuple of whether the cached result is still fresh and the latest version
+        found, which is None if the last check failed or never ran.
+    :rtype: tuple
+    """
+    try:
+        with open(UPDATE_CACHE_PATH, "r") as f:
+            cached = json.load(f)
+        fresh = time.time() - float(cached["checked_at"]) < _ttl()
+        return fresh, cached.get("latest_version")
+    except (OSError, ValueError, KeyError, TypeError):
+        return False, None
+
+
+def fetch_latest_version() -> Optional[str]:
+    """
+    Fetches the latest version of `envhub-cli` from PyPI and caches the result. A failed
+    check is cached too, so offline machines do not retry before the TTL expires.
+
+    :return: The latest version, or None if PyPI could not be reached.
+    :rtype: Optional[str]
+    """
+    latest_version = None
+    try:
+        with urllib.request.urlopen(PYPI_URL, timeout=_TIMEOUT) as response:
+            latest_version = json.load(response)["info"]["version"]
+    except Exception:
+        pass
+
+    try:
+        write_private_file(UPDATE_CACHE_PATH, json.dumps({
+            "checked_at": time.time(),
+            "latest_version": latest_version
+        }))
+    except OSError:
+        pass
+    return latest_version
+
+
+def get_latest_version() -> Optional[str]:
+    """
+    Returns the latest version of `envhub-cli`, from the cache while it is fresh and from
+    PyPI otherwise. The cache lifetime is set with `ENVHUB_UPDATE_CHECK_TTL` in seconds,
+    one day by default.
+
+    :return: The latest version, or None if it is unknown.
+    :rtype: Optional[str]
+    """
+    fresh, latest_version = read_cached_latest_version()
+    if fresh:
+        return latest_version
+    return fetch_latest_version()
+
+
+def update_message(current_version: str, latest_version: Optional[str]) -> Optional[str]:
+    """
+    Builds the message shown when a newer version is available.
+
+    :param current_version: The installed version.
+    :type current_version: str
+    :param latest_version: The latest published version.
+    :type latest_version: Optional[str]
+    :return: The message, or None if the installed version is up to date.
+    :rtype: Optional[str]
+    """
+    if not latest_version:
+        return None
+
+    from packaging import version
+
+    try:
+        if version.parse(latest_version) <= version.parse(current_version):
+            return None
+    except version.InvalidVersion:
+        return None
+
+    return (f"\n⚠️  A new version of EnvHub is available: {current_version} → {latest_version}"
+            f"\n   Upgrade with: pip install --upgrade envhub-cli\n   Or if using pipx: pipx upgrade envhub-cli\n\n")
@@ -0,0 +1,122 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+Startup benchmark for the EnvHub CLI, based on `python -X importtime`.
+
+Every scenario imports the modules a group of commands loads before doing any work, and
+fails when one of them pulls in a forbidden module (offline commands must never load the
+network stack) or when the median import time exceeds its budget.
+
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 10 --scale 2
+
+Exits with status 1 when a scenario fails, so it can run in CI.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+NETWORK_MODULES = {
+    "supabase", "postgrest", "gotrue", "realtime", "storage3", "supafunc",
+    "httpx", "httpcore", "h2", "requests", "urllib3", "pydantic", "packaging"
+}
+
+# name: (modules imported by the commands, forbidden top-level packages, budget in milliseconds)
+SCENARIOS = {
+    "cli": (
+        ["envhub.__main__"],
+        NETWORK_MODULES,
+        120
+    ),
+    "offline": (
+        ["envhub.__main__", "envhub.auth", "envhub.decrypt", "envhub.decrypt_and_store", "envhub.get", "envhub.reset",
+         "envhub.agent", "envhub.utils.decryptionCache", "envhub.decrypt_prod_by_api_key", "envhub.utils.envBundle"],
+        NETWORK_MODULES,
+        250
+    ),
+    "exec": (
+        ["envhub.fast_exec"],
+        NETWORK_MODULES | {"typer", "click", "rich"},
+        150
+    ),
+    "network": (
+        ["envhub.__main__", "envhub.pull", "envhub.clone", "envhub.add", "envhub.runtime", "envhub.utils.httpPool"],
+        set(),
+        1500
+    ),
+}
+
+
+def measure(modules: list) -> tuple:
+    """
+    Imports the given modules in a fresh interpreter with `-X importtime`.
+
+    :param modules: The modules to import.
+    :type modules: list
+    :return: The total import time of the modules in milliseconds, and the set of top-level
+        packages that were imported.
+    :rtype: tuple
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        text=True,
+        env=env,
+        check=True
+    )
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        packages.add(name.strip().split(".")[0])
+        if name.startswith(" ") and not name.startswith("  ") and name.strip().split(".")[0] == "envhub":
+            total_us += int(cumulative)
+
+    return total_us / 1000, packages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the import time of the EnvHub CLI.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs per scenario")
+    parser.add_argument("--scale", type=float, default=float(os.getenv("ENVHUB_STARTUP_BUDGET_SCALE", "1")),
+                        help="Multiplier applied to every budget, for slower machines")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="Scenarios to run")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.scenarios:
+        modules, forbidden, budget = SCENARIOS[name]
+        budget *= args.scale
+
+        timings = []
+        loaded = set()
+        for _ in range(args.runs):
+            elapsed, packages = measure(modules)
+            timings.append(elapsed)
+            loaded |= packages
+
+        median = statistics.median(timings)
+        leaked = sorted(loaded & forbidden)
+        ok = median <= budget and not leaked
+        failed = failed or not ok
+
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<8} median {median:7.1f} ms  budget {budget:7.1f} ms"
+              f"  min {min(timings):7.1f} ms")
+        if leaked:
+            print(f"     {name} imports forbidden modules: {', '.join(leaked)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
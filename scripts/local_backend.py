@@ -0,0 +1,517 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+"""
+A local, in-memory stand-in for the EnvHub Supabase backend, for trying the CLI offline.
+
+It implements the subset of the PostgREST and GoTrue HTTP APIs the CLI uses, plus Python
+versions of the RPC functions shipped in `supabase/migrations`. Nothing is persisted unless
+`--data` is given. Point the CLI at it with:
+
+    python scripts/local_backend.py --port 54321 --data /tmp/envhub-backend.json
+    export ENVHUB_SUPABASE_URL=http://127.0.0.1:54321
+
+Any email and password are accepted by `envhub login`; the user id is derived from the email.
+"""
+
+import argparse
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+_JWT_SECRET = os.urandom(32)
+_ACCESS_TOKEN_TTL = 3600
+_VARIABLE_COLUMNS = ("env_name", "env_value_encrypted", "salt", "nonce", "tag")
+
+
+class BackendError(Exception):
+    """An error reported to the client in the PostgREST error format."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def content_hash(variable: dict) -> str:
+    """The content hash of an encrypted variable, as computed by `env_blob_hash` in SQL."""
+    content = (f"{variable['env_name']}\n{variable['env_value_encrypted']}:{variable['salt']}:"
+               f"{variable['nonce']}:{variable['tag']}")
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def issue_access_token(user: dict, ttl: int = _ACCESS_TOKEN_TTL) -> str:
+    """Issues an HS256 JWT shaped like the ones GoTrue returns."""
+    now = int(time.time())
+    header = _b64url(json.dumps({"alg": "HS256", "typ": "JWT"}).encode("utf-8"))
+    payload = _b64url(json.dumps({
+        "sub": user["id"],
+        "email": user["email"],
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + ttl
+    }).encode("utf-8"))
+    signature = hmac.new(_JWT_SECRET, f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64url(signature)}"
+
+
+def _claims(token: str) -> dict:
+    try:
+        header, payload, signature = token.split(".")
+        expected = hmac.new(_JWT_SECRET, f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64url(expected), signature):
+            return {}
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return {}
+    return claims if claims.get("exp", 0) > time.time() else {}
+
+
+class Backend:
+    """The in-memory database, with the PostgREST query semantics the CLI relies on."""
+
+    def __init__(self, data_path: str = None, max_rows: int = 1000):
+        self.data_path = data_path
+        # Like the max-rows setting of PostgREST, the most rows returned by a table read.
+        self.max_rows = max_rows
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.users = {}
+        self.refresh_tokens = {}
+        self.rpcs = {
+            "create_env_version": self.rpc_create_env_version,
+            "get_environment_variables_by_api_key": self.rpc_get_environment_variables_by_api_key,
+            "get_clone_payload": self.rpc_get_clone_payload,
+            "get_environment_version_by_api_key": self.rpc_get_environment_version_by_api_key,
+            "prune_env_versions": self.rpc_prune_env_versions,
+        }
+        if data_path and os.path.exists(data_path):
+            with open(data_path, "r") as f:
+                data = json.load(f)
+            self.tables = data.get("tables", {})
+            self.users = data.get("users", {})
+            if "env_variables" in self.tables:
+                self.tables.setdefault("env_variable_rows", []).extend(self.tables.pop("env_variables"))
+
+    def save(self) -> None:
+        if not self.data_path:
+            return
+        with open(self.data_path, "w") as f:
+            json.dump({"tables": self.tables, "users": self.users}, f, indent=2)
+
+    # Auth
+
+    def user_for_email(self, email: str) -> dict:
+        user_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"envhub-local:{email}"))
+        return self.users.setdefault(user_id, {
+            "id": user_id,
+            "email": email,
+            "aud": "authenticated",
+            "role": "authenticated",
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": _now()
+        })
+
+    def session_for(self, user: dict) -> dict:
+        refresh_token = _b64url(os.urandom(24))
+        self.refresh_tokens[refresh_token] = user["id"]
+        return {
+            "access_token": issue_access_token(user),
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": _ACCESS_TOKEN_TTL,
+            "expires_at": int(time.time()) + _ACCESS_TOKEN_TTL,
+            "user": user
+        }
+
+    def refresh(self, refresh_token: str) -> dict:
+        user_id = self.refresh_tokens.pop(refresh_token, None)
+        if user_id is None:
+            raise BackendError(400, "refresh_token_not_found", "Invalid Refresh Token: Refresh Token Not Found")
+        return self.session_for(self.users[user_id])
+
+    def user_for_token(self, token: str) -> dict:
+        claims = _claims(token or "")
+        return self.users.get(claims.get("sub"))
+
+    # Tables
+
+    def table(self, name: str) -> list:
+        return self.tables.setdefault(name, [])
+
+    def env_variables(self) -> list:
+        """The rows of the env_variables view: the rows of old versions, then the manifest blobs."""
+        rows = list(self.table("env_variable_rows"))
+        blobs = {(str(b["project_id"]), b["content_hash"]): b for b in self.table("env_blobs")}
+        for version in self.table("env_versions"):
+            for content_hash in version.get("manifest") or []:
+                blob = blobs.get((str(version["project_id"]), content_hash))
+                if blob is not None:
+                    rows.append({"id": blob["id"], "project_id": version["project_id"], "version_id": version["id"],
+                                 **{column: blob[column] for column in _VARIABLE_COLUMNS}})
+        return rows
+
+    def _rows(self, name: str) -> list:
+        return self.env_variables() if name == "env_variables" else self.table(name)
+
+    @staticmethod
+    def _matches(row: dict, filters: list) -> bool:
+        for column, op, value in filters:
+            actual = row.get(column)
+            actual_text = None if actual is None else str(actual).lower() if isinstance(actual, bool) else str(actual)
+            if op == "eq" and actual_text != value:
+                return False
+            if op == "neq" and actual_text == value:
+                return False
+            if op == "in" and actual_text not in [v.strip('"') for v in value.strip("()").split(",")]:
+                return False
+            if op == "is" and not ((value == "null" and actual is None) or (value != "null" and actual_text == value)):
+                return False
+            if op in ("lt", "lte", "gt", "gte"):
+                if actual is None:
+                    return False
+                left, right = (actual, type(actual)(value)) if isinstance(actual, (int, float)) else (actual_text, value)
+                if not {"lt": left < right, "lte": left <= right, "gt": left > right, "gte": left >= right}[op]:
+                    return False
+        return True
+
+    def select(self, name: str, params: list) -> tuple:
+        filters, columns, order, limit, offset = [], None, [], None, 0
+        for key, value in params:
+            if key == "select":
+                columns = None if value.strip() == "*" else [c.strip() for c in value.split(",") if c.strip()]
+            elif key == "order":
+                for part in value.split(","):
+                    column, _, direction = part.partition(".")
+                    order.append((column, direction.startswith("desc")))
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            else:
+                op, _, operand = value.partition(".")
+                filters.append((key, op, operand))
+
+        rows = [row for row in self._rows(name) if self._matches(row, filters)]
+        for column, desc in reversed(order):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+
+        total = len(rows)
+        rows = rows[offset:offset + limit if limit is not None else None]
+        if columns:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        return rows, offset, total
+
+    def insert(self, name: str, body) -> list:
+        rows = body if isinstance(body, list) else [body]
+        name = "env_variable_rows" if name == "env_variables" else name
+        inserted = []
+        for row in rows:
+            row = dict(row)
+            row.setdefault("id", str(uuid.uuid4()))
+            row.setdefault("created_at", _now())
+            self.table(name).append(row)
+            inserted.append(row)
+        return inserted
+
+    def update(self, name: str, params: list, body: dict) -> list:
+        filters = [(key, *value.partition(".")[::2]) for key, value in params if key != "select"]
+        updated = [row for row in self.table(name) if self._matches(row, filters)]
+        for row in updated:
+            row.update(body)
+        return updated
+
+    def delete(self, name: str, params: list) -> list:
+        filters = [(key, *value.partition(".")[::2]) for key, value in params if key != "select"]
+        deleted = [row for row in self.table(name) if self._matches(row, filters)]
+        self.tables[name] = [row for row in self.table(name) if not self._matches(row, filters)]
+        return deleted
+
+    # RPC functions, mirroring supabase/migrations
+
+    def _latest_version(self, project_id: str) -> dict:
+        versions = [v for v in self.table("env_versions") if str(v.get("project_id")) == str(project_id)]
+        return max(versions, key=lambda v: v["version_number"]) if versions else None
+
+    def rpc_create_env_version(self, args: dict, user: dict):
+        project_id = args["p_project_id"]
+        latest = self._latest_version(project_id)
+        if (latest or {}).get("id") != args.get("p_base_version_id"):
+            raise BackendError(409, "40001", "envhub_version_conflict: the project was modified concurrently")
+
+        variables = args.get("p_variables") or []
+        manifest = sorted(set(args["p_manifest"] if args.get("p_manifest") is not None
+                              else [content_hash(variable) for variable in variables]))
+
+        # With a manifest, the variables the client did not send are resolved by hash, from the
+        # blobs of the project or from the rows of a base version stored before manifests.
+        if args.get("p_manifest") is not None:
+            variables = variables + [row for row in self.table("env_variable_rows")
+                                     if latest and row.get("version_id") == latest["id"]
+                                     and content_hash(row) in manifest]
+
+        stored = {b["content_hash"] for b in self.table("env_blobs") if str(b["project_id"]) == str(project_id)}
+        unknown = set(manifest) - stored - {content_hash(variable) for variable in variables}
+        if unknown:
+            raise BackendError(400, "22023",
+                               f"envhub_manifest_incomplete: {len(unknown)} variable(s) of the manifest are unknown")
+
+        version = self.insert("env_versions", {
+            "project_id": project_id,
+            "version_number": (latest["version_number"] if latest else 0) + 1,
+            "variable_count": len(manifest),
+            "salt": args.get("p_salt"),
+            "nonce": args.get("p_nonce"),
+            "tag": args.get("p_tag"),
+            "manifest": manifest
+        })[0]
+
+        for variable in variables:
+            variable_hash = content_hash(variable)
+            if variable_hash not in stored:
+                stored.add(variable_hash)
+                self.insert("env_blobs", {
+                    "project_id": project_id,
+                    "content_hash": variable_hash,
+                    **{column: variable.get(column) for column in _VARIABLE_COLUMNS}
+                })
+        return version
+
+    def _api_key(self, args: dict) -> dict:
+        key_hash = hashlib.sha256(args.get("api_key_param", "").encode("utf-8")).hexdigest()
+        return next((k for k in self.table("api_keys")
+                     if k.get("key_hash") == key_hash or k.get("key") == args.get("api_key_param")), None)
+
+    def rpc_get_environment_variables_by_api_key(self, args: dict, user: dict):
+        api_key = self._api_key(args)
+        if api_key is None:
+            return [{"success": False, "message": "Invalid API key"}]
+
+        latest = self._latest_version(api_key["project_id"])
+        rows = [row for row in self.env_variables() if latest and row.get("version_id") == latest["id"]]
+        return [{
+            "success": True,
+            "data": [{column: row.get(column) for column in _VARIABLE_COLUMNS} for row in rows]
+        }]
+
+    def rpc_get_environment_version_by_api_key(self, args: dict, user: dict):
+        # Like the SQL function, the key goes through the checks of get_environment_variables_by_api_key.
+        if not self.rpcs["get_environment_variables_by_api_key"](args, user)[0].get("success"):
+            return []
+
+        api_key = self._api_key(args)
+        latest = self._latest_version(api_key["project_id"]) if api_key else None
+        if latest is None:
+            return []
+        return [{"version_id": latest["id"], "version_number": latest["version_number"]}]
+
+    def rpc_prune_env_versions(self, args: dict, user: dict):
+        keep, older_than = args.get("p_keep"), args.get("p_older_than_seconds")
+        if keep is None and older_than is None:
+            raise BackendError(400, "22023", "prune_env_versions: p_keep or p_older_than_seconds is required")
+
+        versions = [v for v in self.table("env_versions") if str(v.get("project_id")) == str(args["p_project_id"])]
+        versions.sort(key=lambda v: v["version_number"], reverse=True)
+        cutoff = None if older_than is None else (
+            datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=older_than))
+        candidates = [v["id"] for v in reversed(versions[max(keep or 1, 1):])
+                      if cutoff is None or datetime.datetime.fromisoformat(v["created_at"]) < cutoff]
+
+        dry_run = args.get("p_dry_run", True)
+        batch = set(candidates if dry_run else candidates[:max(args.get("p_batch_size") or 100, 1)])
+        referenced = {h for v in versions if v["id"] in batch for h in v.get("manifest") or []}
+        kept = {h for v in versions if v["id"] not in batch for h in v.get("manifest") or []}
+        orphans = [b for b in self.table("env_blobs") if str(b["project_id"]) == str(args["p_project_id"])
+                   and b["content_hash"] in referenced - kept]
+        variables = [row for row in self.table("env_variable_rows") if row.get("version_id") in batch] + orphans
+        size = sum(len(json.dumps(row)) for row in variables + [v for v in versions if v["id"] in batch])
+
+        if not dry_run:
+            orphan_ids = {b["id"] for b in orphans}
+            self.tables["env_variable_rows"] = [row for row in self.table("env_variable_rows")
+                                                if row.get("version_id") not in batch]
+            self.tables["env_versions"] = [v for v in self.table("env_versions") if v["id"] not in batch]
+            self.tables["env_blobs"] = [b for b in self.table("env_blobs") if b["id"] not in orphan_ids]
+
+        return {
+            "dry_run": dry_run,
+            "versions": len(batch),
+            "variables": len(variables),
+            "bytes": size,
+            "remaining": len(candidates) - len(batch)
+        }
+
+    def rpc_get_clone_payload(self, args: dict, user: dict):
+        project = next((p for p in self.table("projects") if p.get("name") == args.get("p_project_name")), None)
+        if project is None:
+            return {"project": None}
+
+        user_id = (user or {}).get("id")
+        member = next((m for m in self.table("project_members")
+                       if str(m.get("project_id")) == str(project["id"]) and m.get("user_id") == user_id), None)
+        latest = self._latest_version(project["id"])
+        rows, _, _ = self.select("env_variables", [
+            ("select", "id,env_name,env_value_encrypted,salt,nonce,tag"),
+            ("project_id", f"eq.{project['id']}"),
+            ("version_id", f"eq.{latest['id'] if latest else ''}"),
+            ("order", "env_name,id"),
+            ("limit", str(args.get("p_page_size") or 1000))
+        ])
+        return {
+            "project": {"id": project["id"], "user_id": project.get("user_id")},
+            "role": member.get("role") if member else None,
+            "password": project.get("password_hash") if project.get("user_id") == user_id else None,
+            "member": {column: member.get(column) for column in
+                       ("encrypted_project_password", "access_password_hash")} if member else None,
+            "version": {"id": latest["id"], "version_number": latest["version_number"]} if latest else None,
+            "variables": rows if latest else []
+        }
+
+
+def make_handler(backend: Backend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            if os.getenv("ENVHUB_BACKEND_VERBOSE"):
+                super().log_message(format, *args)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length)) if length else {}
+
+        def _send(self, status: int, payload=None, headers: dict = None):
+            data = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _user(self):
+            authorization = self.headers.get("Authorization", "")
+            return backend.user_for_token(authorization[7:] if authorization.startswith("Bearer ") else "")
+
+        def _dispatch(self, method: str):
+            url = urlsplit(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            body = self._body() if method in ("POST", "PATCH") else None
+            prefer = self.headers.get("Prefer", "")
+
+            try:
+                with backend.lock:
+                    if url.path.startswith("/auth/v1/"):
+                        return self._auth(method, url.path[len("/auth/v1/"):], dict(params), body)
+                    if url.path.startswith("/rest/v1/rpc/") and method == "POST":
+                        name = url.path[len("/rest/v1/rpc/"):]
+                        if name not in backend.rpcs:
+                            raise BackendError(404, "PGRST202",
+                                               f"Could not find the function public.{name} in the schema cache")
+                        result = backend.rpcs[name](body or {}, self._user())
+                        backend.save()
+                        return self._send(200, result)
+                    if url.path.startswith("/rest/v1/"):
+                        return self._rest(method, url.path[len("/rest/v1/"):], params, body, prefer)
+                    raise BackendError(404, "PGRST000", f"Unknown path {url.path}")
+            except BackendError as e:
+                self._send(e.status, {"code": e.code, "message": e.message, "details": None, "hint": None})
+
+        def _auth(self, method: str, path: str, params: dict, body):
+            if path == "token" and params.get("grant_type") == "password":
+                return self._send(200, backend.session_for(backend.user_for_email(body["email"])))
+            if path == "token" and params.get("grant_type") == "refresh_token":
+                return self._send(200, backend.refresh(body.get("refresh_token")))
+            if path == "user":
+                user = self._user()
+                if user is None:
+                    raise BackendError(401, "bad_jwt", "invalid JWT")
+                return self._send(200, user)
+            if path == "logout":
+                return self._send(204)
+            raise BackendError(404, "not_found", f"Unknown auth endpoint {path}")
+
+        def _rest(self, method: str, table: str, params: list, body, prefer: str):
+            if method == "GET" or method == "HEAD":
+                rows, offset, total = backend.select(table, params)
+                rows = rows[:backend.max_rows] if backend.max_rows else rows
+                end = offset + len(rows) - 1
+                content_range = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+                return self._send(200, rows, {"Content-Range": content_range})
+            if method == "POST":
+                rows = backend.insert(table, body)
+            elif method == "PATCH":
+                rows = backend.update(table, params, body)
+            elif method == "DELETE":
+                rows = backend.delete(table, params)
+            else:
+                raise BackendError(405, "PGRST000", f"Unsupported method {method}")
+            backend.save()
+            return self._send(201 if method == "POST" else 200,
+                              rows if "return=minimal" not in prefer else None)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
+
+
+def serve_in_thread(port: int = 0, data_path: str = None) -> tuple:
+    """
+    Starts the stand-in on a background thread.
+
+    :return: The server, whose `server_address` holds the bound port, and the backend.
+    """
+    backend = Backend(data_path)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(backend))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the EnvHub Supabase backend")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--data", help="JSON file to load the tables from and save them to")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Most rows returned by a table read, 0 for no limit")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(Backend(args.data, args.max_rows)))
+    print(f"EnvHub stand-in backend listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Creates a new environment version and its variables in a single transaction.
+--
+-- The version number is allocated while holding a per-project advisory lock, so concurrent
+-- callers can no longer race on it. When p_base_version_id is given and is no longer the
+-- latest version of the project, the call fails with SQLSTATE 40001 so the client can rebuild
+-- its changes on top of the new latest version and try again.
+--
+-- The function runs with the privileges of the caller, so the row level security policies of
+-- env_versions and env_variables still apply.
+create or replace function public.create_env_version(
+    p_project_id uuid,
+    p_base_version_id uuid,
+    p_salt text,
+    p_nonce text,
+    p_tag text,
+    p_variables jsonb
+)
+returns jsonb
+language plpgsql
+security invoker
+as $$
+declare
+    v_latest record;
+    v_version public.env_versions;
+begin
+    perform pg_advisory_xact_lock(hashtextextended('envhub:env_versions:' || p_project_id::text, 0));
+
+    select id, version_number
+      into v_latest
+      from public.env_versions
+     where project_id = p_project_id
+     order by version_number desc
+     limit 1;
+
+    if p_base_version_id is distinct from v_latest.id then
+        raise exception 'envhub_version_conflict: the project was modified concurrently'
+            using errcode = '40001';
+    end if;
+
+    insert into public.env_versions (project_id, version_number, variable_count, salt, nonce, tag)
+    values (
+        p_project_id,
+        coalesce(v_latest.version_number, 0) + 1,
+        jsonb_array_length(p_variables),
+        p_salt,
+        p_nonce,
+        p_tag
+    )
+    returning * into v_version;
+
+    insert into public.env_variables (project_id, version_id, env_name, env_value_encrypted, salt, nonce, tag)
+    select p_project_id, v_version.id, v.env_name, v.env_value_encrypted, v.salt, v.nonce, v.tag
+      from jsonb_to_recordset(p_variables)
+        as v(env_name text, env_value_encrypted text, salt text, nonce text, tag text);
+
+    return to_jsonb(v_version);
+end;
+$$;
+
+grant execute on function public.create_env_version(uuid, uuid, text, text, text, jsonb) to authenticated;
@@ -0,0 +1,88 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Returns everything `envhub clone` needs for a project in a single round trip:
+--
+--   project   the id and owner of the project, or null if no visible project has that name
+--   role      the role of the caller in the project
+--   password  the password hash of the project when the caller owns it
+--   member    the encrypted project password and access password hash of the caller
+--   version   the id and number of the latest version, or null if there is none
+--   variables the first p_page_size variables of that version, ordered by name and id
+--
+-- Projects with more than p_page_size variables are read page by page as before, starting at
+-- row p_page_size.
+--
+-- The function runs with the privileges of the caller, so the row level security policies of
+-- every table still apply.
+create or replace function public.get_clone_payload(
+    p_project_name text,
+    p_page_size integer default 1000
+)
+returns jsonb
+language plpgsql
+stable
+security invoker
+as $$
+declare
+    v_project record;
+    v_member record;
+    v_version record;
+begin
+    select id, user_id
+      into v_project
+      from public.projects
+     where name = p_project_name
+     limit 1;
+
+    if v_project.id is null then
+        return jsonb_build_object('project', null);
+    end if;
+
+    select role, encrypted_project_password, access_password_hash
+      into v_member
+      from public.project_members
+     where project_id = v_project.id
+       and user_id = auth.uid();
+
+    select id, version_number
+      into v_version
+      from public.env_versions
+     where project_id = v_project.id
+     order by version_number desc
+     limit 1;
+
+    return jsonb_build_object(
+        'project', jsonb_build_object('id', v_project.id, 'user_id', v_project.user_id),
+        'role', v_member.role,
+        'password', (
+            select p.password_hash
+              from public.projects p
+             where p.id = v_project.id
+               and p.user_id = auth.uid()
+        ),
+        'member', case when v_member.role is null then null else jsonb_build_object(
+            'encrypted_project_password', v_member.encrypted_project_password,
+            'access_password_hash', v_member.access_password_hash
+        ) end,
+        'version', case when v_version.id is null then null else jsonb_build_object(
+            'id', v_version.id,
+            'version_number', v_version.version_number
+        ) end,
+        'variables', coalesce((
+            select jsonb_agg(to_jsonb(page) order by page.env_name, page.id)
+              from (
+                  select id, env_name, env_value_encrypted, salt, nonce, tag
+                    from public.env_variables
+                   where project_id = v_project.id
+                     and version_id = v_version.id
+                   order by env_name, id
+                   limit p_page_size
+              ) page
+        ), '[]'::jsonb)
+    );
+end;
+$$;
+
+grant execute on function public.get_clone_payload(text, integer) to authenticated;
@@ -0,0 +1,74 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Returns the latest version of the project an API key belongs to, without its variables.
+--
+-- `envhub decrypt-prod` calls it to revalidate a cached snapshot of the encrypted variables:
+-- the variables are only downloaded again with get_environment_variables_by_api_key when the
+-- version changed.
+--
+-- A cached snapshot must never outlive its API key, so the key is first checked by
+-- get_environment_variables_by_api_key itself: a key that function rejects (unknown, expired,
+-- revoked...) is rejected here as well, by the very same checks. No row is returned for a
+-- rejected key, which the client treats as a cache miss: it then calls
+-- get_environment_variables_by_api_key, which reports why the key was rejected.
+create extension if not exists pgcrypto with schema extensions;
+
+drop function if exists public.get_environment_version_by_api_key(text);
+
+create function public.get_environment_version_by_api_key(api_key_param text)
+returns setof jsonb
+language plpgsql
+stable
+security definer
+set search_path = public
+as $$
+declare
+    v_check jsonb;
+    v_project_id uuid;
+    v_version record;
+begin
+    select to_jsonb(result)
+      into v_check
+      from public.get_environment_variables_by_api_key(api_key_param) as result
+     limit 1;
+
+    if jsonb_typeof(v_check) = 'array' then
+        v_check := v_check -> 0;
+    end if;
+
+    if not coalesce((v_check ->> 'success')::boolean, false) then
+        return;
+    end if;
+
+    select project_id
+      into v_project_id
+      from public.api_keys
+     where key_hash = encode(extensions.digest(api_key_param, 'sha256'), 'hex')
+     limit 1;
+
+    if v_project_id is null then
+        return;
+    end if;
+
+    select id, version_number
+      into v_version
+      from public.env_versions
+     where project_id = v_project_id
+     order by version_number desc
+     limit 1;
+
+    if not found then
+        return;
+    end if;
+
+    return next jsonb_build_object(
+        'version_id', v_version.id,
+        'version_number', v_version.version_number
+    );
+end;
+$$;
+
+revoke execute on function public.get_environment_version_by_api_key(text) from public;
+grant execute on function public.get_environment_version_by_api_key(text) to anon, authenticated;
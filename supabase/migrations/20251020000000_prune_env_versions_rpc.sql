@@ -0,0 +1,90 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Every version stores a full copy of the variables, so env_variables grows with the number of
+-- versions. prune_env_versions deletes old versions and their variables server-side.
+--
+-- A version is pruned when it is not among the p_keep most recent versions (when p_keep is
+-- given) and was created more than p_older_than_seconds ago (when that is given). The latest
+-- version is never pruned.
+--
+-- A call deletes at most p_batch_size versions, so each transaction stays short and the
+-- client calls the function again until `remaining` is 0. With p_dry_run, nothing is deleted
+-- and the counts cover every version that would be pruned.
+--
+-- The function runs with the privileges of the caller, so the row level security policies of
+-- env_versions and env_variables decide who may prune.
+
+-- Lookups of the latest version and deletions by version no longer scan the whole tables.
+create index if not exists env_versions_project_id_version_number_idx
+    on public.env_versions (project_id, version_number desc);
+create index if not exists env_variables_version_id_idx
+    on public.env_variables (version_id);
+
+create or replace function public.prune_env_versions(
+    p_project_id uuid,
+    p_keep integer default null,
+    p_older_than_seconds bigint default null,
+    p_dry_run boolean default true,
+    p_batch_size integer default 100
+)
+returns jsonb
+language plpgsql
+security invoker
+as $$
+declare
+    v_candidates uuid[];
+    v_batch uuid[];
+    v_versions bigint;
+    v_variables bigint;
+    v_bytes bigint;
+begin
+    if p_keep is null and p_older_than_seconds is null then
+        raise exception 'prune_env_versions: p_keep or p_older_than_seconds is required'
+            using errcode = '22023';
+    end if;
+
+    perform pg_advisory_xact_lock(hashtextextended('envhub:env_versions:' || p_project_id::text, 0));
+
+    select coalesce(array_agg(id order by version_number), '{}')
+      into v_candidates
+      from (
+        select id, version_number, created_at,
+               row_number() over (order by version_number desc) as recency
+          from public.env_versions
+         where project_id = p_project_id
+      ) versions
+     where recency > greatest(coalesce(p_keep, 1), 1)
+       and (p_older_than_seconds is null
+            or created_at < now() - make_interval(secs => p_older_than_seconds));
+
+    v_batch := case when p_dry_run then v_candidates
+                    else v_candidates[1:greatest(p_batch_size, 1)] end;
+
+    select count(*), coalesce(sum(pg_column_size(v.*)), 0)
+      into v_variables, v_bytes
+      from public.env_variables v
+     where v.version_id = any(v_batch);
+
+    select count(*), v_bytes + coalesce(sum(pg_column_size(ev.*)), 0)
+      into v_versions, v_bytes
+      from public.env_versions ev
+     where ev.id = any(v_batch);
+
+    if not p_dry_run then
+        delete from public.env_variables where version_id = any(v_batch);
+        delete from public.env_versions where id = any(v_batch);
+    end if;
+
+    return jsonb_build_object(
+        'dry_run', p_dry_run,
+        'versions', v_versions,
+        'variables', v_variables,
+        'bytes', v_bytes,
+        'remaining', cardinality(v_candidates) - cardinality(v_batch)
+    );
+end;
+$$;
+
+grant execute on function public.prune_env_versions(uuid, integer, bigint, boolean, integer) to authenticated;
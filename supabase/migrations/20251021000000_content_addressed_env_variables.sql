@@ -0,0 +1,293 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Content-addressed storage of environment variables.
+--
+-- Until now every version inserted a full copy of its variables into env_variables. Versions
+-- now carry a manifest, the content hashes of their variables, and each encrypted variable is
+-- stored once per project in env_blobs. Since unchanged variables keep their ciphertext from
+-- one version to the next, a new version only inserts blobs for new or changed values, and
+-- the client only sends those along with the manifest.
+--
+-- Readers are unchanged: env_variables becomes a view returning the same columns for both
+-- kinds of versions. The previous table is renamed to env_variable_rows and keeps the rows of
+-- existing versions; inserts into the view still land there, for clients that do not call
+-- create_env_version.
+create extension if not exists pgcrypto with schema extensions;
+
+alter table public.env_variables rename to env_variable_rows;
+alter index if exists public.env_variables_version_id_idx rename to env_variable_rows_version_id_idx;
+
+alter table public.env_versions add column if not exists manifest text[];
+
+create table if not exists public.env_blobs (
+    id uuid primary key default gen_random_uuid(),
+    project_id uuid not null,
+    content_hash text not null,
+    env_name text not null,
+    env_value_encrypted text not null,
+    salt text not null,
+    nonce text not null,
+    tag text not null,
+    created_at timestamptz not null default now(),
+    unique (project_id, content_hash)
+);
+
+-- A blob is visible to whoever can see a version of its project, so the policies of
+-- env_versions decide who reads and adds blobs. Blobs are shared by versions, so only the
+-- owner and admins of the project, who may prune versions, can delete them.
+alter table public.env_blobs enable row level security;
+
+create policy env_blobs_select on public.env_blobs for select
+    using (exists (select 1 from public.env_versions ev where ev.project_id = env_blobs.project_id));
+create policy env_blobs_insert on public.env_blobs for insert
+    with check (exists (select 1 from public.env_versions ev where ev.project_id = env_blobs.project_id));
+create policy env_blobs_delete on public.env_blobs for delete
+    using (
+        exists (select 1 from public.projects p where p.id = env_blobs.project_id and p.user_id = auth.uid())
+        or exists (select 1 from public.project_members m
+                    where m.project_id = env_blobs.project_id
+                      and m.user_id = auth.uid()
+                      and m.role in ('owner', 'admin'))
+    );
+
+grant select, insert, delete on public.env_blobs to authenticated;
+
+-- The content hash covers the name and every part of the encrypted value.
+create or replace function public.env_blob_hash(
+    p_env_name text,
+    p_env_value_encrypted text,
+    p_salt text,
+    p_nonce text,
+    p_tag text
+)
+returns text
+language sql
+immutable
+as $$
+    select encode(extensions.digest(
+        p_env_name || E'\n' || p_env_value_encrypted || ':' || p_salt || ':' || p_nonce || ':' || p_tag,
+        'sha256'
+    ), 'hex');
+$$;
+
+create or replace view public.env_variables with (security_invoker = true) as
+select r.id, r.project_id, r.version_id, r.env_name, r.env_value_encrypted, r.salt, r.nonce, r.tag
+  from public.env_variable_rows r
+union all
+select b.id, ev.project_id, ev.id as version_id, b.env_name, b.env_value_encrypted, b.salt, b.nonce, b.tag
+  from public.env_versions ev
+ cross join lateral unnest(ev.manifest) as m(content_hash)
+  join public.env_blobs b
+    on b.project_id = ev.project_id
+   and b.content_hash = m.content_hash
+ where ev.manifest is not null;
+
+create or replace function public.env_variables_insert()
+returns trigger
+language plpgsql
+security invoker
+as $$
+begin
+    insert into public.env_variable_rows (project_id, version_id, env_name, env_value_encrypted, salt, nonce, tag)
+    values (new.project_id, new.version_id, new.env_name, new.env_value_encrypted, new.salt, new.nonce, new.tag)
+    returning id into new.id;
+    return new;
+end;
+$$;
+
+create trigger env_variables_insert
+    instead of insert on public.env_variables
+    for each row execute function public.env_variables_insert();
+
+grant select, insert on public.env_variables to authenticated;
+
+-- Same contract as in 20251017000000_create_env_version_rpc.sql, plus an optional manifest.
+--
+-- Without p_manifest, p_variables holds every variable of the version, as before. With it,
+-- p_manifest holds the content hashes of every variable and p_variables only the new or
+-- changed ones, so the request grows with the change rather than with the project. The other
+-- hashes are resolved against the blobs of the project, or against the rows of the base
+-- version when it was stored before manifests existed.
+--
+-- Either way, only the blobs the project does not hold yet are inserted.
+drop function if exists public.create_env_version(uuid, uuid, text, text, text, jsonb);
+
+create or replace function public.create_env_version(
+    p_project_id uuid,
+    p_base_version_id uuid,
+    p_salt text,
+    p_nonce text,
+    p_tag text,
+    p_variables jsonb,
+    p_manifest text[] default null
+)
+returns jsonb
+language plpgsql
+security invoker
+as $$
+declare
+    v_latest record;
+    v_version public.env_versions;
+    v_manifest text[];
+    v_resolved integer;
+begin
+    perform pg_advisory_xact_lock(hashtextextended('envhub:env_versions:' || p_project_id::text, 0));
+
+    select id, version_number
+      into v_latest
+      from public.env_versions
+     where project_id = p_project_id
+     order by version_number desc
+     limit 1;
+
+    if p_base_version_id is distinct from v_latest.id then
+        raise exception 'envhub_version_conflict: the project was modified concurrently'
+            using errcode = '40001';
+    end if;
+
+    if p_manifest is null then
+        select coalesce(array_agg(distinct public.env_blob_hash(v.env_name, v.env_value_encrypted, v.salt,
+                                                                 v.nonce, v.tag)), '{}')
+          into v_manifest
+          from jsonb_to_recordset(p_variables)
+            as v(env_name text, env_value_encrypted text, salt text, nonce text, tag text);
+    else
+        select coalesce(array_agg(distinct m.content_hash), '{}')
+          into v_manifest
+          from unnest(p_manifest) as m(content_hash);
+    end if;
+
+    -- The version goes first: the policies of env_blobs require a version of the project.
+    insert into public.env_versions (project_id, version_number, variable_count, salt, nonce, tag, manifest)
+    values (
+        p_project_id,
+        coalesce(v_latest.version_number, 0) + 1,
+        cardinality(v_manifest),
+        p_salt,
+        p_nonce,
+        p_tag,
+        v_manifest
+    )
+    returning * into v_version;
+
+    insert into public.env_blobs (project_id, content_hash, env_name, env_value_encrypted, salt, nonce, tag)
+    select p_project_id, public.env_blob_hash(v.env_name, v.env_value_encrypted, v.salt, v.nonce, v.tag),
+           v.env_name, v.env_value_encrypted, v.salt, v.nonce, v.tag
+      from jsonb_to_recordset(p_variables)
+        as v(env_name text, env_value_encrypted text, salt text, nonce text, tag text)
+        on conflict (project_id, content_hash) do nothing;
+
+    if p_manifest is not null then
+        insert into public.env_blobs (project_id, content_hash, env_name, env_value_encrypted, salt, nonce, tag)
+        select p_project_id, public.env_blob_hash(r.env_name, r.env_value_encrypted, r.salt, r.nonce, r.tag),
+               r.env_name, r.env_value_encrypted, r.salt, r.nonce, r.tag
+          from public.env_variable_rows r
+         where r.version_id = p_base_version_id
+           and public.env_blob_hash(r.env_name, r.env_value_encrypted, r.salt, r.nonce, r.tag) = any(v_manifest)
+            on conflict (project_id, content_hash) do nothing;
+
+        select count(*)
+          into v_resolved
+          from public.env_blobs b
+         where b.project_id = p_project_id
+           and b.content_hash = any(v_manifest);
+
+        if v_resolved <> cardinality(v_manifest) then
+            raise exception 'envhub_manifest_incomplete: % variable(s) of the manifest are unknown',
+                cardinality(v_manifest) - v_resolved
+                using errcode = '22023';
+        end if;
+    end if;
+
+    return to_jsonb(v_version);
+end;
+$$;
+
+grant execute on function public.create_env_version(uuid, uuid, text, text, text, jsonb, text[]) to authenticated;
+
+-- Same contract as in 20251020000000_prune_env_versions_rpc.sql. `variables` and `bytes` now
+-- count the rows of pruned versions stored the old way, and the blobs no other version of
+-- the project references, which are deleted with the versions.
+create or replace function public.prune_env_versions(
+    p_project_id uuid,
+    p_keep integer default null,
+    p_older_than_seconds bigint default null,
+    p_dry_run boolean default true,
+    p_batch_size integer default 100
+)
+returns jsonb
+language plpgsql
+security invoker
+as $$
+declare
+    v_candidates uuid[];
+    v_batch uuid[];
+    v_orphans uuid[];
+    v_versions bigint;
+    v_variables bigint;
+    v_blobs bigint;
+    v_bytes bigint;
+    v_blob_bytes bigint;
+begin
+    if p_keep is null and p_older_than_seconds is null then
+        raise exception 'prune_env_versions: p_keep or p_older_than_seconds is required'
+            using errcode = '22023';
+    end if;
+
+    perform pg_advisory_xact_lock(hashtextextended('envhub:env_versions:' || p_project_id::text, 0));
+
+    select coalesce(array_agg(id order by version_number), '{}')
+      into v_candidates
+      from (
+        select id, version_number, created_at,
+               row_number() over (order by version_number desc) as recency
+          from public.env_versions
+         where project_id = p_project_id
+      ) versions
+     where recency > greatest(coalesce(p_keep, 1), 1)
+       and (p_older_than_seconds is null
+            or created_at < now() - make_interval(secs => p_older_than_seconds));
+
+    v_batch := case when p_dry_run then v_candidates
+                    else v_candidates[1:greatest(p_batch_size, 1)] end;
+
+    select count(*), coalesce(sum(pg_column_size(r.*)), 0)
+      into v_variables, v_bytes
+      from public.env_variable_rows r
+     where r.version_id = any(v_batch);
+
+    select count(*), v_bytes + coalesce(sum(pg_column_size(ev.*)), 0)
+      into v_versions, v_bytes
+      from public.env_versions ev
+     where ev.id = any(v_batch);
+
+    select coalesce(array_agg(b.id), '{}'), count(*), coalesce(sum(pg_column_size(b.*)), 0)
+      into v_orphans, v_blobs, v_blob_bytes
+      from public.env_blobs b
+     where b.project_id = p_project_id
+       and b.content_hash in (select unnest(ev.manifest) from public.env_versions ev where ev.id = any(v_batch))
+       and b.content_hash not in (
+           select unnest(ev.manifest)
+             from public.env_versions ev
+            where ev.project_id = p_project_id
+              and ev.manifest is not null
+              and not (ev.id = any(v_batch))
+       );
+
+    if not p_dry_run then
+        delete from public.env_variable_rows where version_id = any(v_batch);
+        delete from public.env_versions where id = any(v_batch);
+        delete from public.env_blobs where id = any(v_orphans);
+    end if;
+
+    return jsonb_build_object(
+        'dry_run', p_dry_run,
+        'versions', v_versions,
+        'variables', v_variables + v_blobs,
+        'bytes', v_bytes + v_blob_bytes,
+        'remaining', cardinality(v_candidates) - cardinality(v_batch)
+    );
+end;
+$$;
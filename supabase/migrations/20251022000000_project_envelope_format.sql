@@ -0,0 +1,15 @@
+-- Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+-- This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+-- If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+-- Records the envelope format new values of a project are written in.
+--
+-- Releases of the CLI older than the v2 envelope format (`v2:ciphertext:salt:nonce:tag`)
+-- split values into four parts and fail on v2 rows. Projects therefore keep writing the
+-- four-part v1 format, and the CLI only writes v2 values once the project opted in, after
+-- every member upgraded:
+--
+--     update public.projects set envelope_format = 2 where id = '<project id>';
+alter table public.projects
+    add column if not exists envelope_format smallint not null default 1
+        constraint projects_envelope_format_check check (envelope_format in (1, 2));
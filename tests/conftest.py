@@ -0,0 +1,67 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import pathlib
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "scripts"))
+
+from local_backend import serve_in_thread  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """
+    The local stand-in backend of `scripts/local_backend.py`, shared by the whole session.
+
+    `envhub.constants` and `envhub.auth` read the backend URL and the home directory when they
+    are imported, so they must not be imported at the top of test modules.
+    """
+    server, backend = serve_in_thread()
+    os.environ["ENVHUB_SUPABASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["HOME"] = str(tmp_path_factory.mktemp("home"))
+    os.environ["ENVHUB_NO_AGENT"] = "1"
+    yield backend
+    server.shutdown()
+
+
+@pytest.fixture(scope="session")
+def client(backend):
+    """A Supabase client logged in to the stand-in backend."""
+    from envhub import auth
+
+    auth.login("tests@envhub.local", "password")
+    return auth.get_authenticated_client()
+
+
+@pytest.fixture
+def project_id():
+    """A fresh project id, so tests sharing the backend do not see each other's versions."""
+    return str(uuid.uuid4())
+
+
+@pytest.fixture
+def rpc_calls(backend):
+    """
+    Records the arguments of every call to the RPC functions of the stand-in, by name, and
+    restores the functions after the test.
+    """
+    original = dict(backend.rpcs)
+    calls = {}
+
+    def recording(name, function):
+        def call(args, user):
+            calls.setdefault(name, []).append(args)
+            return function(args, user)
+        return call
+
+    for name, function in original.items():
+        backend.rpcs[name] = recording(name, function)
+    yield calls
+    backend.rpcs.clear()
+    backend.rpcs.update(original)
@@ -0,0 +1,17 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import pytest
+from typer.testing import CliRunner
+
+from envhub.__main__ import app
+
+
+@pytest.mark.parametrize("option", ["--ttl", "--idle"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_agent_start_rejects_durations_below_one_second(option, value):
+    result = CliRunner().invoke(app, ["agent", "start", option, value])
+
+    assert result.exit_code == 2
+    assert option in result.output
@@ -0,0 +1,104 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+
+from envhub.services.createEnvVersion import create_env_version_from_changes
+from envhub.services.get_env_vars_by_api_key_rpc import fetch_env_vars_by_api_key, fetch_env_version_by_api_key
+from envhub.utils import snapshotCache
+from envhub.utils.apiKeyEnv import load_env_by_api_key
+from envhub.utils.crypto import CryptoUtils
+from envhub.utils.snapshotCache import ApiKeyRejectedError
+
+PASSWORD = "project-password"
+
+
+@pytest.fixture
+def api_key(backend, client, project_id, monkeypatch, tmp_path):
+    """An API key of a project with one version, whose snapshots are stored in a temporary folder."""
+    api_key = str(uuid.uuid4())
+    backend.insert("api_keys", {"project_id": project_id,
+                                "key_hash": hashlib.sha256(api_key.encode("utf-8")).hexdigest()})
+    asyncio.run(create_env_version_from_changes(project_id, {"A": "1"}, [], PASSWORD, client))
+    monkeypatch.setenv("ENVHUB_SNAPSHOT_DIR", str(tmp_path))
+    return api_key
+
+
+@pytest.fixture
+def revoke(backend, monkeypatch):
+    """Makes get_environment_variables_by_api_key reject every key, as it would a revoked one."""
+    def revoke():
+        monkeypatch.setitem(backend.rpcs, "get_environment_variables_by_api_key",
+                            lambda args, user: [{"success": False, "message": "API key has been revoked"}])
+    return revoke
+
+
+@pytest.fixture
+def fast_exec(backend):
+    # `envhub.fast_exec` reads the backend URL when it is imported.
+    from envhub import fast_exec
+
+    return fast_exec
+
+
+def _latest_version_id(backend, project_id):
+    return max((version for version in backend.table("env_versions") if version["project_id"] == project_id),
+               key=lambda version: version["version_number"])["id"]
+
+
+def test_version_is_returned_for_a_valid_key(backend, client, project_id, api_key, fast_exec):
+    assert fetch_env_version_by_api_key(client, api_key) == _latest_version_id(backend, project_id)
+    assert fast_exec.fetch_env_version_by_api_key(api_key) == _latest_version_id(backend, project_id)
+
+
+def test_no_version_is_returned_for_a_key_the_variables_function_rejects(client, api_key, revoke, fast_exec):
+    revoke()
+
+    assert fetch_env_version_by_api_key(client, api_key) is None
+    assert fast_exec.fetch_env_version_by_api_key(api_key) is None
+    with pytest.raises(ApiKeyRejectedError):
+        fast_exec.fetch_env_vars_by_api_key(api_key)
+
+
+def test_snapshot_of_a_revoked_key_is_dropped(client, api_key, revoke):
+    def fetch_rows():
+        return fetch_env_vars_by_api_key(client, api_key)
+
+    def fetch_version():
+        return fetch_env_version_by_api_key(client, api_key)
+
+    rows = snapshotCache.revalidate(api_key, fetch_rows, fetch_version)
+    assert snapshotCache.read_snapshot(api_key)["rows"] == rows
+
+    revoke()
+    with pytest.raises(ApiKeyRejectedError, match="revoked"):
+        snapshotCache.revalidate(api_key, fetch_rows, fetch_version)
+    assert snapshotCache.read_snapshot(api_key) is None
+
+
+def test_env_is_loaded_through_the_given_fetchers(monkeypatch, tmp_path):
+    encrypted = CryptoUtils.encrypt("1", PASSWORD)
+    rows = [{"env_name": "A", "env_value_encrypted": encrypted["ciphertext"], "salt": encrypted["salt"],
+             "nonce": encrypted["nonce"], "tag": encrypted["tag"]}]
+    fetched = []
+
+    def fetch_rows():
+        fetched.append("rows")
+        return rows
+
+    def fetch_version():
+        fetched.append("version")
+        return "version-1"
+
+    monkeypatch.setenv("ENVHUB_NO_AGENT", "1")
+    monkeypatch.setenv("ENVHUB_SNAPSHOT_CACHE", "1")
+    monkeypatch.setenv("ENVHUB_SNAPSHOT_DIR", str(tmp_path))
+
+    assert load_env_by_api_key("key", PASSWORD, fetch_rows, fetch_version) == {"A": "1"}
+    assert load_env_by_api_key("key", PASSWORD, fetch_rows, fetch_version) == {"A": "1"}
+    assert fetched == ["version", "rows"]
@@ -0,0 +1,122 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+
+import pytest
+from local_backend import BackendError
+
+from envhub.services.createEnvVersion import create_env_version_from_changes
+from envhub.services.createEnvVersionRpc import content_hash
+from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.services.pruneEnvVersionsRpc import prune_env_versions_rpc
+from envhub.utils.crypto import CryptoUtils
+
+PASSWORD = "project-password"
+
+
+def _publish(client, project_id, changes, removed=None):
+    return asyncio.run(create_env_version_from_changes(project_id, changes, removed or [], PASSWORD, client))
+
+
+def _decrypted(client, project_id):
+    rows = get_current_env_variables(client, project_id)
+    return CryptoUtils.decrypt_many([(row["env_name"], CryptoUtils.from_row(row)) for row in rows], PASSWORD)
+
+
+def _blobs(backend, project_id):
+    return [blob for blob in backend.table("env_blobs") if blob["project_id"] == project_id]
+
+
+def _versions(backend, project_id):
+    versions = [version for version in backend.table("env_versions") if version["project_id"] == project_id]
+    return sorted(versions, key=lambda version: version["version_number"])
+
+
+def test_unchanged_values_share_one_blob(backend, client, project_id, rpc_calls):
+    _publish(client, project_id, {"A": "1", "B": "2"})
+    _publish(client, project_id, {"A": "3"})
+
+    first, second = _versions(backend, project_id)
+    assert len(_blobs(backend, project_id)) == 3
+    assert len(set(first["manifest"]) & set(second["manifest"])) == 1
+    assert _decrypted(client, project_id) == {"A": "3", "B": "2"}
+
+
+def test_only_changed_variables_are_sent(backend, client, project_id, rpc_calls):
+    _publish(client, project_id, {name: str(index) for index, name in enumerate("ABCDE")})
+    _publish(client, project_id, {"C": "changed"}, removed=["E"])
+
+    args = rpc_calls["create_env_version"][-1]
+    assert [variable["env_name"] for variable in args["p_variables"]] == ["C"]
+    assert len(args["p_manifest"]) == 4
+    assert _decrypted(client, project_id) == {"A": "0", "B": "1", "C": "changed", "D": "3"}
+
+
+def test_legacy_base_version_is_resolved_by_hash(backend, client, project_id, rpc_calls):
+    encrypted = CryptoUtils.encrypt("legacy", PASSWORD)
+    version = backend.insert("env_versions", {"project_id": project_id, "version_number": 1, "variable_count": 1})[0]
+    backend.insert("env_variables", {
+        "project_id": project_id,
+        "version_id": version["id"],
+        "env_name": "OLD",
+        "env_value_encrypted": encrypted["ciphertext"],
+        "salt": encrypted["salt"],
+        "nonce": encrypted["nonce"],
+        "tag": encrypted["tag"]
+    })
+
+    _publish(client, project_id, {"NEW": "value"})
+
+    args = rpc_calls["create_env_version"][-1]
+    assert [variable["env_name"] for variable in args["p_variables"]] == ["NEW"]
+    assert sorted(blob["env_name"] for blob in _blobs(backend, project_id)) == ["NEW", "OLD"]
+    assert _decrypted(client, project_id) == {"NEW": "value", "OLD": "legacy"}
+
+
+def test_incomplete_manifest_is_rejected(backend, client, project_id):
+    _publish(client, project_id, {"A": "1"})
+    latest = _versions(backend, project_id)[-1]
+
+    with pytest.raises(BackendError) as raised:
+        backend.rpc_create_env_version({
+            "p_project_id": project_id,
+            "p_base_version_id": latest["id"],
+            "p_variables": [],
+            "p_manifest": [content_hash({"env_name": "X", "env_value_encrypted": "x", "salt": "s", "nonce": "n",
+                                         "tag": "t"})]
+        }, None)
+
+    assert raised.value.code == "22023"
+    assert _versions(backend, project_id)[-1]["id"] == latest["id"]
+
+
+def test_servers_without_manifests_are_sent_every_variable(backend, client, project_id, rpc_calls, monkeypatch):
+    create_env_version = backend.rpcs["create_env_version"]
+
+    def without_manifest(args, user):
+        if "p_manifest" in args:
+            raise BackendError(404, "PGRST202", "Could not find the function public.create_env_version")
+        return create_env_version(args, user)
+
+    monkeypatch.setitem(backend.rpcs, "create_env_version", without_manifest)
+    _publish(client, project_id, {"A": "1", "B": "2"})
+    _publish(client, project_id, {"A": "3"})
+
+    assert len(rpc_calls["create_env_version"][-1]["p_variables"]) == 2
+    assert _decrypted(client, project_id) == {"A": "3", "B": "2"}
+
+
+def test_prune_removes_only_orphaned_blobs(backend, client, project_id):
+    _publish(client, project_id, {"A": "1", "B": "2"})
+    _publish(client, project_id, {"A": "3"})
+    _publish(client, project_id, {"A": "4"})
+
+    result = prune_env_versions_rpc(client, project_id, 1, None, False)
+
+    latest = _versions(backend, project_id)[-1]
+    assert result["versions"] == 2
+    assert result["variables"] == 2
+    assert sorted(blob["content_hash"] for blob in _blobs(backend, project_id)) == sorted(latest["manifest"])
+    assert _decrypted(client, project_id) == {"A": "4", "B": "2"}
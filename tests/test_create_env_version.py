@@ -0,0 +1,97 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+
+import pytest
+from local_backend import BackendError
+
+from envhub.services.createEnvVersion import _MAX_ATTEMPTS, create_env_version_from_changes
+from envhub.services.getCurrentEnvVariables import get_current_env_variables
+from envhub.utils.crypto import CryptoUtils
+
+PASSWORD = "project-password"
+
+
+def _publish(client, project_id, changes):
+    return asyncio.run(create_env_version_from_changes(project_id, changes, [], PASSWORD, client))
+
+
+def _decrypted(client, project_id):
+    rows = get_current_env_variables(client, project_id)
+    return CryptoUtils.decrypt_many([(row["env_name"], CryptoUtils.from_row(row)) for row in rows], PASSWORD)
+
+
+def _version_numbers(backend, project_id):
+    return sorted(version["version_number"] for version in backend.table("env_versions")
+                  if version["project_id"] == project_id)
+
+
+def test_versions_are_created_through_the_rpc_function(backend, client, project_id, rpc_calls):
+    _publish(client, project_id, {"A": "1"})
+    version = _publish(client, project_id, {"B": "2"})
+
+    assert version["version_number"] == 2
+    assert len(rpc_calls["create_env_version"]) == 2
+    assert _version_numbers(backend, project_id) == [1, 2]
+    assert _decrypted(client, project_id) == {"A": "1", "B": "2"}
+
+
+def test_conflict_rebuilds_the_changes_on_the_new_latest_version(backend, client, project_id, monkeypatch):
+    _publish(client, project_id, {"A": "1"})
+    create_env_version = backend.rpcs["create_env_version"]
+    concurrent = CryptoUtils.encrypt("concurrent", PASSWORD)
+    attempts = []
+
+    def racing(args, user):
+        attempts.append(args)
+        # Another client publishes first, so the base version of this call is outdated.
+        if len(attempts) == 1:
+            latest = max((version for version in backend.table("env_versions")
+                          if version["project_id"] == project_id), key=lambda version: version["version_number"])
+            create_env_version({
+                "p_project_id": project_id,
+                "p_base_version_id": latest["id"],
+                "p_variables": [row for row in backend.env_variables() if row["version_id"] == latest["id"]] + [{
+                    "env_name": "OTHER",
+                    "env_value_encrypted": concurrent["ciphertext"],
+                    "salt": concurrent["salt"],
+                    "nonce": concurrent["nonce"],
+                    "tag": concurrent["tag"]
+                }]
+            }, user)
+        return create_env_version(args, user)
+
+    monkeypatch.setitem(backend.rpcs, "create_env_version", racing)
+    version = _publish(client, project_id, {"B": "2"})
+
+    assert len(attempts) == 2
+    assert version["version_number"] == 3
+    assert _decrypted(client, project_id) == {"A": "1", "OTHER": "concurrent", "B": "2"}
+
+
+def test_repeated_conflicts_give_up_after_max_attempts(backend, client, project_id, monkeypatch):
+    attempts = []
+
+    def conflicting(args, user):
+        attempts.append(args)
+        raise BackendError(409, "40001", "envhub_version_conflict: the project was modified concurrently")
+
+    monkeypatch.setitem(backend.rpcs, "create_env_version", conflicting)
+    with pytest.raises(SystemExit) as exited:
+        _publish(client, project_id, {"A": "1"})
+
+    assert exited.value.code == 1
+    assert len(attempts) == _MAX_ATTEMPTS
+    assert _version_numbers(backend, project_id) == []
+
+
+def test_missing_rpc_function_falls_back_to_separate_inserts(backend, client, project_id, monkeypatch):
+    monkeypatch.delitem(backend.rpcs, "create_env_version")
+    _publish(client, project_id, {"A": "1", "B": "2"})
+    version = _publish(client, project_id, {"A": "3"})
+
+    assert version["version_number"] == 2
+    assert len([row for row in backend.table("env_variable_rows") if row["project_id"] == project_id]) == 4
+    assert _decrypted(client, project_id) == {"A": "3", "B": "2"}
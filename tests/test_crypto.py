@@ -0,0 +1,109 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import os
+import threading
+
+import pytest
+
+from envhub.utils.crypto import CryptoUtils
+
+PASSWORD = "project-password"
+VALUES = ["value", "", "with:colons", "line one\nline two", "ünïcödé"]
+
+
+def _round_trip(encrypted: list) -> dict:
+    items = [(f"VAR_{index}", CryptoUtils.parse_env_value(f"VAR_{index}", CryptoUtils.format_env_value(data)))
+             for index, data in enumerate(encrypted)]
+    return CryptoUtils.decrypt_many(items, PASSWORD)
+
+
+@pytest.mark.parametrize("v2", [False, True])
+def test_env_values_round_trip(v2):
+    encrypted = CryptoUtils.encrypt_many(VALUES, PASSWORD, v2=v2)
+
+    assert _round_trip(encrypted) == {f"VAR_{index}": value for index, value in enumerate(VALUES)}
+
+
+def test_single_values_round_trip():
+    encrypted = [CryptoUtils.encrypt(value, PASSWORD) for value in VALUES]
+
+    assert _round_trip(encrypted) == {f"VAR_{index}": value for index, value in enumerate(VALUES)}
+
+
+def test_v1_is_the_default_format():
+    encrypted = CryptoUtils.encrypt_many(["value", ""], PASSWORD)
+
+    assert not any(CryptoUtils.is_v2(data) for data in encrypted)
+    assert [len(CryptoUtils.format_env_value(data).split(":")) for data in encrypted] == [4, 4]
+    assert len({data["salt"] for data in encrypted}) == 1
+
+
+def test_v2_values_carry_the_prefix():
+    encrypted = CryptoUtils.encrypt_many(["value", ""], PASSWORD, v2=True)
+
+    assert all(CryptoUtils.is_v2(data) for data in encrypted)
+    assert all(CryptoUtils.format_env_value(data).startswith("v2:") for data in encrypted)
+    assert len({data["salt"] for data in encrypted}) == 1
+
+
+def test_v2_key_differs_from_the_v1_key():
+    salt = os.urandom(16)
+
+    assert CryptoUtils.derive_envelope_key(PASSWORD, salt) != CryptoUtils.derive_key(PASSWORD, salt)
+
+
+@pytest.mark.parametrize("value", ["plain", "a:b:c", "v3:a:b:c:d", "a:b:c:d:e", "v2:a:b:c"])
+def test_invalid_env_values_are_rejected(value):
+    with pytest.raises(ValueError, match="SECRET"):
+        CryptoUtils.parse_env_value("SECRET", value)
+
+
+def test_upgrade_moves_values_to_one_v2_envelope():
+    items = [(f"VAR_{index}", CryptoUtils.encrypt(value, PASSWORD)) for index, value in enumerate(VALUES)]
+
+    upgraded = CryptoUtils.upgrade(items, PASSWORD)
+
+    assert all(CryptoUtils.is_v2(data) for data in upgraded)
+    assert len({data["salt"] for data in upgraded}) == 1
+    assert CryptoUtils.decrypt_many([(name, data) for (name, _), data in zip(items, upgraded)], PASSWORD) == \
+        {f"VAR_{index}": value for index, value in enumerate(VALUES)}
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_wrong_password_names_a_variable(workers):
+    items = [(f"VAR_{index}", CryptoUtils.encrypt(value, PASSWORD)) for index, value in enumerate(VALUES)]
+
+    with pytest.raises(ValueError, match=r"environment variable 'VAR_\d'"):
+        CryptoUtils.decrypt_many(items, "wrong-password", workers)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_tampered_value_is_named(workers):
+    items = [(f"VAR_{index}", CryptoUtils.encrypt(value, PASSWORD)) for index, value in enumerate(VALUES)]
+    items[2][1]["tag"] = items[1][1]["tag"]
+
+    with pytest.raises(ValueError, match="'VAR_2'"):
+        CryptoUtils.decrypt_many(items, PASSWORD, workers)
+
+
+def test_first_failure_cancels_the_pending_derivations(monkeypatch):
+    items = [(f"VAR_{index}", CryptoUtils.encrypt(str(index), PASSWORD)) for index in range(8)]
+    key_for = CryptoUtils._key_for
+    started = []
+    release = threading.Event()
+
+    def failing_key_for(encrypted_data, password, keys=None):
+        started.append(encrypted_data["salt"])
+        if encrypted_data["salt"] == items[0][1]["salt"]:
+            raise ValueError("derivation failed")
+        release.wait(1)
+        return key_for(encrypted_data, password, keys)
+
+    monkeypatch.setattr(CryptoUtils, "_key_for", staticmethod(failing_key_for))
+    with pytest.raises(ValueError, match="'VAR_0'.*derivation failed"):
+        CryptoUtils.decrypt_many(items, PASSWORD, workers=2)
+    release.set()
+
+    assert len(started) < len(items)
@@ -0,0 +1,77 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import pytest
+
+from envhub.utils import decryptionCache
+from envhub.utils.decryptionCache import clear_cached_env, load_cached_env
+
+PROJECT_ID = "project"
+PASSWORD = "project-password"
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(decryptionCache, "CACHE_DIR", cache_dir)
+    monkeypatch.setenv("ENVHUB_NO_AGENT", "1")
+    monkeypatch.delenv("ENVHUB_NO_CACHE", raising=False)
+    return cache_dir
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("A=encrypted-a\n")
+    return env_file
+
+
+def _load(env_file, password=PASSWORD, variables=None):
+    decrypted = []
+
+    def decrypt():
+        decrypted.append(True)
+        return variables or {"A": env_file.read_text()}
+
+    return load_cached_env(env_file, PROJECT_ID, password, decrypt), bool(decrypted)
+
+
+def test_unchanged_file_is_read_from_the_cache(cache_dir, env_file):
+    assert _load(env_file) == ({"A": "A=encrypted-a\n"}, True)
+    assert _load(env_file) == ({"A": "A=encrypted-a\n"}, False)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+
+def test_changed_file_invalidates_the_cache(cache_dir, env_file):
+    _load(env_file)
+    env_file.write_text("A=encrypted-b\n")
+
+    assert _load(env_file) == ({"A": "A=encrypted-b\n"}, True)
+    assert _load(env_file) == ({"A": "A=encrypted-b\n"}, False)
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+
+def test_changed_password_invalidates_the_cache(cache_dir, env_file):
+    _load(env_file)
+
+    assert _load(env_file, "new-password", {"A": "new"}) == ({"A": "new"}, True)
+    assert _load(env_file, PASSWORD, {"A": "old"}) == ({"A": "old"}, True)
+
+
+def test_entries_are_encrypted(cache_dir, env_file):
+    _load(env_file, variables={"A": "plaintext-secret"})
+
+    assert "plaintext-secret" not in next(cache_dir.glob("*.json")).read_text()
+
+
+def test_cache_can_be_bypassed_and_cleared(cache_dir, env_file, monkeypatch):
+    _load(env_file)
+
+    monkeypatch.setenv("ENVHUB_NO_CACHE", "1")
+    assert _load(env_file)[1]
+    monkeypatch.delenv("ENVHUB_NO_CACHE")
+
+    clear_cached_env(PROJECT_ID)
+    assert list(cache_dir.glob("*.json")) == []
+    assert _load(env_file)[1]
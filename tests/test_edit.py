@@ -0,0 +1,42 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import pytest
+
+VALUES = {
+    "REFERENCE": "pa${HOME}ss",
+    "DOLLAR": "$HOME and $ alone",
+    "HASH": "before # after",
+    "DOUBLE": 'say "hi"',
+    "SINGLE": "it's",
+    "BACKSLASH": "C:\\path\\n",
+    "NEWLINES": "line one\nline two\n",
+    "EMPTY": ""
+}
+
+
+@pytest.fixture
+def edit(backend):
+    # `envhub.edit` imports `envhub.auth`, which must only be imported once the backend is set up.
+    from envhub import edit
+
+    return edit
+
+
+@pytest.mark.parametrize("name", VALUES)
+def test_edited_file_round_trips_values(edit, tmp_path, name):
+    path = tmp_path / "edit.env"
+    path.write_text(f"{name}={edit._quote(VALUES[name])}\n")
+
+    entries = edit.read_entries_from_file(str(path))
+
+    assert entries == {name: VALUES[name]}
+    assert edit._diff({name: VALUES[name]}, entries, remove_missing=True) == ({}, [])
+
+
+def test_imported_file_keeps_references_unexpanded(edit, tmp_path):
+    path = tmp_path / "import.env"
+    path.write_text("PLAIN=pa${HOME}ss\nQUOTED=\"${HOME}\"\n")
+
+    assert edit.read_entries_from_file(str(path)) == {"PLAIN": "pa${HOME}ss", "QUOTED": "${HOME}"}
@@ -0,0 +1,59 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+
+import pytest
+
+from envhub.services.createEnvVersion import create_env_version_from_changes
+from envhub.services.getCurrentEnvVariables import _page_size, aiter_env_variable_pages, \
+    get_env_variable_page_async, iter_env_variable_pages
+
+PASSWORD = "project-password"
+NAMES = [f"VAR_{index:02}" for index in range(12)]
+
+
+@pytest.fixture
+def version(backend, client, project_id, monkeypatch):
+    """A version of 12 variables, read from a server that returns at most 3 rows per request."""
+    version = asyncio.run(create_env_version_from_changes(project_id, {name: name for name in NAMES}, [],
+                                                          PASSWORD, client))
+    monkeypatch.setattr(backend, "max_rows", 3)
+    return version
+
+
+def _async_pages(project_id, version_id, prefetch):
+    from envhub import auth
+
+    async def read():
+        client = await auth.get_authenticated_async_client()
+        first_page = asyncio.create_task(
+            get_env_variable_page_async(client, project_id, version_id, 0, 5)) if prefetch else None
+        pages = aiter_env_variable_pages(client, project_id, version_id, page_size=5, first_page=first_page)
+        return [page async for page in pages]
+
+    return asyncio.run(read())
+
+
+def test_pages_capped_by_the_server_are_read_until_the_total(client, project_id, version):
+    pages = list(iter_env_variable_pages(client, project_id, page_size=5))
+
+    assert [len(page) for page in pages] == [3, 3, 3, 3]
+    assert [row["env_name"] for page in pages for row in page] == NAMES
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_async_pages_capped_by_the_server_are_read_until_the_total(project_id, version, prefetch):
+    pages = _async_pages(project_id, version["id"], prefetch)
+
+    assert [len(page) for page in pages] == [3, 3, 3, 3]
+    assert [row["env_name"] for page in pages for row in page] == NAMES
+
+
+def test_page_size_is_at_least_one(monkeypatch):
+    monkeypatch.setenv("ENVHUB_PAGE_SIZE", "-5")
+
+    assert _page_size(None) == 1
+    assert _page_size(-1) == 1
+    assert _page_size(7) == 7
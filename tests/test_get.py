@@ -0,0 +1,54 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import json
+
+import pytest
+
+from envhub.get import get_env_var
+from envhub.utils.crypto import CryptoUtils
+
+PASSWORD = "project-password"
+ACCESS_PASSWORD = "access-password"
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A folder with an encrypted `.env` file, in which the tests run."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ENVHUB_NO_AGENT", "1")
+    monkeypatch.delenv("ENVHUB_PASSWORD", raising=False)
+    encrypted = CryptoUtils.encrypt_many(["1", "2"], PASSWORD)
+    (tmp_path / ".env").write_text("".join(f"{name}={CryptoUtils.format_env_value(data)}\n"
+                                           for name, data in zip(["A", "B"], encrypted)))
+    return tmp_path
+
+
+def _configure(project, config: dict) -> None:
+    (project / ".envhub").write_text(json.dumps({"project_id": "project", **config}))
+
+
+@pytest.mark.parametrize("config", [
+    {"role": "owner", "password": PASSWORD},
+    {"role": "admin", "password": ACCESS_PASSWORD, "encrypted_data": CryptoUtils.encrypt(PASSWORD, ACCESS_PASSWORD)}
+])
+def test_value_is_printed_for_every_role(project, capsys, config):
+    _configure(project, config)
+
+    get_env_var("B")
+
+    assert capsys.readouterr().out == "2\n"
+
+
+@pytest.mark.parametrize("config, error", [
+    ({"role": "owner"}, "No password found"),
+    ({"role": "guest", "password": PASSWORD}, "Unknown role: guest")
+])
+def test_invalid_config_is_reported(project, capsys, config, error):
+    _configure(project, config)
+
+    with pytest.raises(SystemExit):
+        get_env_var("B")
+
+    assert error in capsys.readouterr().out
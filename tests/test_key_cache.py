@@ -0,0 +1,81 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+from envhub.utils.keyCache import KeyCache
+
+
+def _derive(cache, password, salt, derived):
+    return cache.get_or_derive(password, salt, lambda: derived.append((password, salt)) or password + salt)
+
+
+def test_hits_and_misses():
+    cache, derived = KeyCache(maxsize=4), []
+
+    assert _derive(cache, b"password", b"salt-1", derived) == b"passwordsalt-1"
+    assert _derive(cache, b"password", b"salt-1", derived) == b"passwordsalt-1"
+    assert _derive(cache, b"password", b"salt-2", derived) == b"passwordsalt-2"
+    assert _derive(cache, b"other", b"salt-1", derived) == b"othersalt-1"
+
+    assert derived == [(b"password", b"salt-1"), (b"password", b"salt-2"), (b"other", b"salt-1")]
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 0, "size": 3, "maxsize": 4}
+
+
+def test_password_and_salt_boundaries_are_distinct():
+    cache, derived = KeyCache(maxsize=4), []
+
+    _derive(cache, b"ab", b"c", derived)
+    _derive(cache, b"a", b"bc", derived)
+
+    assert len(derived) == 2
+
+
+def test_least_recently_used_key_is_evicted():
+    cache, derived = KeyCache(maxsize=2), []
+
+    _derive(cache, b"password", b"salt-1", derived)
+    _derive(cache, b"password", b"salt-2", derived)
+    _derive(cache, b"password", b"salt-1", derived)
+    _derive(cache, b"password", b"salt-3", derived)
+    derived.clear()
+
+    _derive(cache, b"password", b"salt-1", derived)
+    _derive(cache, b"password", b"salt-3", derived)
+    assert derived == []
+    _derive(cache, b"password", b"salt-2", derived)
+    assert derived == [(b"password", b"salt-2")]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_evicted_and_cleared_keys_are_zeroized():
+    cache, derived = KeyCache(maxsize=1), []
+
+    _derive(cache, b"password", b"salt-1", derived)
+    evicted = next(iter(cache._entries.values()))
+    _derive(cache, b"password", b"salt-2", derived)
+    cleared = next(iter(cache._entries.values()))
+    cache.clear()
+
+    assert evicted == bytearray(len(b"passwordsalt-1"))
+    assert cleared == bytearray(len(b"passwordsalt-2"))
+    assert cache.stats()["size"] == 0
+
+
+def test_returned_keys_survive_zeroization():
+    cache, derived = KeyCache(maxsize=1), []
+
+    key = _derive(cache, b"password", b"salt-1", derived)
+    cached = _derive(cache, b"password", b"salt-1", derived)
+    cache.clear()
+
+    assert key == cached == b"passwordsalt-1"
+
+
+def test_size_zero_disables_the_cache():
+    cache, derived = KeyCache(maxsize=0), []
+
+    _derive(cache, b"password", b"salt-1", derived)
+    _derive(cache, b"password", b"salt-1", derived)
+
+    assert len(derived) == 2
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,73 @@
+# Copyright (c) 2025 Misbah Sarfaraz msbahsarfaraz@gmail.com
+# This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+# If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+
+from envhub.services.createEnvVersion import create_env_version_from_changes
+from envhub.utils import httpPool
+from envhub.utils.snapshotCache import ApiKeyRejectedError
+
+PASSWORD = "project-password"
+
+
+@pytest.fixture
+def runtime(backend):
+    # `envhub.runtime` reads the backend URL when it is imported.
+    from envhub import runtime
+
+    return runtime
+
+
+@pytest.fixture
+def api_key(backend, client, project_id):
+    api_key = str(uuid.uuid4())
+    backend.insert("api_keys", {"project_id": project_id,
+                                "key_hash": hashlib.sha256(api_key.encode("utf-8")).hexdigest()})
+    asyncio.run(create_env_version_from_changes(project_id, {"A": "1"}, [], PASSWORD, client))
+    return api_key
+
+
+def _transport_closed(transport) -> bool:
+    return transport._pool.connections == [] and transport not in httpPool._async_transports.values()
+
+
+def test_context_manager_closes_the_connections(runtime, api_key):
+    async def run():
+        async with runtime.AsyncEnvClient(api_key, PASSWORD, refresh_interval=60) as env:
+            assert env.get("A") == "1"
+            transport = httpPool.get_async_transport()
+            assert transport._pool.connections
+        return transport
+
+    assert _transport_closed(asyncio.run(run()))
+
+
+def test_connections_shared_with_another_client_stay_open(runtime, api_key):
+    async def run():
+        other = await httpPool.create_pooled_async_client(runtime.SUPABASE_URL, runtime.SUPABASE_KEY)
+        transport = httpPool.get_async_transport()
+        async with runtime.AsyncEnvClient(api_key, PASSWORD, refresh_interval=0):
+            pass
+        response = await other.rpc("get_environment_version_by_api_key", {"api_key_param": api_key}).execute()
+        assert response.data
+        assert not _transport_closed(transport)
+
+        await httpPool.close_pooled_async_client(other)
+        return transport
+
+    assert _transport_closed(asyncio.run(run()))
+
+
+def test_client_is_closed_when_start_fails(runtime):
+    async def run():
+        with pytest.raises(ApiKeyRejectedError):
+            async with runtime.AsyncEnvClient("invalid-key", PASSWORD, refresh_interval=0):
+                pass
+        return asyncio.get_running_loop()
+
+    assert asyncio.run(run()) not in httpPool._async_clients